@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the documentation analyzers
+
+Generates synthetic markdown trees of a given number of chunks, with
+injected duplicates, contradictions and terminology variants, runs each
+analyzer on them in a fresh process and reports per-stage timings (load,
+idf, vectorize, pairs, semantic, facts, terminology), throughput and peak
+memory as JSON. Runs offline: the advanced analyzer uses the fast tokenizer
+unless told otherwise.
+
+Compare against an earlier report with --baseline to catch regressions.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from docanalysis import SCIPY_AVAILABLE, peak_rss_mb
+from docanalysis.nlp import TOKENIZERS
+
+ENGINES = ('simple', 'advanced')
+# Pair scoring is roughly quadratic in pure Python, where 10k chunks already take
+# over a minute per analyzer; 100k chunks only fit the timeout with numpy/scipy
+# and can be asked for with --sizes otherwise
+DEFAULT_SIZES = (1000, 10000, 100000) if SCIPY_AVAILABLE else (1000, 10000)
+
+# Standard terms used in generated text, with the variants that may replace them
+TERMS = {
+    'configuration': ['config', 'cfg'],
+    'repository': ['repo'],
+    'directory': ['dir', 'folder'],
+    'authentication': ['auth'],
+    'application': ['app'],
+    'environment': ['env'],
+}
+
+# Statements with a polarity the analyzers look for, and their opposite
+POLARITY = {
+    'must': 'must not',
+    'should': 'should not',
+    'always': 'never',
+    'required': 'optional',
+    'enabled': 'disabled',
+    'allows': 'denies',
+    'public': 'private',
+}
+FLIP = re.compile(r'\b(' + '|'.join(POLARITY) + r')\b')
+
+TEMPLATES = [
+    "The {noun} {modal} load the {term} before the {noun2} starts.",
+    "Every {noun} {modal} register a {noun2} in the {term}.",
+    "{Noun} requests {always} pass through the {term} {noun2}.",
+    "Set the {noun} timeout to {number} seconds in the {term}.",
+    "A {noun} {noun2} is {required} for the {term}.",
+    "The {noun} cache is {enabled} by default for each {term}.",
+    "The {term} {allows} {noun} access to the {noun2} store.",
+    "Keep the {noun} {noun2} {public} when the {term} changes.",
+    "Use {number} {noun} workers per {term} {noun2}.",
+]
+
+SECTIONS_PER_FILE = 25
+FILES_PER_DIRECTORY = 50
+SENTENCES_PER_SECTION = 3
+TOPIC_NOUNS = 8
+
+
+def _vocabulary(rng: random.Random, size: int) -> List[str]:
+    """Distinct pronounceable pseudo-words"""
+    consonants, vowels = 'bdfgklmnprstvz', 'aeiou'
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(consonants) + rng.choice(vowels)
+                          for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+class CorpusGenerator:
+    """Deterministic synthetic documentation trees
+
+    Nouns follow a Zipf distribution and every file has a few topic nouns,
+    so chunks share vocabulary the way real documentation does. Rates are
+    fractions of sections: a duplicate copies an earlier section into
+    another file, a contradiction restates half of an earlier section with
+    every polarity and number flipped, and a variant section writes a
+    standard term as one of its variants.
+    """
+
+    def __init__(self, seed: int = 0, duplicate_rate: float = 0.02,
+                 contradiction_rate: float = 0.02, variant_rate: float = 0.1,
+                 sections_per_file: int = SECTIONS_PER_FILE):
+        self.seed = seed
+        self.duplicate_rate = duplicate_rate
+        self.contradiction_rate = contradiction_rate
+        self.variant_rate = variant_rate
+        self.sections_per_file = sections_per_file
+
+    def generate(self, path: str, sections: int) -> Dict:
+        """Write about sections chunks of markdown under path and return what was generated"""
+        rng = random.Random(self.seed)
+        nouns = _vocabulary(rng, 500 + sections // 4)
+        cumulative = []
+        total = 0.0
+        for rank in range(1, len(nouns) + 1):
+            total += 1.0 / rank
+            cumulative.append(total)
+
+        stats = {'files': 0, 'sections': 0, 'bytes': 0,
+                 'duplicates': 0, 'contradictions': 0, 'term_variants': 0}
+        written = []
+        n_files = -(-sections // self.sections_per_file)
+        for file_number in range(n_files):
+            directory = os.path.join(path, f'area{file_number // FILES_PER_DIRECTORY:03d}')
+            os.makedirs(directory, exist_ok=True)
+            topic = rng.choices(nouns, cum_weights=cumulative, k=TOPIC_NOUNS)
+            count = min(self.sections_per_file, sections - stats['sections'])
+
+            parts = [f"# {topic[0].capitalize()} guide\n"]
+            for _ in range(count):
+                roll = rng.random()
+                if written and roll < self.duplicate_rate:
+                    section = rng.choice(written)
+                    stats['duplicates'] += 1
+                elif written and roll < self.duplicate_rate + self.contradiction_rate:
+                    section = self._contradict(rng, rng.choice(written), topic, nouns, cumulative)
+                    stats['contradictions'] += 1
+                else:
+                    section = self._section(rng, topic, nouns, cumulative)
+                    written.append(section)
+                if rng.random() < self.variant_rate:
+                    section = self._variant(rng, section)
+                    stats['term_variants'] += 1
+                parts.append(section)
+
+            text = '\n'.join(parts)
+            with open(os.path.join(directory, f'doc{file_number:05d}.md'), 'w', encoding='utf-8') as f:
+                f.write(text)
+            stats['files'] += 1
+            stats['sections'] += count
+            stats['bytes'] += len(text.encode('utf-8'))
+        return stats
+
+    def _noun(self, rng: random.Random, topic: List[str], nouns: List[str], cumulative: List[float]) -> str:
+        if rng.random() < 0.7:
+            return rng.choice(topic)
+        return rng.choices(nouns, cum_weights=cumulative)[0]
+
+    def _sentence(self, rng: random.Random, topic: List[str], nouns: List[str], cumulative: List[float]) -> str:
+        noun = self._noun(rng, topic, nouns, cumulative)
+        return rng.choice(TEMPLATES).format(
+            noun=noun, Noun=noun.capitalize(), noun2=self._noun(rng, topic, nouns, cumulative),
+            term=rng.choice(list(TERMS)), number=rng.randint(1, 300),
+            modal=rng.choice(('must', 'should')), always='always', required='required',
+            enabled='enabled', allows='allows', public='public'
+        )
+
+    def _section(self, rng: random.Random, topic: List[str], nouns: List[str], cumulative: List[float]) -> str:
+        heading = ' '.join(rng.sample(topic, 2)).capitalize()
+        body = ' '.join(self._sentence(rng, topic, nouns, cumulative)
+                        for _ in range(SENTENCES_PER_SECTION))
+        return f"## {heading}\n\n{body}\n"
+
+    def _contradict(self, rng: random.Random, section: str, topic: List[str],
+                    nouns: List[str], cumulative: List[float]) -> str:
+        heading, body = section.split('\n\n', 1)
+        sentences = re.split(r'(?<=\.) ', body.strip())
+        kept = sentences[:max(1, len(sentences) // 2)]
+        flipped = [re.sub(r'\d+', lambda m: str(int(m.group()) * 2),
+                          FLIP.sub(lambda m: POLARITY[m.group()], sentence))
+                   for sentence in kept]
+        flipped.append(self._sentence(rng, topic, nouns, cumulative))
+        return f"{heading}\n\n{' '.join(flipped)}\n"
+
+    def _variant(self, rng: random.Random, section: str) -> str:
+        term = next((term for term in TERMS if term in section), None)
+        if term is None:
+            return section
+        return section.replace(term, rng.choice(TERMS[term]))
+
+
+def _run_engine(engine: str, corpus_path: str, options: Dict) -> Dict:
+    """Analyze a corpus with one engine; runs in a fresh process"""
+    started = time.perf_counter()
+    if engine == 'simple':
+        from detect_contradictions import SimpleSemanticAnalyzer
+        analyzer = SimpleSemanticAnalyzer()
+        analyzer.load_markdown_files(corpus_path)
+        results = analyzer.find_duplicates_and_contradictions(
+            max_df=options['max_df'], max_postings=options['max_postings'],
+            approximate_duplicates=options['approximate_duplicates'])
+        terminology = analyzer.find_terminology_inconsistencies()
+        files = len(set(analyzer.file_paths))
+        findings = {
+            'duplicates': len(results['duplicates']),
+            'contradictions': len(results['potential_contradictions']),
+            'terminology_issues': len(terminology),
+        }
+    else:
+        from detect_contradictions_advanced import AdvancedSemanticAnalyzer
+        analyzer = AdvancedSemanticAnalyzer(tokenizer=options['tokenizer'])
+        analyzer.load_markdown_files(corpus_path, jobs=options['jobs'])
+        results = analyzer.find_duplicates_and_contradictions(
+            jobs=options['jobs'], top_k=options['top_k'],
+            max_df=options['max_df'], max_postings=options['max_postings'],
+            approximate_duplicates=options['approximate_duplicates'])
+        terminology = analyzer.find_terminology_issues()
+        files = len(set(analyzer.documents.file_ids))
+        findings = {
+            'duplicates': results['duplicates'].total,
+            'contradictions': results['contradictions'].total,
+            'semantic_contradictions': results['semantic_contradictions'].total,
+            'numeric_conflicts': results['numeric_conflicts'].total,
+            'terminology_issues': len(terminology['inconsistencies']),
+        }
+    elapsed = time.perf_counter() - started
+    peak = peak_rss_mb()
+
+    chunks = len(analyzer.documents)
+    stages = {name: round(seconds, 4) for name, seconds in analyzer.timer.seconds.items()}
+    megabytes = sum(os.path.getsize(os.path.join(root, file))
+                    for root, _, names in os.walk(corpus_path)
+                    for file in names if file.endswith('.md')) / (1 << 20)
+    return {
+        'status': 'ok',
+        'chunks': chunks,
+        'files': files,
+        'total_seconds': round(elapsed, 4),
+        'stages': stages,
+        'throughput': {
+            'chunks_per_second': round(chunks / elapsed, 1) if elapsed else None,
+            'load_mb_per_second': round(megabytes / stages['load'], 2) if stages.get('load') else None,
+        },
+        'peak_rss_mb': round(peak, 1) if peak is not None else None,
+        'findings': findings,
+    }
+
+
+def _child(connection, engine: str, corpus_path: str, options: Dict):
+    try:
+        connection.send(_run_engine(engine, corpus_path, options))
+    except Exception as e:
+        connection.send({'status': 'error', 'error': f'{type(e).__name__}: {e}'})
+    finally:
+        connection.close()
+
+
+def measure(engine: str, corpus_path: str, options: Dict, timeout: Optional[float] = None) -> Dict:
+    """Run one engine in a fresh interpreter, so peak memory is its own"""
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(sender, engine, corpus_path, options))
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            return {'status': 'timeout', 'timeout_seconds': timeout}
+        return receiver.recv()
+    except EOFError:
+        return {'status': 'error', 'error': 'analyzer process died'}
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        receiver.close()
+
+
+def find_regressions(runs: List[Dict], baseline: Dict, tolerance: float, min_seconds: float) -> List[Dict]:
+    """Stages and totals that got slower (or memory that grew) by more than tolerance"""
+    previous = {(run['chunks_target'], run['engine']): run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in runs:
+        old = previous.get((run['chunks_target'], run['engine']))
+        if not old or run['status'] != 'ok' or old.get('status') != 'ok':
+            continue
+        measures = [('total_seconds', old['total_seconds'], run['total_seconds'])]
+        measures += [(f'stages.{name}', old['stages'].get(name), seconds)
+                     for name, seconds in run['stages'].items()]
+        for name, before, after in measures:
+            if before is not None and after - before > max(before * tolerance, min_seconds):
+                regressions.append({'chunks_target': run['chunks_target'], 'engine': run['engine'],
+                                    'measure': name, 'before': before, 'after': after})
+        before, after = old.get('peak_rss_mb'), run.get('peak_rss_mb')
+        if before and after and after > before * (1 + tolerance):
+            regressions.append({'chunks_target': run['chunks_target'], 'engine': run['engine'],
+                                'measure': 'peak_rss_mb', 'before': before, 'after': after})
+    return regressions
+
+
+def _comma_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the documentation analyzers on synthetic corpora")
+    parser.add_argument('--sizes', type=lambda v: [int(size) for size in _comma_list(v)],
+                        default=list(DEFAULT_SIZES),
+                        help="comma-separated corpus sizes in chunks (default: "
+                             f"{','.join(map(str, DEFAULT_SIZES))}; 100000 only with numpy/scipy)")
+    parser.add_argument('--engines', type=_comma_list, default=list(ENGINES),
+                        help="comma-separated engines to run (default: simple,advanced)")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="corpus generator seed (default: %(default)s)")
+    parser.add_argument('--duplicate-rate', type=float, default=0.02,
+                        help="fraction of sections copied from another file (default: %(default)s)")
+    parser.add_argument('--contradiction-rate', type=float, default=0.02,
+                        help="fraction of sections contradicting another one (default: %(default)s)")
+    parser.add_argument('--variant-rate', type=float, default=0.1,
+                        help="fraction of sections using a terminology variant (default: %(default)s)")
+    parser.add_argument('--sections-per-file', type=int, default=SECTIONS_PER_FILE,
+                        help="chunks per generated file (default: %(default)s)")
+    parser.add_argument('--corpus-dir',
+                        help="generate corpora here and keep them (default: a temporary directory)")
+    parser.add_argument('--tokenizer', choices=TOKENIZERS, default='fast',
+                        help="tokenizer of the advanced analyzer (default: %(default)s)")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="worker processes of the advanced analyzer (default: %(default)s)")
+    parser.add_argument('--top-k', type=int, metavar='K',
+                        help="keep only the K best findings of each kind")
+    parser.add_argument('--max-df', type=float, metavar='FRACTION',
+                        help="skip tokens in more than this fraction of chunks when generating candidate pairs")
+    parser.add_argument('--max-postings', type=int, metavar='N',
+                        help="skip tokens in more than N chunks when generating candidate pairs")
+    parser.add_argument('--approximate-duplicates', action='store_true',
+                        help="find duplicates with MinHash/LSH in both analyzers")
+    parser.add_argument('--timeout', type=float, default=1800,
+                        help="give up on a run after this many seconds (default: %(default)s)")
+    parser.add_argument('--output', metavar='PATH',
+                        help="write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', metavar='PATH',
+                        help="earlier report to compare with; exits 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown or memory growth against the baseline (default: %(default)s)")
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help="ignore slowdowns smaller than this (default: %(default)s)")
+    args = parser.parse_args()
+
+    unknown = [engine for engine in args.engines if engine not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engine(s): {', '.join(unknown)}")
+    if args.top_k is not None and args.top_k < 0:
+        parser.error("--top-k must not be negative")
+
+    generator = CorpusGenerator(args.seed, args.duplicate_rate, args.contradiction_rate,
+                                args.variant_rate, args.sections_per_file)
+    options = {'tokenizer': args.tokenizer, 'jobs': args.jobs, 'top_k': args.top_k,
+               'max_df': args.max_df, 'max_postings': args.max_postings,
+               'approximate_duplicates': args.approximate_duplicates}
+    root = args.corpus_dir or tempfile.mkdtemp(prefix='docanalysis-bench-')
+
+    runs = []
+    try:
+        for size in args.sizes:
+            corpus_path = os.path.join(root, f'corpus-{size}-seed{args.seed}')
+            if os.path.isdir(corpus_path):
+                shutil.rmtree(corpus_path)
+            started = time.perf_counter()
+            corpus = generator.generate(corpus_path, size)
+            corpus['generate_seconds'] = round(time.perf_counter() - started, 3)
+            print(f"📝 Generated {corpus['sections']} sections in {corpus['files']} files "
+                  f"({corpus['bytes'] / (1 << 20):.1f} MB)", file=sys.stderr)
+
+            for engine in args.engines:
+                print(f"⏱️  {engine} on {size} chunks...", file=sys.stderr)
+                run = {'chunks_target': size, 'engine': engine, 'corpus': corpus}
+                run.update(measure(engine, corpus_path, options, args.timeout))
+                runs.append(run)
+                if run['status'] == 'ok':
+                    print(f"   {run['total_seconds']:.2f}s, {run['throughput']['chunks_per_second']} chunks/s, "
+                          f"peak {run['peak_rss_mb']} MB", file=sys.stderr)
+                else:
+                    print(f"   ❌ {run['status']}: {run.get('error', '')}", file=sys.stderr)
+    finally:
+        if not args.corpus_dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'settings': {
+            'seed': args.seed,
+            'duplicate_rate': args.duplicate_rate,
+            'contradiction_rate': args.contradiction_rate,
+            'variant_rate': args.variant_rate,
+            'sections_per_file': args.sections_per_file,
+            'tokenizer': args.tokenizer,
+            'jobs': args.jobs,
+            'top_k': args.top_k,
+            'max_df': args.max_df,
+            'max_postings': args.max_postings,
+            'approximate_duplicates': args.approximate_duplicates,
+        },
+        'runs': runs,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            report['regressions'] = find_regressions(runs, json.load(f), args.tolerance, args.min_seconds)
+        for regression in report['regressions']:
+            print(f"⚠️  {regression['engine']} @ {regression['chunks_target']}: {regression['measure']} "
+                  f"{regression['before']} -> {regression['after']}", file=sys.stderr)
+        exit_code = 1 if report['regressions'] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"💾 Benchmark report saved to: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,65 +7,114 @@ Uses embeddings to find semantic similarities and potential conflicts
 import os
 import sys
 import json
+import argparse
 from pathlib import Path
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional, Set
 import hashlib
 
 # Simple embedding using TF-IDF (no external dependencies needed)
-from collections import Counter
+from collections import Counter, defaultdict
 import math
 
+from docanalysis import (
+    AnalysisCache,
+    InvertedIndex,
+    SparseMatrix,
+    TermScanner,
+    content_hash,
+    near_duplicate_pairs,
+    similar_pairs,
+)
+from docanalysis.cache import DEFAULT_CACHE_DIR
+from docanalysis.minhash import DEFAULT_BANDS, DEFAULT_ROWS
+from docanalysis.profiling import (
+    PROFILERS,
+    PYINSTRUMENT_AVAILABLE,
+    StageTimer,
+    print_timings,
+    profiler,
+    timings_report,
+)
+from docanalysis.rules import CONTRADICTION_INDICATORS, TERM_VARIATIONS
+
+# Cached chunks/words are only valid for the code that produced them
+ANALYZER_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:16]
+
 class SimpleSemanticAnalyzer:
     """Lightweight semantic analyzer using TF-IDF"""
 
-    def __init__(self):
+    def __init__(self, cache_dir: Optional[str] = None):
         self.documents = []
         self.file_paths = []
-        self.vocabulary = set()
+        self.chunk_words = []
         self.idf_scores = {}
+        self.index = InvertedIndex()
+        # Seconds spent in each analysis stage
+        self.timer = StageTimer()
+        # Work done: pairs considered/scored, contradiction checks, ...
+        self.counters = Counter()
+        self.cache = AnalysisCache(cache_dir, 'basic', ANALYZER_VERSION) if cache_dir else None
 
     def load_markdown_files(self, repo_path: str):
         """Load all markdown files from the repository"""
-        for root, dirs, files in os.walk(repo_path):
-            # Skip hidden directories
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
-
-            for file in files:
-                if file.endswith('.md'):
-                    path = os.path.join(root, file)
-                    try:
-                        with open(path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            # Split into meaningful chunks (paragraphs)
-                            chunks = [c.strip() for c in content.split('\n\n') if len(c.strip()) > 50]
-                            for chunk in chunks:
-                                self.documents.append(chunk.lower())
+        with self.timer.stage('load'):
+            for root, dirs, files in os.walk(repo_path):
+                # Skip hidden directories
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+
+                for file in files:
+                    if file.endswith('.md'):
+                        path = os.path.join(root, file)
+                        try:
+                            with open(path, 'r', encoding='utf-8') as f:
+                                content = f.read()
+
+                            # Reuse chunks and words of unchanged files
+                            entry = None
+                            if self.cache:
+                                key = content_hash(content)
+                                entry = self.cache.get(key)
+                            if entry is None:
+                                entry = self._analyze_file(content)
+                                if self.cache:
+                                    self.cache.put(key, entry)
+
+                            for chunk, words in zip(entry['chunks'], entry['words']):
+                                self.documents.append(chunk)
                                 self.file_paths.append(path)
-                                # Build vocabulary
-                                words = chunk.lower().split()
-                                self.vocabulary.update(words)
-                    except Exception as e:
-                        print(f"Error reading {path}: {e}")
+                                self.chunk_words.append(words)
+                                # Build postings (the index interns the vocabulary)
+                                self.index.add(len(self.documents) - 1, words)
+                        except Exception as e:
+                            print(f"Error reading {path}: {e}")
 
         # Calculate IDF scores
         self._calculate_idf()
 
+    def _analyze_file(self, content: str) -> Dict:
+        """Split a markdown file into lowercased paragraph chunks and their words"""
+        # Split into meaningful chunks (paragraphs)
+        chunks = [c.strip().lower() for c in content.split('\n\n') if len(c.strip()) > 50]
+        return {
+            'chunks': chunks,
+            'words': [chunk.split() for chunk in chunks]
+        }
+
     def _calculate_idf(self):
         """Calculate IDF scores for all words"""
-        total_docs = len(self.documents)
-        word_doc_count = Counter()
-
-        for doc in self.documents:
-            unique_words = set(doc.split())
-            for word in unique_words:
-                word_doc_count[word] += 1
+        with self.timer.stage('idf'):
+            total_docs = len(self.documents)
 
-        for word, count in word_doc_count.items():
-            self.idf_scores[word] = math.log(total_docs / count)
+            # Posting lists hold the chunks containing each word, so no second pass over the words
+            for word, docs in zip(self.index.vocabulary.tokens, self.index.postings):
+                self.idf_scores[word] = math.log(total_docs / len(docs))
 
     def _get_tfidf_vector(self, text: str) -> Dict[str, float]:
         """Convert text to TF-IDF vector"""
-        words = text.lower().split()
+        return self._tfidf_from_words(text.lower().split())
+
+    def _tfidf_from_words(self, words: List[str]) -> Dict[str, float]:
+        """TF-IDF vector of an already split text"""
         tf = Counter(words)
 
         # Normalize TF
@@ -94,64 +143,97 @@ class SimpleSemanticAnalyzer:
 
         return dot_product / (mag1 * mag2)
 
-    def find_duplicates_and_contradictions(self, similarity_threshold=0.7):
-        """Find potential duplicates and contradictions"""
+    def _pair_result(self, i: int, j: int, similarity: float) -> Dict:
+        """Report entry for a pair of chunks"""
+        return {
+            'similarity': round(similarity, 3),
+            'file1': self.file_paths[i],
+            'text1': self.documents[i][:200] + '...',
+            'file2': self.file_paths[j],
+            'text2': self.documents[j][:200] + '...'
+        }
+
+    def find_duplicates_and_contradictions(self, similarity_threshold=0.7,
+                                           max_df=None, max_postings=None,
+                                           approximate_duplicates=False,
+                                           lsh_bands=DEFAULT_BANDS, lsh_rows=DEFAULT_ROWS):
+        """Find potential duplicates and contradictions
+
+        max_df / max_postings skip very common words when generating
+        candidate pairs. approximate_duplicates finds duplicates with
+        MinHash/LSH; the exact scan then only scores pairs that can be
+        contradictions (see _polar_chunks).
+        """
         results = {
             'duplicates': [],
             'potential_contradictions': []
         }
 
-        # Convert all documents to TF-IDF vectors
-        vectors = [self._get_tfidf_vector(doc) for doc in self.documents]
-
-        # Compare all document pairs
-        for i in range(len(self.documents)):
-            for j in range(i + 1, len(self.documents)):
-                similarity = self._cosine_similarity(vectors[i], vectors[j])
-
+        # Convert all documents to a sparse TF-IDF matrix
+        with self.timer.stage('vectorize'):
+            matrix = SparseMatrix.from_rows(
+                (self._tfidf_from_words(words) for words in self.chunk_words),
+                vocabulary=self.index.vocabulary
+            )
+
+        with self.timer.stage('pairs'):
+            if approximate_duplicates:
+                near_duplicates = near_duplicate_pairs(
+                    self.chunk_words, matrix,
+                    similarity_threshold, bands=lsh_bands, rows=lsh_rows
+                )
+                for i, j, similarity in near_duplicates:
+                    if self.file_paths[i] != self.file_paths[j]:
+                        results['duplicates'].append(self._pair_result(i, j, similarity))
+                min_similarity = 0.4
+                focus = self._polar_chunks()
+            else:
+                min_similarity = min(similarity_threshold, 0.4)
+                focus = None
+
+            pairs = similar_pairs(
+                matrix, min_similarity,
+                index=self.index, max_df=max_df, max_postings=max_postings,
+                focus=focus, stats=self.counters
+            )
+
+            # Compare only document pairs sharing words above the lowest threshold of interest
+            for i, j, similarity in pairs:
                 if similarity > similarity_threshold:
                     # Check if they're from different files
-                    if self.file_paths[i] != self.file_paths[j]:
+                    if not approximate_duplicates and self.file_paths[i] != self.file_paths[j]:
                         # Potential duplicate
-                        results['duplicates'].append({
-                            'similarity': round(similarity, 3),
-                            'file1': self.file_paths[i],
-                            'text1': self.documents[i][:200] + '...',
-                            'file2': self.file_paths[j],
-                            'text2': self.documents[j][:200] + '...'
-                        })
+                        results['duplicates'].append(self._pair_result(i, j, similarity))
 
                 # Check for contradictions (moderate similarity + negation patterns)
                 elif 0.4 < similarity < 0.7:
+                    self.counters['contradiction_checks'] += 1
                     if self._contains_contradiction_patterns(
                         self.documents[i], self.documents[j]
                     ):
-                        results['potential_contradictions'].append({
-                            'similarity': round(similarity, 3),
-                            'file1': self.file_paths[i],
-                            'text1': self.documents[i][:200] + '...',
-                            'file2': self.file_paths[j],
-                            'text2': self.documents[j][:200] + '...'
-                        })
+                        results['potential_contradictions'].append(self._pair_result(i, j, similarity))
 
         return results
 
+    def _polar_chunks(self) -> Set[int]:
+        """Chunks of which every contradiction pair has at least one
+
+        A pair only matches if one chunk contains the positive and the
+        other the negative form of some indicator, so it involves a chunk
+        of each kind; the smaller set of the two is returned.
+        """
+        positive, negative = set(), set()
+        for i, text in enumerate(self.documents):
+            for positive_form, negative_form in CONTRADICTION_INDICATORS:
+                if positive_form in text:
+                    positive.add(i)
+                if negative_form in text:
+                    negative.add(i)
+        return min(positive, negative, key=len)
+
     def _contains_contradiction_patterns(self, text1: str, text2: str) -> bool:
         """Simple heuristic to detect potential contradictions"""
-        contradiction_indicators = [
-            ('must', 'must not'),
-            ('should', 'should not'),
-            ('always', 'never'),
-            ('required', 'optional'),
-            ('yes', 'no'),
-            ('true', 'false'),
-            ('will', "won't"),
-            ('does', "doesn't"),
-            ('is', "isn't"),
-            ('are', "aren't")
-        ]
-
-        for positive, negative in contradiction_indicators:
+        for positive, negative in CONTRADICTION_INDICATORS:
             if (positive in text1 and negative in text2) or \
                (negative in text1 and positive in text2):
                 return True
@@ -160,58 +242,99 @@ class SimpleSemanticAnalyzer:
 
     def find_terminology_inconsistencies(self):
         """Find potential terminology inconsistencies"""
-        # Common technical term variations
-        term_variations = [
-            ['component', 'widget', 'element'],
-            ['function', 'method', 'procedure'],
-            ['property', 'attribute', 'field'],
-            ['directory', 'folder'],
-            ['repository', 'repo'],
-            ['configuration', 'config', 'settings'],
-            ['authentication', 'auth'],
-            ['authorization', 'authz'],
-            ['identifier', 'id'],
-            ['application', 'app']
-        ]
-
-        inconsistencies = []
-
-        for variations in term_variations:
-            files_using_terms = {term: set() for term in variations}
+        with self.timer.stage('terminology'):
+            inconsistencies = []
 
+            # One pass per chunk finds every term (chunks are already lowercased)
+            scanner = TermScanner((term for variations in TERM_VARIATIONS for term in variations),
+                                  whole_words=False)
+            term_files = defaultdict(set)
             for doc, path in zip(self.documents, self.file_paths):
-                for term in variations:
-                    if term in doc:
-                        files_using_terms[term].add(path)
+                for term in scanner.counts(doc):
+                    term_files[term].add(path)
+            self.counters['regex_evaluations'] += len(self.documents)
+
+            for variations in TERM_VARIATIONS:
+                files_using_terms = {term: term_files.get(term, set()) for term in variations}
 
-            # Check if multiple variations are used
-            used_variations = [(term, files) for term, files in files_using_terms.items() if files]
-            if len(used_variations) > 1:
-                inconsistencies.append({
-                    'terms': [term for term, _ in used_variations],
-                    'usage': {term: list(files) for term, files in used_variations}
-                })
+                # Check if multiple variations are used
+                used_variations = [(term, files) for term, files in files_using_terms.items() if files]
+                if len(used_variations) > 1:
+                    inconsistencies.append({
+                        'terms': [term for term, _ in used_variations],
+                        'usage': {term: list(files) for term, files in used_variations}
+                    })
 
-        return inconsistencies
+            return inconsistencies
 
 def main():
     """Main entry point"""
-    repo_path = '/Users/chocho/projects/thevibecoders-revamped'
+    parser = argparse.ArgumentParser(description="Documentation contradiction and duplicate detector")
+    parser.add_argument('--repo-path', default=str(Path(__file__).resolve().parent.parent),
+                        help="repository to analyze (default: this checkout)")
+    parser.add_argument('--max-df', type=float, metavar='FRACTION',
+                        help="don't generate candidate pairs from tokens in more than this fraction of "
+                             "chunks; they still count towards the similarity of other candidates")
+    parser.add_argument('--max-postings', type=int, metavar='N',
+                        help="don't generate candidate pairs from tokens in more than N chunks")
+    parser.add_argument('--approximate-duplicates', action='store_true',
+                        help="find duplicates with MinHash/LSH instead of an exact pairwise scan")
+    parser.add_argument('--lsh-bands', type=int, default=DEFAULT_BANDS,
+                        help="LSH bands; more bands raise recall (default: %(default)s)")
+    parser.add_argument('--lsh-rows', type=int, default=DEFAULT_ROWS,
+                        help="rows per LSH band; more rows raise precision (default: %(default)s)")
+    parser.add_argument('--cache-dir',
+                        help=f"per-file analysis cache (default: <repo>/{DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-process every file without reading or writing the cache")
+    parser.add_argument('--profile', action='store_true',
+                        help="record stage timings, counters and peak memory in statistics.timings")
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help="also write a profiler dump of the whole run to PATH (implies --profile)")
+    parser.add_argument('--profiler', choices=PROFILERS, default='cprofile',
+                        help="profiler used for --profile-output (default: %(default)s)")
+    args = parser.parse_args()
+    args.profile = args.profile or bool(args.profile_output)
+    if args.max_df is not None and not 0 < args.max_df <= 1:
+        parser.error("--max-df must be a fraction in (0, 1]")
+    if args.max_postings is not None and args.max_postings < 1:
+        parser.error("--max-postings must be at least 1")
+    if args.profile_output and args.profiler == 'pyinstrument' and not PYINSTRUMENT_AVAILABLE:
+        parser.error("--profiler pyinstrument needs pyinstrument: pip install pyinstrument")
+
+    with profiler(args.profile_output, args.profiler):
+        analyze(args)
+    if args.profile_output:
+        print(f"📈 Profile written to: {args.profile_output}")
+
+
+def analyze(args: argparse.Namespace):
+    """Run the analysis configured by the command line arguments"""
+    repo_path = args.repo_path
+    cache_dir = None if args.no_cache else (args.cache_dir or os.path.join(repo_path, DEFAULT_CACHE_DIR))
 
     print("🤖 AI-Powered Documentation Analyzer")
     print("=" * 50)
 
-    analyzer = SimpleSemanticAnalyzer()
+    analyzer = SimpleSemanticAnalyzer(cache_dir=cache_dir)
 
     print(f"📂 Loading documents from: {repo_path}")
     analyzer.load_markdown_files(repo_path)
+    if analyzer.cache:
+        analyzer.cache.prune()
+        print(f"♻️  Reused cached analysis for {analyzer.cache.hits} of "
+              f"{analyzer.cache.hits + analyzer.cache.misses} files")
 
     print(f"📊 Loaded {len(analyzer.documents)} text chunks from {len(set(analyzer.file_paths))} files")
-    print(f"📚 Vocabulary size: {len(analyzer.vocabulary)} unique words")
+    print(f"📚 Vocabulary size: {len(analyzer.index.vocabulary)} unique words")
     print()
 
     print("🔍 Analyzing for duplicates and contradictions...")
-    results = analyzer.find_duplicates_and_contradictions()
+    results = analyzer.find_duplicates_and_contradictions(
+        max_df=args.max_df, max_postings=args.max_postings,
+        approximate_duplicates=args.approximate_duplicates,
+        lsh_bands=args.lsh_bands, lsh_rows=args.lsh_rows
+    )
 
     # Display duplicates
     if results['duplicates']:
@@ -247,17 +370,22 @@ def main():
         print("\n✅ Terminology is consistent")
 
     # Save detailed results
+    statistics = {
+        'total_documents': len(analyzer.documents),
+        'unique_files': len(set(analyzer.file_paths)),
+        'vocabulary_size': len(analyzer.index.vocabulary)
+    }
+    if args.profile:
+        statistics['timings'] = timings_report(analyzer.timer, analyzer.counters)
+        print_timings(statistics['timings'])
+
     output_file = os.path.join(repo_path, 'contradiction_analysis.json')
     with open(output_file, 'w') as f:
         json.dump({
             'duplicates': results['duplicates'],
             'contradictions': results['potential_contradictions'],
             'terminology_inconsistencies': inconsistencies,
-            'statistics': {
-                'total_documents': len(analyzer.documents),
-                'unique_files': len(set(analyzer.file_paths)),
-                'vocabulary_size': len(analyzer.vocabulary)
-            }
+            'statistics': statistics
         }, f, indent=2)
 
     print(f"\n💾 Detailed results saved to: {output_file}")
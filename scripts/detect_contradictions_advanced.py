@@ -7,54 +7,113 @@ Enhanced with NLP capabilities for better semantic analysis
 import os
 import sys
 import json
-import re
+import argparse
 from pathlib import Path
-from typing import List, Tuple, Dict, Set
-from collections import Counter, defaultdict
+from typing import Callable, Iterable, List, Tuple, Dict, Set, Optional
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future
+from itertools import chain, islice
+import heapq
 import math
 import hashlib
+import time
+from array import array
+
+from docanalysis import (
+    AnalysisCache,
+    FindingStream,
+    Findings,
+    InvertedIndex,
+    Memoized,
+    PolarityScanner,
+    SentenceIndex,
+    SpanStore,
+    SparseMatrix,
+    TermScanner,
+    TokenStore,
+    TopFindings,
+    changed_files,
+    content_hash,
+    decode_features,
+    encode_features,
+    iter_markdown_files,
+    map_tiles,
+    near_duplicate_pairs,
+    opposed,
+    resolve_jobs,
+    similar_pairs,
+    triangular_tiles,
+)
+from docanalysis import chunker, corpus, facts, nlp, polarity, rewrite, rules, semantic
+from docanalysis.cache import DEFAULT_CACHE_DIR
+from docanalysis.chunker import chunk_id, iter_chunks
+from docanalysis.corpus import READ_AHEAD, READ_THREADS, Buffer, close_buffer, open_buffer, read_ahead
+from docanalysis.facts import (FactIndex, conflicting_values, decode_facts, encode_facts, extract_facts,
+                               mask_code)
+from docanalysis.indexfile import IndexFile, MappedVocabulary, TokenValues, csr, string_table, write_index
+from docanalysis.minhash import DEFAULT_BANDS, DEFAULT_ROWS
+from docanalysis.nlp import NLTKDataError, Tokenizer
+from docanalysis.parallel import STREAM_TILES, TILES_PER_JOB, worker_pool
+from docanalysis.profiling import (
+    PROFILERS,
+    PYINSTRUMENT_AVAILABLE,
+    StageTimer,
+    print_timings,
+    profiler,
+    timings_report,
+)
+from docanalysis.rules import (
+    BASIC_CONTRADICTION_BAND,
+    BASIC_DUPLICATE_THRESHOLD,
+    RULE_SETS,
+    TERM_VARIATIONS,
+    indicator_polarity,
+)
+from docanalysis.semantic import SentenceFeatures
+from docanalysis.stats import WEIGHTINGS, CorpusStats, term_weights
+from docanalysis.tokens import TEXT_CACHE_SIZE
+from docanalysis.watch import DEFAULT_INTERVAL, FindingSet, PollingWatcher, snapshot
+
+# Cached chunks/tokens are only valid for the code that produced them; the
+# tokenizer mode is added per analyzer
+ANALYZER_VERSION = hashlib.sha256(
+    b''.join(Path(source).read_bytes()
+             for source in (__file__, chunker.__file__, corpus.__file__, facts.__file__, nlp.__file__,
+                            polarity.__file__, rewrite.__file__, rules.__file__, semantic.__file__))
+).hexdigest()[:16]
+
+# Pair finding kinds (also the kind of streamed findings) and their report keys
+ADVANCED_KINDS = ('duplicate', 'contradiction')
+BASIC_KINDS = ('basic_duplicate', 'basic_contradiction')
+FINDING_KEYS = {kind: kind + 's' for kind in ADVANCED_KINDS + BASIC_KINDS}
+# Findings between sentences rather than chunks
+SENTENCE_KINDS = ('semantic_contradiction', 'numeric_conflict')
+
+# Share of retired chunks at which update_files rebuilds the index
+COMPACT_FRACTION = 0.25
 
-# Try to import advanced NLP libraries
-try:
-    import nltk
-    from nltk.tokenize import word_tokenize, sent_tokenize
-    from nltk.corpus import stopwords
-    from nltk.stem import PorterStemmer
-    NLTK_AVAILABLE = True
-
-    # Download required NLTK data
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt', quiet=True)
-    try:
-        nltk.data.find('corpora/stopwords')
-    except LookupError:
-        nltk.download('stopwords', quiet=True)
-except ImportError:
-    NLTK_AVAILABLE = False
-    print("⚠️  NLTK not installed. Using basic tokenization. Install with: pip install nltk")
 
 class AdvancedSemanticAnalyzer:
     """Advanced semantic analyzer with NLP enhancements"""
 
-    def __init__(self):
-        self.documents = []
-        self.file_paths = []
-        self.vocabulary = set()
-        self.idf_scores = {}
+    def __init__(self, cache_dir: Optional[str] = None, tokenizer: Optional[str] = None,
+                 resident: bool = False, weighting: str = 'max'):
+        # Analysis entry of every loaded file, kept when resident for update_files
+        self.entries: Optional[Dict[str, Dict]] = {} if resident else None
+        # Term weighting of chunk vectors (see docanalysis.stats)
+        self.weighting = weighting
+        # Seconds spent in each analysis stage
+        self.timer = StageTimer()
+        # Work done: pairs considered/scored, regex evaluations, ...
+        self.counters = Counter()
         self.contradictions_found = []
         self.duplicates_found = []
 
-        # NLP components
-        if NLTK_AVAILABLE:
-            self.stop_words = set(stopwords.words('english'))
-            self.stemmer = PorterStemmer()
-        else:
-            # Basic stop words if NLTK not available
-            self.stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on',
-                               'at', 'to', 'for', 'of', 'with', 'by', 'from', 'as'}
-            self.stemmer = None
+        # NLP components (NLTK is only loaded once the first text is tokenized)
+        self.tokenizer = Tokenizer(tokenizer)
+        self.cache = (AnalysisCache(cache_dir, 'advanced', f'{ANALYZER_VERSION}-{self.tokenizer.mode}')
+                      if cache_dir else None)
+        self._tokens_of_text = Memoized(self._tokenize_text, TEXT_CACHE_SIZE)
 
         # Semantic patterns for contradiction detection
         self.negation_patterns = [
@@ -71,6 +130,11 @@ class AdvancedSemanticAnalyzer:
             (r'\bclient', r'\bserver'),
             (r'\bpublic\b', r'\bprivate\b'),
         ]
+        self.polarity_scanner = PolarityScanner(self.negation_patterns)
+        self._reset_corpus()
+        # Mapped index file and its metadata, once load_index succeeds
+        self.index_file: Optional[IndexFile] = None
+        self.index_meta: Dict = {}
 
         # Technical terminology standardization rules
         self.term_standardization = {
@@ -92,123 +156,203 @@ class AdvancedSemanticAnalyzer:
             'documentation': ['docs', 'doc']
         }
 
-    def _tokenize(self, text: str) -> List[str]:
-        """Advanced tokenization with NLP"""
-        if NLTK_AVAILABLE:
-            # Use NLTK tokenization
-            tokens = word_tokenize(text.lower())
-            # Remove stop words and apply stemming
-            tokens = [self.stemmer.stem(t) for t in tokens
-                     if t.isalnum() and t not in self.stop_words]
-        else:
-            # Basic tokenization
-            text = re.sub(r'[^\w\s]', ' ', text.lower())
-            tokens = [t for t in text.split() if t and t not in self.stop_words]
-
-        return tokens
+    def _reset_corpus(self):
+        """Empty chunk, token, sentence and fact stores"""
+        self.documents = SpanStore()
+        self.chunk_ids = array('Q')
+        self.chunk_lines = array('i')
+        # Polarity masks of every chunk
+        self.chunk_positive = array('I')
+        self.chunk_negative = array('I')
+        # Contradiction indicator masks of every chunk (basic rules)
+        self.indicator_positive = array('I')
+        self.indicator_negative = array('I')
+        # Flat (start, end) offsets of every sentence within its chunk, by sentence id
+        self.sentence_spans = array('i')
+        self.idf_scores = {}
+        self.idf = array('d')
+        self.index = InvertedIndex()
+        # Token ids of every chunk, over the index's vocabulary
+        self.tokens = TokenStore(self.index.vocabulary)
+        self.matrix = None
+        self.sentence_index = SentenceIndex(len(self.negation_patterns))
+        # Numeric facts of every sentence, by subject
+        self.fact_index = FactIndex()
+        # Current chunks of every file, and chunks retired by update_files
+        self.file_chunks: Dict[str, range] = {}
+        self.removed: Set[int] = set()
+        # Term and document frequencies and chunk lengths, counted as chunks are added
+        self.stats = CorpusStats(self.index.vocabulary)
+        # Chunk norms maintained by update_files
+        self.norms = array('d')
+
+    def _tokenize(self, text: str) -> Tuple[str, ...]:
+        """Advanced tokenization with NLP, computed once per distinct text"""
+        return self._tokens_of_text(text)
+
+    def _tokenize_text(self, text: str) -> Tuple[str, ...]:
+        return tuple(self.tokenizer.words(text))
 
     def _extract_sentences(self, text: str) -> List[str]:
         """Extract sentences from text"""
-        if NLTK_AVAILABLE:
-            return sent_tokenize(text)
-        else:
-            # Basic sentence splitting
-            sentences = re.split(r'[.!?]+', text)
-            return [s.strip() for s in sentences if s.strip()]
-
-    def load_markdown_files(self, repo_path: str):
-        """Load all markdown files with enhanced parsing"""
-        for root, dirs, files in os.walk(repo_path):
-            # Skip hidden and system directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'node_modules']
-
-            for file in files:
-                if file.endswith('.md'):
-                    path = os.path.join(root, file)
+        return self.tokenizer.sentences(text)
+
+    def _sentence_spans(self, text: str, sentences: List[str]) -> array:
+        """Flat (start, end) character offsets of each sentence within its chunk"""
+        spans = array('i')
+        position = 0
+        for sentence in sentences:
+            start = text.find(sentence, position)
+            position = start + len(sentence)
+            spans.extend((start, position))
+        return spans
+
+    def load_markdown_files(self, repo_path: str, jobs: int = 1, read_threads: int = READ_THREADS):
+        """Stream all markdown files into span-backed chunks with enhanced parsing
+
+        Files are read ahead on read_threads threads; files missing from the
+        cache are chunked and tokenized on jobs worker processes. Chunks are
+        added in file order however the work finishes.
+        """
+        with self.timer.stage('load'):
+            # (path, cache key, entry or future entry) of files not added yet
+            pending = deque()
+            with worker_pool(jobs, self) as submit:
+                for path, read in read_ahead(iter_markdown_files(repo_path), read_threads):
                     try:
-                        with open(path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-
-                            # Enhanced chunking: by sections and paragraphs
-                            sections = self._extract_sections(content)
-
-                            for section in sections:
-                                if len(section.strip()) > 50:
-                                    self.documents.append(section)
-                                    self.file_paths.append(path)
-
-                                    # Build vocabulary with tokenization
-                                    tokens = self._tokenize(section)
-                                    self.vocabulary.update(tokens)
+                        markdown = read.result()
+                        try:
+                            # Reuse chunks, tokens and sentence features of unchanged files
+                            key = entry = None
+                            if self.cache:
+                                key = content_hash(markdown)
+                                entry = self.cache.get(key)
+                            if entry is None:
+                                # Memory maps cannot be sent to worker processes
+                                entry = submit(AdvancedSemanticAnalyzer._analyze_file_counted,
+                                               markdown if jobs <= 1 else bytes(markdown))
+                        finally:
+                            close_buffer(markdown)
                     except Exception as e:
                         print(f"Error reading {path}: {e}")
+                        continue
+
+                    pending.append((path, key, entry))
+                    if len(pending) >= READ_AHEAD:
+                        self._add_file(*pending.popleft())
+                while pending:
+                    self._add_file(*pending.popleft())
 
         # Calculate IDF scores
         self._calculate_idf()
 
-    def _extract_sections(self, markdown_content: str) -> List[str]:
-        """Extract logical sections from markdown"""
-        sections = []
-
-        # Split by headers
-        header_pattern = r'^#+\s+.+$'
-        lines = markdown_content.split('\n')
-
-        current_section = []
-        for line in lines:
-            if re.match(header_pattern, line) and current_section:
-                # New section starting
-                sections.append('\n'.join(current_section))
-                current_section = [line]
-            else:
-                current_section.append(line)
-
-        if current_section:
-            sections.append('\n'.join(current_section))
-
-        # Also split by double newlines for paragraphs
-        for section in sections[:]:
-            if len(section) > 1000:  # Large sections
-                paragraphs = section.split('\n\n')
-                sections.remove(section)
-                sections.extend(p for p in paragraphs if len(p.strip()) > 50)
-
-        return sections
+    def _add_file(self, path: str, key: Optional[str], entry):
+        """Add the chunks of one file, waiting for its analysis if it is still running"""
+        if isinstance(entry, Future):
+            try:
+                entry, counts = entry.result()
+            except NLTKDataError:
+                raise
+            except Exception as e:
+                print(f"Error reading {path}: {e}")
+                return
+            self.counters.update(counts)
+            if self.cache:
+                self.cache.put(key, entry)
+
+        file_id = self.documents.add_file(path)
+        first_chunk = len(self.documents)
+        chunk_fields = zip(entry['chunks'], entry['ids'], entry['lines'], entry['tokens'],
+                           entry['sentences'], entry['features'], entry['sentence_features'],
+                           entry['sentence_facts'], entry['indicators'])
+        for ((offset, length), identifier, lines, tokens, sentences, features,
+             sentence_features, sentence_facts, indicators) in chunk_fields:
+            chunk = self.documents.add(file_id, offset, length)
+            self.chunk_ids.append(int(identifier, 16))
+            self.chunk_lines.extend(lines)
+            token_ids = self.tokens.add(tokens)
+            self.stats.add(token_ids)
+            positive, negative = features
+            self.chunk_positive.append(positive)
+            self.chunk_negative.append(negative)
+            self.sentence_spans.extend(sentences)
+            first_sentence = len(self.sentence_index.chunk_of)
+            self.sentence_index.add_chunk(decode_features(f) for f in sentence_features)
+            for k, encoded_facts in enumerate(sentence_facts):
+                if encoded_facts:
+                    self.fact_index.add(first_sentence + k, decode_facts(encoded_facts))
+            self.indicator_positive.append(indicators[0])
+            self.indicator_negative.append(indicators[1])
+
+            # Build postings
+            self.index.add_ids(chunk, token_ids)
+
+        self.file_chunks[path] = range(first_chunk, len(self.documents))
+        if self.entries is not None:
+            self.entries[path] = entry
+
+    def _analyze_file_counted(self, markdown: Buffer) -> Tuple[Dict, Counter]:
+        """_analyze_file and the work it counted, wherever it runs"""
+        counters = self.counters
+        self.counters = Counter()
+        try:
+            return self._analyze_file(markdown), self.counters
+        finally:
+            self.counters = counters
+
+    def _analyze_file(self, markdown: Buffer) -> Dict:
+        """Chunk a markdown file and tokenize/classify every chunk and its sentences"""
+        entry = {'chunks': [], 'ids': [], 'lines': [], 'tokens': [], 'sentences': [],
+                 'features': [], 'sentence_features': [], 'sentence_facts': [], 'indicators': []}
+
+        # Enhanced chunking: by sections, and by blocks for long sections
+        for chunk in iter_chunks(markdown):
+            section = chunk.text
+            if len(section.strip()) <= 50:
+                continue
+            tokens = self._tokenize(section)
+            sentences = self._extract_sentences(section)
+            entry['chunks'].append([chunk.offset, chunk.length])
+            entry['ids'].append(chunk_id(section))
+            entry['lines'].append([chunk.start_line, chunk.end_line])
+            entry['tokens'].append(tokens)
+            spans = self._sentence_spans(section, sentences)
+            entry['sentences'].append(spans.tolist())
+            entry['features'].append(encode_features(self._classify_sentence(section)))
+            entry['sentence_features'].append(
+                [encode_features(self._classify_sentence(sentence)) for sentence in sentences]
+            )
+            # Facts are read with the chunk's code blanked out, as fences span sentences
+            masked = mask_code(section)
+            entry['sentence_facts'].append(
+                [encode_facts(self._extract_facts(masked[spans[2 * k]:spans[2 * k + 1]]))
+                 for k in range(len(sentences))]
+            )
+            entry['indicators'].append(list(indicator_polarity(section.lower())))
+        return entry
 
     def _calculate_idf(self):
-        """Calculate IDF scores for all tokens"""
-        total_docs = len(self.documents)
-        if total_docs == 0:
-            return
+        """Calculate IDF scores for all tokens from the corpus statistics"""
+        with self.timer.stage('idf'):
+            if self.stats.n_docs == 0:
+                return
 
-        word_doc_count = Counter()
-
-        for doc in self.documents:
-            unique_tokens = set(self._tokenize(doc))
-            for token in unique_tokens:
-                word_doc_count[token] += 1
-
-        for word, count in word_doc_count.items():
-            self.idf_scores[word] = math.log(total_docs / (count + 1))
+            self.idf = self.stats.idf(self.weighting)
+            self.idf_scores = dict(zip(self.index.vocabulary.tokens, self.idf))
 
     def _get_tfidf_vector(self, text: str) -> Dict[str, float]:
         """Convert text to TF-IDF vector with advanced tokenization"""
-        tokens = self._tokenize(text)
-        tf = Counter(tokens)
-
-        if not tf:
-            return {}
+        return self._tfidf_from_tokens(self._tokenize(text))
 
-        # Normalize TF
-        max_freq = max(tf.values())
-        tfidf = {}
+    def _tfidf_from_tokens(self, tokens: List[str]) -> Dict[str, float]:
+        """TF-IDF vector of an already tokenized text, weighted like the indexed chunks"""
+        idf_scores = self.idf_scores
+        return term_weights(Counter(tokens), lambda token: idf_scores.get(token, 0), self.weighting,
+                            average_length=self.stats.average_length)
 
-        for token, freq in tf.items():
-            normalized_tf = freq / max_freq
-            idf = self.idf_scores.get(token, 0)
-            tfidf[token] = normalized_tf * idf
-
-        return tfidf
+    def _chunk_weights(self, chunk: int) -> Dict[int, float]:
+        """TF-IDF vector of a chunk from its counted terms, keyed by token id"""
+        return self.stats.weights(chunk, self.idf, self.weighting)
 
     def _cosine_similarity(self, vec1: Dict, vec2: Dict) -> float:
         """Calculate cosine similarity between vectors"""
@@ -223,303 +367,1284 @@ class AdvancedSemanticAnalyzer:
 
         return dot_product / (mag1 * mag2)
 
-    def detect_semantic_contradictions(self) -> List[Dict]:
-        """Advanced contradiction detection using semantic patterns"""
-        contradictions = []
-
-        for i in range(len(self.documents)):
-            doc1_sentences = self._extract_sentences(self.documents[i])
-
-            for j in range(i + 1, len(self.documents)):
-                doc2_sentences = self._extract_sentences(self.documents[j])
+    def _classify_sentence(self, sentence: str) -> SentenceFeatures:
+        """Polarity pattern masks of a sentence or chunk"""
+        self.counters['regex_evaluations'] += 1
+        return self.polarity_scanner.scan(sentence)
+
+    def _extract_facts(self, sentence: str) -> List:
+        """(subject, unit, value) numeric facts of a sentence"""
+        self.counters['regex_evaluations'] += 1
+        return extract_facts(sentence, self._tokenize)
+
+    def detect_semantic_contradictions(self, focus: Optional[Set[int]] = None,
+                                       jobs: int = 1, top_k: Optional[int] = None,
+                                       stream: Optional[FindingStream] = None) -> Findings:
+        """Advanced contradiction detection using semantic patterns
+
+        Sentences are classified once and joined on pattern buckets rather
+        than compared pairwise. With focus, only chunk pairs involving one
+        of those chunks are compared. jobs > 1 spreads the chunks over
+        worker processes.
+
+        With top_k, only the top_k contradictions are kept, ranked by the
+        TF-IDF similarity of their chunks (pairs of sentences about the
+        same topic first). With stream, every contradiction is also written
+        out as soon as its tile is done.
+        """
+        with self.timer.stage('semantic'):
+            rank = top_k is not None and self.matrix is not None
+            materialize = self._ranked_semantic_result if rank else self._semantic_result
+            contradictions = Findings(materialize) if top_k is None else TopFindings(top_k, materialize)
+
+            n_tiles = jobs * TILES_PER_JOB if jobs > 1 else (STREAM_TILES if stream else 1)
+            limit = top_k if stream is None else None
+            tiles = [(range(start, end), focus, limit, rank)
+                     for start, end in triangular_tiles(len(self.documents), n_tiles)]
+
+            for part in map_tiles(AdvancedSemanticAnalyzer._semantic_tile, tiles, jobs, self):
+                if stream:
+                    part.materialize = materialize
+                    stream.write('semantic_contradiction', part)
+                contradictions.extend(part)
+            return contradictions
+
+    def _semantic_tile(self, tile) -> Findings:
+        """Contradicting sentence-id pairs between the chunks of a row range and later chunks"""
+        rows, focus, limit, rank = tile
+        contradictions = Findings() if limit is None else TopFindings(limit)
+        chunk_of = self.sentence_index.chunk_of
+        for i in rows:
+            # Outside the focus, only pairs with a focus chunk count
+            chunks = None if focus is None or i in focus else focus
+            j, score = None, 0.0
+            for a, b in self.sentence_index.contradicting(i, chunks):
+                if rank and chunk_of[b] != j:
+                    j = chunk_of[b]
+                    score = self.matrix.cosine(i, j)
+                contradictions.append(a, b, score)
+        return contradictions
 
-                # Compare sentences for contradictions
-                for sent1 in doc1_sentences:
-                    for sent2 in doc2_sentences:
-                        if self._are_contradictory(sent1, sent2):
-                            contradictions.append({
-                                'file1': self.file_paths[i],
-                                'text1': sent1[:200],
-                                'file2': self.file_paths[j],
-                                'text2': sent2[:200],
-                                'type': 'semantic_opposition'
-                            })
+    def _semantic_result(self, a: int, b: int, score: float = 0.0) -> Dict:
+        """Report entry for a pair of contradicting sentences"""
+        i, j = self.sentence_index.chunk_of[a], self.sentence_index.chunk_of[b]
+        sent1, line1 = self._sentence(i, a)
+        sent2, line2 = self._sentence(j, b)
+        return {
+            'file1': self.documents.path(i),
+            'line1': line1,
+            'text1': sent1[:200],
+            'file2': self.documents.path(j),
+            'line2': line2,
+            'text2': sent2[:200],
+            'type': 'semantic_opposition'
+        }
 
-        return contradictions
+    def _ranked_semantic_result(self, a: int, b: int, score: float) -> Dict:
+        """Report entry for a pair of contradicting sentences, with its ranking score"""
+        result = self._semantic_result(a, b)
+        result['confidence'] = round(score, 3)
+        return result
+
+    def detect_numeric_conflicts(self, focus: Optional[Set[int]] = None, top_k: Optional[int] = None,
+                                 stream: Optional[FindingStream] = None) -> Findings:
+        """Sentences in different chunks stating different values of the same subject
+
+        Conflicts are read from the fact index (see docanalysis.facts), so
+        no sentence pairs are compared. A sentence pair disagreeing on
+        several subjects is one finding, listing every conflicting value
+        and scored by the largest relative difference of its values; with
+        top_k, only the top_k largest disagreements are kept, while stream
+        still receives all of them. With focus, only conflicts involving
+        one of those chunks are reported.
+        """
+        with self.timer.stage('facts'):
+            materialize = self._numeric_result
+            chunk_of = self.sentence_index.chunk_of
+            # (a, b) -> largest relative difference; conflicts() is sorted, so pairs stay in order
+            scores = {}
+            for a, b, value_a, value_b in self.fact_index.conflicts():
+                i, j = chunk_of[a], chunk_of[b]
+                if i == j or (focus is not None and i not in focus and j not in focus):
+                    continue
+                score = abs(value_a - value_b) / max(abs(value_a), abs(value_b))
+                if score > scores.get((a, b), -1.0):
+                    scores[a, b] = score
+            conflicts = Findings(materialize)
+            for (a, b), score in scores.items():
+                conflicts.append(a, b, score)
+            self.counters['numeric_facts'] += self.fact_index.n_facts
+
+            # The stream gets every conflict, the report only the top_k
+            if stream:
+                stream.write('numeric_conflict', conflicts)
+            if top_k is None:
+                return conflicts
+            top = TopFindings(top_k, materialize)
+            top.extend(conflicts)
+            return top
+
+    def _numeric_result(self, a: int, b: int, score: float) -> Dict:
+        """Report entry for a pair of sentences stating conflicting values"""
+        result = self._semantic_result(a, b)
+        facts1 = self._extract_facts(self._fact_text(a))
+        facts2 = self._extract_facts(self._fact_text(b))
+        result.update(type='conflicting_values', difference=round(score, 3), values=[
+            {'subject': ' '.join(subject), 'unit': unit, 'value1': value1, 'value2': value2}
+            for subject, unit, value1, value2 in conflicting_values(facts1, facts2)
+        ])
+        return result
+
+    def _fact_text(self, sentence_id: int) -> str:
+        """A sentence cut from its chunk's text with the chunk's code blanked out"""
+        text = mask_code(self.documents[self.sentence_index.chunk_of[sentence_id]])
+        return text[self.sentence_spans[2 * sentence_id]:self.sentence_spans[2 * sentence_id + 1]]
+
+    def _sentence(self, chunk: int, sentence_id: int) -> Tuple[str, int]:
+        """A sentence cut from its chunk's text, and its line number"""
+        text = self.documents[chunk]
+        start = self.sentence_spans[2 * sentence_id]
+        line = self.chunk_lines[2 * chunk] + text.count('\n', 0, start)
+        return text[start:self.sentence_spans[2 * sentence_id + 1]], line
 
     def _are_contradictory(self, sent1: str, sent2: str) -> bool:
         """Check if two sentences are contradictory"""
-        sent1_lower = sent1.lower()
-        sent2_lower = sent2.lower()
-
         # Check for negation patterns
-        for positive_pattern, negative_pattern in self.negation_patterns:
-            if (re.search(positive_pattern, sent1_lower) and re.search(negative_pattern, sent2_lower)) or \
-               (re.search(negative_pattern, sent1_lower) and re.search(positive_pattern, sent2_lower)):
-                return True
-
-        # Check for conflicting values
-        number_pattern = r'\d+(\.\d+)?'
-        nums1 = re.findall(number_pattern, sent1)
-        nums2 = re.findall(number_pattern, sent2)
-
-        if nums1 and nums2 and nums1 != nums2:
-            # Check if talking about same thing
-            tokens1 = set(self._tokenize(sent1))
-            tokens2 = set(self._tokenize(sent2))
-            overlap = len(tokens1 & tokens2) / min(len(tokens1), len(tokens2))
-            if overlap > 0.5:  # High token overlap but different numbers
-                return True
-
-        return False
-
-    def find_duplicates_and_contradictions(self, similarity_threshold=0.75):
-        """Find duplicates and contradictions with improved accuracy"""
-        results = {
-            'duplicates': [],
-            'contradictions': [],
-            'semantic_contradictions': []
+        if opposed(self._classify_sentence(sent1), self._classify_sentence(sent2)):
+            return True
+
+        # Check for conflicting values of the same subject
+        return bool(conflicting_values(self._extract_facts(sent1), self._extract_facts(sent2)))
+
+    def _chunk_features(self, i: int) -> SentenceFeatures:
+        """Classification of a whole chunk"""
+        return self.chunk_positive[i], self.chunk_negative[i]
+
+    def _pair_result(self, i: int, j: int, similarity: float) -> Dict:
+        """Report entry for a pair of chunks"""
+        return {
+            'similarity': round(similarity, 3),
+            'file1': self.documents.path(i),
+            'line1': self.chunk_lines[2 * i],
+            'text1': self.documents[i][:300] + '...',
+            'file2': self.documents.path(j),
+            'line2': self.chunk_lines[2 * j],
+            'text2': self.documents[j][:300] + '...'
         }
 
-        # Convert documents to TF-IDF vectors
-        vectors = [self._get_tfidf_vector(doc) for doc in self.documents]
+    def find_duplicates_and_contradictions(self, similarity_threshold=0.75,
+                                           max_df=None, max_postings=None,
+                                           approximate_duplicates=False,
+                                           lsh_bands=DEFAULT_BANDS, lsh_rows=DEFAULT_ROWS,
+                                           focus=None, jobs=1, top_k=None, stream=None,
+                                           rules=('advanced',)):
+        """Find duplicates and contradictions with improved accuracy
+
+        max_df / max_postings skip tokens present in more than that fraction
+        (or number) of chunks when generating candidate pairs.
+
+        With approximate_duplicates, duplicates are found by MinHash/LSH
+        (lsh_bands * lsh_rows hash functions) and verified with the exact
+        cosine. The exact scan then only scores pairs that can be
+        contradictions (see _polar_chunks). The basic rules need the full
+        scan, so with them duplicates stay exact.
+
+        focus is a set of chunk indices (e.g. chunks of changed files); when
+        given, only pairs involving at least one of them are reported.
+
+        jobs > 1 scores the pair space in balanced tiles on that many worker
+        processes; results are identical to a serial run.
+
+        top_k keeps only the top_k findings of each kind, best first: pairs
+        by similarity, semantic contradictions by the similarity of their
+        chunks. stream (a FindingStream) receives every finding as soon as
+        the tile that produced it is done.
+
+        rules selects the rule sets (see docanalysis.rules) applied to the
+        one pair scan: advanced fills duplicates, contradictions,
+        semantic_contradictions and numeric_conflicts, basic fills
+        basic_duplicates and basic_contradictions.
+        """
+        def findings():
+            if top_k is None:
+                return Findings(self._pair_result)
+            return TopFindings(top_k, self._pair_result)
+
+        advanced = 'advanced' in rules
+        basic = 'basic' in rules
+        kinds = (ADVANCED_KINDS if advanced else ()) + (BASIC_KINDS if basic else ())
+        results = {FINDING_KEYS[kind]: findings() for kind in kinds}
+        if advanced:
+            results['semantic_contradictions'] = None
+            results['numeric_conflicts'] = None
+        file_ids = self.documents.file_ids
+        approximate_duplicates = approximate_duplicates and advanced and not basic
+        scan_focus = focus
+
+        self._vectorize()
+
+        with self.timer.stage('pairs'):
+            # The scan floor is the lowest similarity any selected rule looks at
+            floors = []
+            if approximate_duplicates:
+                near_duplicates = near_duplicate_pairs(
+                    self.tokens.iter_tokens(), self.matrix,
+                    similarity_threshold, bands=lsh_bands, rows=lsh_rows
+                )
+                for i, j, similarity in near_duplicates:
+                    if focus is not None and i not in focus and j not in focus:
+                        continue
+                    if file_ids[i] != file_ids[j]:
+                        results['duplicates'].append(i, j, similarity)
+                        if stream:
+                            stream.write('duplicate', [self._pair_result(i, j, similarity)])
+                floors.append(0.3)
+                # Scan from the smaller of the polar chunks and the focus; pairs
+                # outside the focus are dropped again when they are classified
+                polar = self._polar_chunks()
+                if focus is None or len(polar) < len(focus):
+                    scan_focus = polar
+            elif advanced:
+                floors.append(min(similarity_threshold, 0.3))
+            if basic:
+                floors.append(min(BASIC_DUPLICATE_THRESHOLD, BASIC_CONTRADICTION_BAND[0]))
+
+            settings = {
+                'min_similarity': min(floors),
+                'similarity_threshold': similarity_threshold,
+                'report_duplicates': not approximate_duplicates,
+                'kinds': kinds,
+                'max_df': max_df,
+                'max_postings': max_postings,
+                'focus': scan_focus,
+                'require': focus if scan_focus is not focus else None,
+                # Tiles only pre-select the best findings when nothing is streamed
+                'limit': top_k if stream is None else None
+            }
+            if scan_focus is None and (jobs > 1 or stream):
+                n_tiles = jobs * TILES_PER_JOB if jobs > 1 else STREAM_TILES
+                row_ranges = triangular_tiles(len(self.documents), n_tiles)
+            else:
+                row_ranges = [None]
+
+            tiles = [(rows, settings) for rows in row_ranges]
+            scored_tiles = map_tiles(AdvancedSemanticAnalyzer._score_pair_tile, tiles, jobs, self)
+            for found, counts in scored_tiles:
+                self.counters.update(counts)
+                for kind in kinds:
+                    if stream:
+                        found[kind].materialize = self._pair_result
+                        stream.write(kind, found[kind])
+                    results[FINDING_KEYS[kind]].extend(found[kind])
 
-        # Find duplicates and contradictions
-        for i in range(len(self.documents)):
-            for j in range(i + 1, len(self.documents)):
-                if not vectors[i] or not vectors[j]:
-                    continue
+        # Advanced semantic contradiction detection
+        if advanced:
+            results['semantic_contradictions'] = self.detect_semantic_contradictions(
+                focus, jobs, top_k, stream
+            )
+            results['numeric_conflicts'] = self.detect_numeric_conflicts(focus, top_k, stream)
 
-                similarity = self._cosine_similarity(vectors[i], vectors[j])
+        return results
 
-                # Skip if same file
-                if self.file_paths[i] == self.file_paths[j]:
+    def _polar_chunks(self) -> Set[int]:
+        """Chunks of which every contradiction pair has at least one
+
+        A pair is only a contradiction if one chunk hits the positive and
+        the other the negative form of some indicator, so it involves a
+        chunk of each kind; the smaller set of the two is returned.
+        """
+        positive = {i for i, mask in enumerate(self.chunk_positive) if mask}
+        negative = {i for i, mask in enumerate(self.chunk_negative) if mask}
+        return min(positive, negative, key=len)
+
+    def _vectorize(self):
+        """Convert documents to a sparse TF-IDF matrix"""
+        with self.timer.stage('vectorize'):
+            self.matrix = SparseMatrix.from_id_rows(
+                (self._chunk_weights(i) for i in range(len(self.stats))),
+                self.index.vocabulary
+            )
+
+    def _score_pair_tile(self, tile) -> Tuple[Dict[str, Findings], Counter]:
+        """Findings of each selected kind among the pairs owned by one row range, and the work done"""
+        rows, settings = tile
+        limit = settings['limit']
+        found = {kind: Findings() if limit is None else TopFindings(limit)
+                 for kind in settings['kinds']}
+        counts = Counter()
+
+        pairs = similar_pairs(
+            self.matrix, settings['min_similarity'], index=self.index,
+            max_df=settings['max_df'], max_postings=settings['max_postings'],
+            focus=settings['focus'], rows=rows, stats=counts
+        )
+        self._classify_pairs(pairs, settings, found, counts)
+        return found, counts
+
+    def _classify_pairs(self, pairs: Iterable[Tuple[int, int, float]], settings: Dict,
+                        found: Dict[str, Findings], counts: Counter):
+        """Record the scored pairs that are findings of the selected kinds"""
+        advanced = 'duplicate' in found
+        basic = 'basic_duplicate' in found
+        file_ids = self.documents.file_ids
+        positive, negative = self.indicator_positive, self.indicator_negative
+        require = settings.get('require')
+
+        # Only pairs sharing tokens above the lowest threshold of interest can produce findings
+        for i, j, similarity in pairs:
+            if require is not None and i not in require and j not in require:
+                continue
+            same_file = file_ids[i] == file_ids[j]
+
+            if basic:
+                # Basic rules also flag contradictions within one file
+                if similarity > BASIC_DUPLICATE_THRESHOLD:
+                    if not same_file:
+                        found['basic_duplicate'].append(i, j, similarity)
+                elif BASIC_CONTRADICTION_BAND[0] < similarity < BASIC_CONTRADICTION_BAND[1]:
+                    counts['basic_contradiction_checks'] += 1
+                    if opposed((positive[i], negative[i]), (positive[j], negative[j])):
+                        found['basic_contradiction'].append(i, j, similarity)
+
+            # Skip if same file
+            if not advanced or same_file:
+                continue
+
+            if similarity > settings['similarity_threshold']:
+                # High similarity = likely duplicate
+                if settings['report_duplicates']:
+                    found['duplicate'].append(i, j, similarity)
+            elif 0.3 < similarity < 0.7:
+                # Moderate similarity - check for contradictions. Only opposed polarity
+                # counts here; differing numbers are the facts stage's numeric conflicts
+                counts['contradiction_checks'] += 1
+                if opposed(self._chunk_features(i), self._chunk_features(j)):
+                    found['contradiction'].append(i, j, similarity)
+
+    def prepare_updates(self):
+        """Posting weights and chunk norms of the loaded corpus
+
+        Needed by update_files and the query_* methods.
+        """
+        if self.matrix is None:
+            self._vectorize()
+        self.index.attach_weights(self.matrix)
+        self.norms = array('d', self.matrix.norms)
+
+    def update_files(self, paths: Iterable[str]) -> Set[int]:
+        """Re-analyze changed, added or deleted files in place and return their new chunks
+
+        Needs a resident analyzer prepared with prepare_updates. Chunks of
+        the old versions are retired and the new ones appended to every
+        store; the corpus statistics change by the difference, and only the
+        new chunks are vectorized, while chunks of unchanged files keep the
+        weights they were last vectorized with. Once COMPACT_FRACTION of
+        the chunks are retired, the index is rebuilt from the resident
+        entries.
+        """
+        paths = list(paths)
+        first_new = len(self.documents)
+        with self.timer.stage('load'):
+            for path in paths:
+                self._retire_file(path)
+                try:
+                    with open_buffer(path) as markdown:
+                        entry = self._analyze_file(markdown)
+                except NLTKDataError:
+                    raise
+                except Exception as e:
+                    # Deleted (or unreadable) files just lose their chunks
+                    if not isinstance(e, FileNotFoundError):
+                        print(f"Error reading {path}: {e}")
+                    self.entries.pop(path, None)
                     continue
+                self._add_file(path, None, entry)
 
-                if similarity > similarity_threshold:
-                    # High similarity = likely duplicate
-                    results['duplicates'].append({
-                        'similarity': round(similarity, 3),
-                        'file1': self.file_paths[i],
-                        'text1': self.documents[i][:300] + '...',
-                        'file2': self.file_paths[j],
-                        'text2': self.documents[j][:300] + '...'
-                    })
-                elif 0.3 < similarity < 0.7:
-                    # Moderate similarity - check for contradictions
-                    if self._are_contradictory(self.documents[i], self.documents[j]):
-                        results['contradictions'].append({
-                            'similarity': round(similarity, 3),
-                            'file1': self.file_paths[i],
-                            'text1': self.documents[i][:300] + '...',
-                            'file2': self.file_paths[j],
-                            'text2': self.documents[j][:300] + '...'
-                        })
+        if len(self.removed) >= COMPACT_FRACTION * len(self.documents):
+            self._compact()
+        else:
+            self._calculate_idf()
+            with self.timer.stage('vectorize'):
+                for chunk in range(first_new, len(self.documents)):
+                    self._append_weights(chunk)
+        return {chunk for path in paths for chunk in self.file_chunks.get(path, ())}
+
+    def _retire_file(self, path: str):
+        """Retire the chunks of the loaded version of a file"""
+        chunks = self.file_chunks.pop(path, None)
+        if chunks is None:
+            return
+        if chunks:
+            self.documents.close_file(self.documents.file_ids[chunks.start])
+        entry = self.entries[path]
+        starts = self.sentence_index.chunk_starts
+        for k, chunk in enumerate(chunks):
+            self.removed.add(chunk)
+            self.stats.remove(chunk)
+            sentence_ids = range(starts[chunk], starts[chunk + 1])
+            for sentence_id, encoded_facts in zip(sentence_ids, entry['sentence_facts'][k]):
+                if encoded_facts:
+                    self.fact_index.remove(sentence_id, decode_facts(encoded_facts))
+
+    def _append_weights(self, chunk: int):
+        """Posting weights and norm of a chunk appended after prepare_updates"""
+        weights = self.index.weights
+        weights.extend(array('d') for _ in range(len(self.index.postings) - len(weights)))
+        vector = self._chunk_weights(chunk)
+        for token_id in sorted(vector):
+            weights[token_id].append(vector[token_id])
+        self.norms.append(math.sqrt(sum(weight * weight for weight in vector.values())))
+
+    def _compact(self):
+        """Rebuild every store from the resident entries, dropping retired chunks"""
+        entries = list(self.entries.items())
+        self._reset_corpus()
+        with self.timer.stage('load'):
+            for path, entry in entries:
+                self._add_file(path, None, entry)
+        self._calculate_idf()
+        self._vectorize()
+        self.prepare_updates()
+
+    def find_updated_findings(self, focus: Set[int], rules=('advanced',),
+                              similarity_threshold=0.75) -> Dict[str, Findings]:
+        """Findings involving the chunks returned by update_files, by kind
+
+        Pairs are scored against the posting weights and norms kept up to
+        date by update_files. Numeric conflicts are read from the whole fact
+        index, since one statement can change the reference value of a
+        subject.
+        """
+        advanced = 'advanced' in rules
+        kinds = (ADVANCED_KINDS if advanced else ()) + (BASIC_KINDS if 'basic' in rules else ())
+        found = {kind: Findings(self._pair_result) for kind in kinds}
+        floors = [min(similarity_threshold, 0.3)] if advanced else []
+        if 'basic' in rules:
+            floors.append(min(BASIC_DUPLICATE_THRESHOLD, BASIC_CONTRADICTION_BAND[0]))
+        settings = {
+            'min_similarity': min(floors),
+            'similarity_threshold': similarity_threshold,
+            'report_duplicates': True
+        }
 
-        # Advanced semantic contradiction detection
-        results['semantic_contradictions'] = self.detect_semantic_contradictions()
+        with self.timer.stage('pairs'):
+            self._classify_pairs(self._focus_pairs(focus, settings['min_similarity']),
+                                 settings, found, self.counters)
+
+        if advanced:
+            with self.timer.stage('semantic'):
+                chunk_of = self.sentence_index.chunk_of
+                pairs = set()
+                for chunk in focus:
+                    pairs.update(pair for pair in self.sentence_index.opposing(chunk)
+                                 if chunk_of[pair[0]] not in self.removed
+                                 and chunk_of[pair[1]] not in self.removed)
+                found['semantic_contradiction'] = Findings(self._semantic_result)
+                for a, b in sorted(pairs):
+                    found['semantic_contradiction'].append(a, b)
+            found['numeric_conflict'] = self.detect_numeric_conflicts()
+        return found
+
+    def _focus_pairs(self, focus: Set[int], min_similarity: float) -> List[Tuple[int, int, float]]:
+        """(i, j, similarity) above min_similarity for pairs of live chunks involving a focus chunk"""
+        postings, weights, norms = self.index.postings, self.index.weights, self.norms
+        live = len(self.documents) - len(self.removed)
+        self.counters['pairs_considered'] += len(focus) * (live - len(focus)) + \
+            len(focus) * (len(focus) - 1) // 2
+        found = []
+        for i in sorted(focus):
+            if norms[i] == 0:
+                continue
+            dots = {}
+            for token_id, weight in self._chunk_weights(i).items():
+                for j, other in zip(postings[token_id], weights[token_id]):
+                    dots[j] = dots.get(j, 0.0) + weight * other
+
+            # Each pair once: the smaller focus chunk owns focus-focus pairs
+            candidates = [j for j in dots
+                          if j != i and j not in self.removed and not (j in focus and j < i)]
+            self.counters['pairs_scored'] += len(candidates)
+            for j in candidates:
+                if norms[j] == 0:
+                    continue
+                similarity = dots[j] / (norms[i] * norms[j])
+                if similarity > min_similarity:
+                    found.append((min(i, j), max(i, j), similarity))
+        found.sort()
+        return found
+
+    def finding_key(self, kind: str, first: int, second: int) -> Tuple[Tuple, Tuple[str, int, str, int]]:
+        """Identity of a finding that survives re-analysis of unchanged text, and its location
+
+        The identity is built from file paths and chunk content hashes
+        (plus sentence positions for sentence findings); the location is
+        the (file1, line1, file2, line2) the report shows for the finding:
+        the lines of the sentences for sentence findings, else of the
+        chunks.
+        """
+        if kind in SENTENCE_KINDS:
+            chunk_of, starts = self.sentence_index.chunk_of, self.sentence_index.chunk_starts
+            i, j = chunk_of[first], chunk_of[second]
+            offsets = (first - starts[i], second - starts[j])
+            lines = (self._sentence(i, first)[1], self._sentence(j, second)[1])
+        else:
+            i, j = first, second
+            offsets = (0, 0)
+            lines = (self.chunk_lines[2 * i], self.chunk_lines[2 * j])
+        path_i, path_j = self.documents.path(i), self.documents.path(j)
+        key = tuple(sorted([(path_i, self.chunk_ids[i], offsets[0]), (path_j, self.chunk_ids[j], offsets[1])]))
+        return key, (path_i, lines[0], path_j, lines[1])
+
+    def save_index(self, path: str, stamps: Dict[str, Tuple[int, int]], **meta):
+        """Write the analyzed corpus to a memory-mappable index file (see docanalysis.indexfile)
+
+        stamps are the (mtime, size) of the indexed files (see
+        docanalysis.watch.snapshot), taken before they were loaded, and
+        tell load_index whether the file is still current. Retired chunks
+        are compacted away first; meta is stored alongside, e.g. the
+        terminology fixes a query service reports.
+        """
+        if self.removed:
+            self._compact()
+        self.prepare_updates()
+
+        tokens = self.index.vocabulary.tokens
+        encoded = [token.encode('utf-8') for token in tokens]
+        postings = self.index.postings + [array('i')] * (len(tokens) - len(self.index.postings))
+        weights = self.index.weights + [array('d')] * (len(tokens) - len(self.index.weights))
+        file_starts = array('q', [0])
+        for file_path in self.documents.paths:
+            chunks = self.file_chunks.get(file_path)
+            file_starts.append(chunks.stop if chunks is not None else file_starts[-1])
+        fact_rows = [[list(subject), unit, [[value, list(sentences)] for value, sentences in values.items()]]
+                     for (subject, unit), values in self.fact_index.postings.items()]
+
+        sections = {}
+        sections['token_starts'], sections['tokens'] = string_table(tokens)
+        sections['token_order'] = array('i', sorted(range(len(tokens)), key=encoded.__getitem__))
+        sections['idf'] = self.idf + array('d', bytes(8 * (len(tokens) - len(self.idf))))
+        sections['posting_starts'], sections['postings'] = csr(postings, 'i')
+        _, sections['weights'] = csr(weights, 'd')
+        sections['norms'] = self.norms
+        sections['path_starts'], sections['paths'] = string_table(self.documents.paths)
+        sections['file_starts'] = file_starts
+        for name in ('file_ids', 'offsets', 'lengths'):
+            sections['chunk_' + name] = getattr(self.documents, name)
+        for name in ('chunk_ids', 'chunk_lines', 'chunk_positive', 'chunk_negative',
+                     'indicator_positive', 'indicator_negative', 'sentence_spans'):
+            sections[name] = getattr(self, name)
+        for name in ('chunk_starts', 'chunk_of', 'positive', 'negative'):
+            sections['sentence_' + name] = getattr(self.sentence_index, name)
+        for side in ('positive', 'negative'):
+            starts, ids = csr(getattr(self.sentence_index, side + '_postings'), 'I')
+            sections[f'sentence_{side}_posting_starts'], sections[f'sentence_{side}_postings'] = starts, ids
+        sections['facts'] = json.dumps(fact_rows).encode('utf-8')
+
+        write_index(path, sections, dict(meta, analyzer_version=ANALYZER_VERSION,
+                                         tokenizer=self.tokenizer.mode, weighting=self.weighting,
+                                         n_docs=self.stats.n_docs, total_length=self.stats.total_length,
+                                         n_facts=self.fact_index.n_facts,
+                                         files={file_path: list(stamp) for file_path, stamp in stamps.items()}))
+
+    def load_index(self, path: str, stamps: Optional[Dict[str, Tuple[int, int]]] = None) -> bool:
+        """Map an index file written by save_index instead of loading the corpus
+
+        Arrays are used straight from the mapping; only the fact index is
+        parsed. Returns False, leaving the analyzer as it was, when the
+        file comes from other analyzer code, tokenizer or weighting, or when
+        stamps differ from those of the files it was built from. Raises
+        ValueError for files that are not index files of this format. A
+        mapped analyzer answers the query_* methods; it cannot be scanned
+        or updated.
+        """
+        index_file = IndexFile(path)
+        meta = index_file.meta
+        if (meta['analyzer_version'], meta['tokenizer'], meta['weighting']) != \
+                (ANALYZER_VERSION, self.tokenizer.mode, self.weighting):
+            return False
+        if stamps is not None and {file_path: tuple(stamp) for file_path, stamp in meta['files'].items()} != stamps:
+            return False
+
+        self._reset_corpus()
+        self.index_meta = meta
+        vocabulary = MappedVocabulary(index_file.strings('token_starts', 'tokens'),
+                                      index_file.section('token_order'))
+        self.index = InvertedIndex(vocabulary)
+        self.index.postings = index_file.rows('posting_starts', 'postings')
+        self.index.weights = index_file.rows('posting_starts', 'weights')
+        self.idf = index_file.section('idf')
+        self.idf_scores = TokenValues(vocabulary, self.idf)
+        self.norms = index_file.section('norms')
+        # Queries are weighted against the totals of the indexed corpus
+        self.stats.n_docs, self.stats.total_length = meta['n_docs'], meta['total_length']
+
+        self.documents.paths = index_file.strings('path_starts', 'paths')
+        for name in ('file_ids', 'offsets', 'lengths'):
+            setattr(self.documents, name, index_file.section('chunk_' + name))
+        for name in ('chunk_ids', 'chunk_lines', 'chunk_positive', 'chunk_negative',
+                     'indicator_positive', 'indicator_negative', 'sentence_spans'):
+            setattr(self, name, index_file.section(name))
+        file_starts = index_file.section('file_starts')
+        self.file_chunks = {file_path: range(file_starts[k], file_starts[k + 1])
+                            for k, file_path in enumerate(self.documents.paths)}
+
+        for name in ('chunk_starts', 'chunk_of', 'positive', 'negative'):
+            setattr(self.sentence_index, name, index_file.section('sentence_' + name))
+        for side in ('positive', 'negative'):
+            setattr(self.sentence_index, side + '_postings',
+                    index_file.rows(f'sentence_{side}_posting_starts', f'sentence_{side}_postings'))
+        for subject, unit, values in json.loads(bytes(index_file.section('facts'))):
+            self.fact_index.postings[tuple(subject), unit] = {value: array('I', sentences)
+                                                               for value, sentences in values}
+        self.fact_index.n_facts = meta['n_facts']
+        self.index_file = index_file
+        return True
 
-        return results
+    def query_similar(self, text: str, top_k: Optional[int] = 10,
+                      min_similarity: float = 0.1) -> List[Dict]:
+        """Indexed chunks most similar to a text, most similar first
+
+        The text is weighted by _get_tfidf_vector like every chunk of the
+        batch report and scored against the posting weights set up by
+        prepare_updates, so a query equal to a chunk's text scores what the
+        pair scan would.
+        """
+        return [self._query_result(i, similarity)
+                for i, similarity in self._query_scores(text, top_k, min_similarity)]
+
+    def _query_scores(self, text: str, top_k: Optional[int],
+                      min_similarity: float) -> List[Tuple[int, float]]:
+        """(chunk, similarity) of the top_k live chunks above min_similarity (all with top_k None)"""
+        vector = self._get_tfidf_vector(text)
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm == 0:
+            return []
+
+        vocabulary = self.index.vocabulary
+        postings, weights, norms = self.index.postings, self.index.weights, self.norms
+        dots = {}
+        for token, weight in vector.items():
+            token_id = vocabulary.get(token)
+            if token_id is None or weight == 0:
+                continue
+            for j, other in zip(postings[token_id], weights[token_id]):
+                dots[j] = dots.get(j, 0.0) + weight * other
+        self.counters['query_chunks_scored'] += len(dots)
+
+        scores = [(j, dot / (norm * norms[j])) for j, dot in dots.items()
+                  if norms[j] and j not in self.removed]
+        scores = [(j, similarity) for j, similarity in scores if similarity > min_similarity]
+        if top_k is not None:
+            return heapq.nlargest(top_k, scores, key=lambda score: (score[1], -score[0]))
+        return sorted(scores, key=lambda score: (-score[1], score[0]))
+
+    def _query_result(self, i: int, similarity: float) -> Dict:
+        """Result entry for an indexed chunk matching a query"""
+        return {
+            'similarity': round(similarity, 3),
+            'file': self.documents.path(i),
+            'line': self.chunk_lines[2 * i],
+            'text': self.documents[i][:300] + '...'
+        }
 
-    def find_terminology_issues(self) -> Dict:
-        """Find and suggest fixes for terminology inconsistencies"""
-        issues = {
-            'inconsistencies': [],
-            'suggested_fixes': {}
+    def query_contradictions(self, text: str, top_k: Optional[int] = 10) -> Dict[str, List[Dict]]:
+        """Indexed text a paragraph may contradict, by kind, under the report's keys
+
+        - contradictions: chunks of moderate similarity (0.3-0.7) with
+          opposed polarity, like the batch rule
+        - semantic_contradictions: sentences of chunks sharing words with the
+          text whose polarity opposes one of its sentences
+        - numeric_conflicts: sentences giving a subject of the text another
+          value, from the fact index
+
+        Each kind is ranked by the similarity of the indexed chunk to the
+        text and cut to top_k.
+        """
+        scores = dict(self._query_scores(text, None, 0.0))
+        features = self._classify_sentence(text)
+        # scores is ordered most similar first
+        contradictions = [(i, similarity) for i, similarity in scores.items()
+                          if 0.3 < similarity < 0.7 and opposed(features, self._chunk_features(i))]
+
+        # (similarity, sentence id, query sentence, values) candidates, materialized once ranked
+        opposing, conflicting = [], []
+        chunk_of, index = self.sentence_index.chunk_of, self.sentence_index
+        for sentence in self._extract_sentences(text):
+            positive, negative = self._classify_sentence(sentence)
+            matches = set()
+            for bit in range(len(self.negation_patterns)):
+                if positive >> bit & 1:
+                    matches.update(index.negative_postings[bit])
+                if negative >> bit & 1:
+                    matches.update(index.positive_postings[bit])
+            opposing.extend((scores[chunk_of[b]], b, sentence, None) for b in matches
+                            if chunk_of[b] in scores)
+
+            for subject, unit, value in self._extract_facts(sentence):
+                for other, sentences in self.fact_index.postings.get((subject, unit), {}).items():
+                    if other != value:
+                        values = [{'subject': ' '.join(subject), 'unit': unit,
+                                   'value1': value, 'value2': other}]
+                        conflicting.extend((scores.get(chunk_of[b], 0.0), b, sentence, values)
+                                       for b in sentences)
+
+        def ranked(candidates: List[Tuple], kind: str) -> List[Dict]:
+            candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+            results = []
+            for similarity, b, sentence, values in candidates[:top_k]:
+                result = self._query_sentence_result(sentence, b, similarity, kind)
+                if values:
+                    result['values'] = values
+                results.append(result)
+            return results
+
+        return {
+            'contradictions': [self._query_result(i, similarity)
+                               for i, similarity in contradictions[:top_k]],
+            'semantic_contradictions': ranked(opposing, 'semantic_opposition'),
+            'numeric_conflicts': ranked(conflicting, 'conflicting_values'),
         }
 
-        # Analyze usage of each term group
-        for standard_term, variations in self.term_standardization.items():
-            all_terms = [standard_term] + variations
-            term_usage = defaultdict(set)
-            term_counts = defaultdict(int)
-
-            for doc, path in zip(self.documents, self.file_paths):
-                doc_lower = doc.lower()
-                for term in all_terms:
-                    # Use word boundaries for accurate matching
-                    pattern = r'\b' + re.escape(term) + r'\b'
-                    if re.search(pattern, doc_lower):
-                        term_usage[term].add(path)
-                        term_counts[term] += len(re.findall(pattern, doc_lower))
-
-            # If multiple variations are used, it's an inconsistency
-            used_terms = [term for term, files in term_usage.items() if files]
-            if len(used_terms) > 1:
-                issues['inconsistencies'].append({
-                    'standard_term': standard_term,
-                    'variations_found': used_terms,
-                    'usage': {term: {
-                        'files': list(term_usage[term]),
-                        'count': term_counts[term]
-                    } for term in used_terms}
-                })
-
-                # Suggest the most common term or the standard term
-                most_common = max(used_terms, key=lambda t: term_counts[t])
-                issues['suggested_fixes'][standard_term] = {
-                    'replace_all': used_terms,
-                    'with': standard_term if term_counts[standard_term] > 0 else most_common,
-                    'files_affected': list(set().union(*[term_usage[t] for t in used_terms]))
-                }
+    def _query_sentence_result(self, sentence: str, b: int, similarity: float, kind: str) -> Dict:
+        """Result entry for an indexed sentence contradicting a sentence of a query"""
+        chunk = self.sentence_index.chunk_of[b]
+        text, line = self._sentence(chunk, b)
+        return {
+            'type': kind,
+            'similarity': round(similarity, 3),
+            'sentence': sentence[:200],
+            'file': self.documents.path(chunk),
+            'line': line,
+            'text': text[:200]
+        }
 
+    def query_terminology(self, text: str, fixes: Optional[Dict] = None) -> List[Dict]:
+        """Terms of a text that the corpus standardizes on another term
+
+        fixes is the suggested_fixes block of find_terminology_issues, so
+        the preferred term is the one the fix script would write; groups
+        without a fix prefer the standard term.
+        """
+        fixes = fixes or {}
+        scanner = TermScanner(term for standard_term, variations in self.term_standardization.items()
+                              for term in [standard_term] + variations)
+        counts = scanner.counts(text)
+        issues = []
+        for standard_term, variations in self.term_standardization.items():
+            preferred = fixes.get(standard_term, {}).get('with', standard_term)
+            for term in dict.fromkeys([standard_term] + variations):
+                if term != preferred and counts[term]:
+                    issues.append({'term': term, 'count': counts[term],
+                                   'preferred_term': preferred, 'standard_term': standard_term})
         return issues
 
-    def generate_fix_script(self, fixes: Dict) -> str:
-        """Generate a Python script to fix terminology inconsistencies"""
-        script = """#!/usr/bin/env python3
-# Auto-generated script to fix terminology inconsistencies
+    def find_terminology_issues(self) -> Dict:
+        """Find and suggest fixes for terminology inconsistencies"""
+        with self.timer.stage('terminology'):
+            issues = {
+                'inconsistencies': [],
+                'suggested_fixes': {}
+            }
 
-import os
-import re
+            # One scan per chunk counts every term of every group
+            scanner = TermScanner(term for standard_term, variations in self.term_standardization.items()
+                                  for term in [standard_term] + variations)
+            term_files = defaultdict(set)
+            term_totals = Counter()
+            first_chunk = {}
+            for i, doc in enumerate(self.documents):
+                path = self.documents.path(i)
+                for term, count in scanner.counts(doc).items():
+                    term_files[term].add(path)
+                    term_totals[term] += count
+                    first_chunk.setdefault(term, i)
+            self.counters['regex_evaluations'] += len(self.documents)
+
+            # Analyze usage of each term group
+            for standard_term, variations in self.term_standardization.items():
+                all_terms = [standard_term] + variations
+                # Terms in the order they first occur, as a chunk-by-chunk scan would find them
+                found = sorted((term for term in dict.fromkeys(all_terms) if term in term_files),
+                               key=lambda term: (first_chunk[term], all_terms.index(term)))
+                term_usage = {term: term_files[term] for term in found}
+                term_counts = defaultdict(int, {term: term_totals[term] for term in found})
+
+                # If multiple variations are used, it's an inconsistency
+                used_terms = [term for term, files in term_usage.items() if files]
+                if len(used_terms) > 1:
+                    issues['inconsistencies'].append({
+                        'standard_term': standard_term,
+                        'variations_found': used_terms,
+                        'usage': {term: {
+                            'files': list(term_usage[term]),
+                            'count': term_counts[term]
+                        } for term in used_terms}
+                    })
 
-def fix_terminology(file_path, replacements):
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+                    # Suggest the most common term or the standard term
+                    most_common = max(used_terms, key=lambda t: term_counts[t])
+                    issues['suggested_fixes'][standard_term] = {
+                        'replace_all': used_terms,
+                        'with': standard_term if term_counts[standard_term] > 0 else most_common,
+                        'files_affected': list(set().union(*[term_usage[t] for t in used_terms]))
+                    }
+
+            return issues
+
+    def find_terminology_inconsistencies(self) -> List[Dict]:
+        """Groups of interchangeable terms used side by side (basic rules)"""
+        with self.timer.stage('terminology'):
+            inconsistencies = []
+
+            # Substring matches over lowercased chunks, like the basic analyzer
+            scanner = TermScanner((term for variations in TERM_VARIATIONS for term in variations),
+                                  whole_words=False)
+            term_files = defaultdict(set)
+            for i, doc in enumerate(self.documents):
+                for term in scanner.counts(doc.lower()):
+                    term_files[term].add(self.documents.path(i))
+            self.counters['regex_evaluations'] += len(self.documents)
+
+            for variations in TERM_VARIATIONS:
+                used_variations = [(term, term_files[term]) for term in variations if term in term_files]
+                if len(used_variations) > 1:
+                    inconsistencies.append({
+                        'terms': [term for term, _ in used_variations],
+                        'usage': {term: list(files) for term, files in used_variations}
+                    })
 
-    original = content
-    for old_term, new_term in replacements:
-        # Case-insensitive replacement preserving original case
-        pattern = r'\\b' + re.escape(old_term) + r'\\b'
-        content = re.sub(pattern, new_term, content, flags=re.IGNORECASE)
+            return inconsistencies
 
-    if content != original:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return True
-    return False
+    def generate_fix_script(self, fixes: Dict, repo_path: str = '.', script_dir: str = 'scripts',
+                            package_dir: Optional[str] = None) -> str:
+        """Generate a Python script to fix terminology inconsistencies
+
+        The script lives in script_dir and runs the batch rewriter of the
+        docanalysis package in package_dir (by default the one next to this
+        file). File paths are stored relative to repo_path, and the
+        repository and the package relative to the script, so the script
+        keeps working when the checkout moves.
+        """
+        replacements = {}
+        for fix_info in fixes.values():
+            for term in fix_info['replace_all']:
+                if term != fix_info['with']:
+                    replacements.setdefault(term, fix_info['with'])
 
-# Terminology fixes
-replacements = {
-"""
-        for standard, fix_info in fixes.items():
-            terms_to_replace = [t for t in fix_info['replace_all'] if t != fix_info['with']]
-            if terms_to_replace:
-                script += f"    '{standard}': [\n"
-                for term in terms_to_replace:
-                    script += f"        ('{term}', '{fix_info['with']}'),\n"
-                script += "    ],\n"
-
-        script += """
-}
-
-# Apply fixes
-files_to_fix = [
-"""
         all_files = set()
         for fix_info in fixes.values():
             all_files.update(fix_info['files_affected'])
+        files = sorted(os.path.relpath(path, repo_path).replace(os.sep, '/') for path in all_files)
+        repo_root = os.path.relpath(repo_path, script_dir).replace(os.sep, '/')
+        package_dir = package_dir or os.path.dirname(os.path.abspath(__file__))
+        package_root = os.path.relpath(package_dir, script_dir).replace(os.sep, '/')
 
-        for file_path in sorted(all_files):
-            script += f"    '{file_path}',\n"
+        script = """#!/usr/bin/env python3
+# Auto-generated script to fix terminology inconsistencies
+#
+# Usage: python scripts/fix_terminology.py [--dry-run] [--jobs N] [--repo-path PATH] [FILE ...]
+
+import os
+import sys
 
-        script += """
-]
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Directory holding the docanalysis package, relative to this script
+sys.path.insert(0, os.path.normpath(os.path.join(SCRIPT_DIR, %r)))
 
-fixed_count = 0
-for file_path in files_to_fix:
-    all_replacements = []
-    for term_group in replacements.values():
-        all_replacements.extend(term_group)
+from docanalysis.rewrite import main
 
-    if fix_terminology(file_path, all_replacements):
-        print(f"✓ Fixed: {file_path}")
-        fixed_count += 1
+# Repository root, relative to this script
+REPO_ROOT = os.path.normpath(os.path.join(SCRIPT_DIR, %r))
 
-print(f"\\n✅ Fixed {fixed_count} files")
+# Term -> standard term
+REPLACEMENTS = {
+""" % (package_root, repo_root)
+        for term, standard in replacements.items():
+            script += f"    {term!r}: {standard!r},\n"
+
+        script += """}
+
+# Files using more than one variation, relative to the repository root
+FILES = [
+"""
+        for file_path in files:
+            script += f"    {file_path!r},\n"
+
+        script += """]
+
+if __name__ == '__main__':
+    sys.exit(main(REPLACEMENTS, FILES, REPO_ROOT))
 """
         return script
 
 
+def non_negative_int(value: str) -> int:
+    """--top-k argument: a count of zero or more"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer {value!r}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {number}")
+    return number
+
+
+def rule_sets(value: str) -> Tuple[str, ...]:
+    """--rules argument: comma-separated rule set names"""
+    names = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in names if name not in RULE_SETS]
+    if unknown or not names:
+        raise argparse.ArgumentTypeError(
+            f"unknown rule set {', '.join(unknown) or value!r}, expected {', '.join(RULE_SETS)}")
+    return names
+
+
 def main():
     """Main entry point"""
-    repo_path = '/Users/chocho/projects/thevibecoders-revamped'
+    parser = argparse.ArgumentParser(description="Advanced documentation contradiction analyzer")
+    parser.add_argument('--repo-path', default=str(Path(__file__).resolve().parent.parent),
+                        help="repository to analyze (default: this checkout)")
+    parser.add_argument('--changed-since', metavar='REF',
+                        help="only report pairs involving markdown files changed since this git ref")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="worker processes for file analysis and pair scoring; 0 uses all cores "
+                             "(default: %(default)s)")
+    parser.add_argument('--read-threads', type=int, default=READ_THREADS,
+                        help="threads reading files ahead of analysis (default: %(default)s)")
+    parser.add_argument('--max-df', type=float, metavar='FRACTION',
+                        help="don't generate candidate pairs from tokens in more than this fraction of "
+                             "chunks; they still count towards the similarity of other candidates "
+                             "(--watch updates stay exact)")
+    parser.add_argument('--max-postings', type=int, metavar='N',
+                        help="don't generate candidate pairs from tokens in more than N chunks")
+    parser.add_argument('--approximate-duplicates', action='store_true',
+                        help="find duplicates with MinHash/LSH and scan only pairs that can be "
+                             "contradictions; the basic rules keep the full exact scan")
+    parser.add_argument('--lsh-bands', type=int, default=DEFAULT_BANDS,
+                        help="LSH bands; more bands raise recall (default: %(default)s)")
+    parser.add_argument('--lsh-rows', type=int, default=DEFAULT_ROWS,
+                        help="rows per LSH band; more rows raise precision (default: %(default)s)")
+    parser.add_argument('--top-k', type=non_negative_int, metavar='K',
+                        help="keep only the K best findings of each kind, ranked by similarity")
+    parser.add_argument('--jsonl', metavar='PATH',
+                        help="stream every finding to PATH as JSON Lines while the scan runs")
+    parser.add_argument('--rules', type=rule_sets, default=('advanced',), metavar='SETS',
+                        help=f"comma-separated rule sets to apply in one scan: {', '.join(RULE_SETS)} "
+                             "(default: advanced)")
+    parser.add_argument('--fix-script', metavar='PATH',
+                        help="where to write the terminology fix script "
+                             "(default: <repo>/scripts/fix_terminology.py)")
+    parser.add_argument('--save-index', metavar='PATH',
+                        help="also write the vocabulary, IDF, weighted postings and chunk data to a "
+                             "memory-mappable index file for query_server.py --index")
+    parser.add_argument('--watch', action='store_true',
+                        help="after the analysis, keep the index in memory and re-analyze markdown "
+                             "files as they change, printing the findings each change adds or resolves")
+    parser.add_argument('--watch-interval', type=float, default=DEFAULT_INTERVAL, metavar='SECONDS',
+                        help="seconds between checks for changed files in --watch mode (default: %(default)s)")
+    parser.add_argument('--watch-verify', action='store_true',
+                        help="after each --watch update, also analyze the tree from scratch and check "
+                             "that it finds as many findings of each kind (slow; for testing)")
+    parser.add_argument('--weighting', choices=WEIGHTINGS, default='max',
+                        help="term weighting of chunk vectors: max-normalized TF, sublinear TF or BM25; "
+                             "the similarity thresholds were tuned for max (default: %(default)s)")
+    parser.add_argument('--fast-tokenizer', action='store_true',
+                        help="use the built-in regex tokenizer and light stemmer instead of NLTK")
+    parser.add_argument('--cache-dir',
+                        help=f"per-file analysis cache (default: <repo>/{DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-process every file without reading or writing the cache")
+    parser.add_argument('--profile', action='store_true',
+                        help="record stage timings, counters and peak memory in statistics.timings")
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help="also write a profiler dump of the whole run to PATH (implies --profile)")
+    parser.add_argument('--profiler', choices=PROFILERS, default='cprofile',
+                        help="profiler used for --profile-output (default: %(default)s)")
+    args = parser.parse_args()
+    args.profile = args.profile or bool(args.profile_output)
+    if args.max_df is not None and not 0 < args.max_df <= 1:
+        parser.error("--max-df must be a fraction in (0, 1]")
+    if args.max_postings is not None and args.max_postings < 1:
+        parser.error("--max-postings must be at least 1")
+    if args.profile_output and args.profiler == 'pyinstrument' and not PYINSTRUMENT_AVAILABLE:
+        parser.error("--profiler pyinstrument needs pyinstrument: pip install pyinstrument")
+    if args.watch and (args.top_k is not None or args.changed_since or args.approximate_duplicates):
+        parser.error("--watch reports every finding of the whole tree: "
+                     "drop --top-k, --changed-since and --approximate-duplicates")
+    if args.watch_verify and not args.watch:
+        parser.error("--watch-verify needs --watch")
+    if args.watch_verify and (args.max_df is not None or args.max_postings is not None):
+        parser.error("--watch updates are exact, so --watch-verify cannot be combined with "
+                     "--max-df or --max-postings")
+
+    with profiler(args.profile_output, args.profiler):
+        exit_code = analyze(args)
+    if args.profile_output:
+        print(f"📈 Profile written to: {args.profile_output}")
+    return exit_code
+
+
+def cache_directory(args: argparse.Namespace) -> Optional[str]:
+    """Analysis cache directory of the command line arguments, None without a cache"""
+    return None if args.no_cache else (args.cache_dir or os.path.join(args.repo_path, DEFAULT_CACHE_DIR))
+
+
+def fresh_totals(args: argparse.Namespace) -> Dict[str, int]:
+    """Findings of each kind in a from-scratch analysis of the tree, for --watch-verify"""
+    analyzer = AdvancedSemanticAnalyzer(cache_dir=cache_directory(args),
+                                        tokenizer='fast' if args.fast_tokenizer else None,
+                                        weighting=args.weighting)
+    jobs = resolve_jobs(args.jobs)
+    analyzer.load_markdown_files(args.repo_path, jobs=jobs, read_threads=args.read_threads)
+    results = analyzer.find_duplicates_and_contradictions(jobs=jobs, rules=args.rules)
+    return {kind: results[kind + 's'].total
+            for kind in chain(ADVANCED_KINDS, BASIC_KINDS, SENTENCE_KINDS)
+            if results.get(kind + 's') is not None}
+
+
+def analyze(args: argparse.Namespace) -> int:
+    """Run the analysis configured by the command line arguments"""
+    repo_path = args.repo_path
+    cache_dir = cache_directory(args)
 
     print("🤖 Advanced AI-Powered Documentation Analyzer")
     print("=" * 60)
 
-    analyzer = AdvancedSemanticAnalyzer()
+    jobs = resolve_jobs(args.jobs)
+    analyzer = AdvancedSemanticAnalyzer(cache_dir=cache_dir,
+                                        tokenizer='fast' if args.fast_tokenizer else None,
+                                        resident=args.watch, weighting=args.weighting)
+    # Take the snapshot first, so files edited during the load are picked up
+    watcher = PollingWatcher(repo_path, args.watch_interval) if args.watch else None
+    stamps = watcher.stamps if watcher else snapshot(repo_path) if args.save_index else None
 
     print(f"📂 Loading documents from: {repo_path}")
-    analyzer.load_markdown_files(repo_path)
+    try:
+        analyzer.load_markdown_files(repo_path, jobs=jobs, read_threads=args.read_threads)
+    except NLTKDataError as e:
+        print(f"❌ {e}")
+        return 1
+    if analyzer.cache:
+        analyzer.cache.prune()
+        print(f"♻️  Reused cached analysis for {analyzer.cache.hits} of "
+              f"{analyzer.cache.hits + analyzer.cache.misses} files")
 
     if not analyzer.documents:
         print("❌ No markdown files found!")
         return 1
 
-    print(f"📊 Loaded {len(analyzer.documents)} text chunks from {len(set(analyzer.file_paths))} files")
-    print(f"📚 Vocabulary size: {len(analyzer.vocabulary)} unique tokens")
-    print(f"🔧 NLP Features: {'Enabled' if NLTK_AVAILABLE else 'Basic mode (install nltk for better results)'}")
+    print(f"📊 Loaded {len(analyzer.documents)} text chunks from {len(set(analyzer.documents.file_ids))} files")
+    print(f"📚 Vocabulary size: {len(analyzer.index.vocabulary)} unique tokens")
+    nlp_features = {
+        'nltk': 'Enabled',
+        'fast': 'Fast tokenizer (regex + light stemmer)',
+        'basic': 'Basic mode (install nltk for better results)',
+    }
+    print(f"🔧 NLP Features: {nlp_features[analyzer.tokenizer.mode]}")
+
+    # Restrict pair analysis to chunks of changed files
+    focus = None
+    changed = set()
+    if args.changed_since:
+        try:
+            changed = changed_files(repo_path, args.changed_since)
+        except (RuntimeError, OSError) as e:
+            print(f"❌ Could not determine changed files: {e}")
+            return 1
+        changed_ids = {file_id for file_id, path in enumerate(analyzer.documents.paths)
+                       if os.path.realpath(path) in changed}
+        focus = {i for i, file_id in enumerate(analyzer.documents.file_ids) if file_id in changed_ids}
+        print(f"🔀 {len(changed)} markdown files changed since {args.changed_since} "
+              f"({len(focus)} text chunks)")
     print()
 
     # Find duplicates and contradictions
     print("🔍 Analyzing for duplicates and contradictions...")
-    results = analyzer.find_duplicates_and_contradictions()
+    stream = FindingStream(args.jsonl) if args.jsonl else None
+    try:
+        results = analyzer.find_duplicates_and_contradictions(
+            max_df=args.max_df, max_postings=args.max_postings,
+            approximate_duplicates=args.approximate_duplicates,
+            lsh_bands=args.lsh_bands, lsh_rows=args.lsh_rows,
+            focus=focus, jobs=jobs,
+            top_k=args.top_k, stream=stream, rules=args.rules
+        )
+    finally:
+        if stream:
+            stream.close()
+    if stream:
+        print(f"📝 Streamed {stream.count} findings to: {args.jsonl}")
+    if args.top_k is not None:
+        print(f"🏆 Keeping the top {args.top_k} findings of each kind")
 
     # Display results
-    if results['duplicates']:
-        print(f"\n📑 Found {len(results['duplicates'])} potential duplicates:")
-        for i, dup in enumerate(results['duplicates'][:5], 1):
-            print(f"\n  {i}. Similarity: {dup['similarity']*100:.1f}%")
-            print(f"     File 1: {Path(dup['file1']).name}")
-            print(f"     File 2: {Path(dup['file2']).name}")
-    else:
-        print("\n✅ No significant duplicates found")
-
-    if results['contradictions'] or results['semantic_contradictions']:
-        total_contradictions = len(results['contradictions']) + len(results['semantic_contradictions'])
-        print(f"\n⚠️  Found {total_contradictions} potential contradictions:")
-
-        all_contradictions = results['contradictions'] + results['semantic_contradictions']
-        for i, cont in enumerate(all_contradictions[:5], 1):
-            print(f"\n  {i}. Type: {cont.get('type', 'pattern-based')}")
-            print(f"     File 1: {Path(cont['file1']).name}: {cont['text1'][:100]}...")
-            print(f"     File 2: {Path(cont['file2']).name}: {cont['text2'][:100]}...")
-    else:
-        print("\n✅ No contradictions detected")
-
-    # Check terminology
-    print("\n🔤 Analyzing terminology consistency...")
-    terminology_issues = analyzer.find_terminology_issues()
-
-    if terminology_issues['inconsistencies']:
-        print(f"\n📝 Found {len(terminology_issues['inconsistencies'])} terminology inconsistencies:")
-        for issue in terminology_issues['inconsistencies']:
-            print(f"\n  • Standard: '{issue['standard_term']}'")
-            print(f"    Variations found: {', '.join(issue['variations_found'])}")
-            for term, info in issue['usage'].items():
-                print(f"    - '{term}': {info['count']} occurrences in {len(info['files'])} files")
-
-        # Generate fix script
-        if terminology_issues['suggested_fixes']:
-            fix_script = analyzer.generate_fix_script(terminology_issues['suggested_fixes'])
-            fix_script_path = os.path.join(repo_path, 'scripts', 'fix_terminology.py')
-            with open(fix_script_path, 'w') as f:
-                f.write(fix_script)
-            print(f"\n💡 Fix script generated: {fix_script_path}")
-            print("   Run it with: python scripts/fix_terminology.py")
-    else:
-        print("\n✅ Terminology is consistent")
+    selected_rules = args.rules
+    terminology_issues = None
+    if 'advanced' in selected_rules:
+        if results['duplicates']:
+            print(f"\n📑 Found {results['duplicates'].total} potential duplicates:")
+            for i, dup in enumerate(results['duplicates'][:5], 1):
+                print(f"\n  {i}. Similarity: {dup['similarity']*100:.1f}%")
+                print(f"     File 1: {Path(dup['file1']).name}")
+                print(f"     File 2: {Path(dup['file2']).name}")
+        else:
+            print("\n✅ No significant duplicates found")
+
+        contradiction_kinds = ('contradictions', 'semantic_contradictions', 'numeric_conflicts')
+        if any(results[kind] for kind in contradiction_kinds):
+            total_contradictions = sum(results[kind].total for kind in contradiction_kinds)
+            print(f"\n⚠️  Found {total_contradictions} potential contradictions:")
+
+            all_contradictions = chain(*(results[kind] for kind in contradiction_kinds))
+            for i, cont in enumerate(islice(all_contradictions, 5), 1):
+                print(f"\n  {i}. Type: {cont.get('type', 'pattern-based')}")
+                print(f"     File 1: {Path(cont['file1']).name}: {cont['text1'][:100]}...")
+                print(f"     File 2: {Path(cont['file2']).name}: {cont['text2'][:100]}...")
+        else:
+            print("\n✅ No contradictions detected")
+
+        # Check terminology
+        print("\n🔤 Analyzing terminology consistency...")
+        terminology_issues = analyzer.find_terminology_issues()
+
+        if terminology_issues['inconsistencies']:
+            print(f"\n📝 Found {len(terminology_issues['inconsistencies'])} terminology inconsistencies:")
+            for issue in terminology_issues['inconsistencies']:
+                print(f"\n  • Standard: '{issue['standard_term']}'")
+                print(f"    Variations found: {', '.join(issue['variations_found'])}")
+                for term, info in issue['usage'].items():
+                    print(f"    - '{term}': {info['count']} occurrences in {len(info['files'])} files")
+
+            # Generate fix script
+            if terminology_issues['suggested_fixes']:
+                fix_script_path = args.fix_script or os.path.join(repo_path, 'scripts', 'fix_terminology.py')
+                script_dir = os.path.dirname(os.path.abspath(fix_script_path))
+                os.makedirs(script_dir, exist_ok=True)
+                fix_script = analyzer.generate_fix_script(terminology_issues['suggested_fixes'],
+                                                          repo_path, script_dir)
+                with open(fix_script_path, 'w') as f:
+                    f.write(fix_script)
+                print(f"\n💡 Fix script generated: {fix_script_path}")
+                print(f"   Preview it with: python {os.path.relpath(fix_script_path)} --dry-run")
+                print(f"   Run it with: python {os.path.relpath(fix_script_path)}")
+        else:
+            print("\n✅ Terminology is consistent")
+
+    basic_inconsistencies = None
+    if 'basic' in selected_rules:
+        basic_inconsistencies = analyzer.find_terminology_inconsistencies()
+        print("\n📋 Basic rules:")
+        print(f"  • {results['basic_duplicates'].total} potential duplicates")
+        print(f"  • {results['basic_contradictions'].total} potential contradictions")
+        print(f"  • {len(basic_inconsistencies)} terminology inconsistencies")
 
     # Save detailed results
+    statistics = {
+        'total_documents': len(analyzer.documents),
+        'unique_files': len(set(analyzer.documents.file_ids)),
+        'vocabulary_size': len(analyzer.index.vocabulary),
+        'nlp_enabled': analyzer.tokenizer.mode == 'nltk',
+        'tokenizer': analyzer.tokenizer.mode,
+        'weighting': analyzer.weighting,
+        'changed_since': args.changed_since,
+        'changed_files': len(changed),
+        'top_k': args.top_k,
+        'max_df': args.max_df,
+        'max_postings': args.max_postings,
+        'rules': list(selected_rules)
+    }
+    if args.profile:
+        statistics['timings'] = timings_report(analyzer.timer, analyzer.counters, {
+            'tokens': analyzer._tokens_of_text,
+            'stems': analyzer.tokenizer.stem,
+        })
+        print_timings(statistics['timings'])
+
     output_file = os.path.join(repo_path, 'contradiction_analysis.json')
-    with open(output_file, 'w') as f:
-        json.dump({
-            'duplicates': results['duplicates'],
-            'contradictions': results['contradictions'],
-            'semantic_contradictions': results['semantic_contradictions'],
+    report = {}
+    if 'advanced' in selected_rules:
+        report.update({
+            'duplicates': results['duplicates'].json_array(),
+            'contradictions': results['contradictions'].json_array(),
+            'semantic_contradictions': results['semantic_contradictions'].json_array(),
+            'numeric_conflicts': results['numeric_conflicts'].json_array(),
             'terminology_issues': terminology_issues,
-            'statistics': {
-                'total_documents': len(analyzer.documents),
-                'unique_files': len(set(analyzer.file_paths)),
-                'vocabulary_size': len(analyzer.vocabulary),
-                'nlp_enabled': NLTK_AVAILABLE
-            }
-        }, f, indent=2)
+        })
+    if 'basic' in selected_rules:
+        report['basic'] = {
+            'duplicates': results['basic_duplicates'].json_array(),
+            'contradictions': results['basic_contradictions'].json_array(),
+            'terminology_inconsistencies': basic_inconsistencies
+        }
+    report['statistics'] = statistics
+    with open(output_file, 'w') as f:
+        json.dump(report, f, indent=2)
 
     print(f"\n💾 Detailed results saved to: {output_file}")
+    if args.save_index:
+        analyzer.save_index(args.save_index, stamps,
+                            suggested_fixes=terminology_issues['suggested_fixes'] if terminology_issues else None)
+        print(f"🗂️  Index saved to: {args.save_index}")
     print("\n✨ Analysis complete!")
 
+    if watcher:
+        verify = (lambda: fresh_totals(args)) if args.watch_verify else None
+        return watch(analyzer, watcher, results, selected_rules, verify)
+    return 0
+
+
+def watch(analyzer: AdvancedSemanticAnalyzer, watcher: PollingWatcher, results: Dict,
+          selected_rules: Tuple[str, ...], verify: Optional[Callable[[], Dict[str, int]]] = None) -> int:
+    """Re-analyze markdown files as they change and print the findings each change adds or resolves
+
+    With verify, the totals after each update are compared with the
+    finding totals verify returns for a from-scratch analysis.
+    """
+    kinds = [kind for kind in chain(ADVANCED_KINDS, BASIC_KINDS, SENTENCE_KINDS)
+             if results.get(kind + 's') is not None]
+
+    def identities(kind: str, findings: Findings) -> Dict:
+        return dict(analyzer.finding_key(kind, a, b) for a, b, _ in findings.entries())
+
+    session = FindingSet()
+    for kind in kinds:
+        session.replace(kind, identities(kind, results[kind + 's']))
+    analyzer.prepare_updates()
+
+    print(f"\n👀 Watching {watcher.root} for changes every {watcher.interval:g}s (Ctrl+C to stop)...")
+    try:
+        for paths in watcher:
+            started = time.perf_counter()
+            focus = analyzer.update_files(paths)
+            found = analyzer.find_updated_findings(focus, selected_rules)
+            elapsed = time.perf_counter() - started
+
+            names = ', '.join(Path(path).name for path in paths[:3]) + (', ...' if len(paths) > 3 else '')
+            print(f"\n🔄 {len(paths)} changed file(s) ({names}) re-analyzed in {elapsed * 1000:.0f} ms")
+            changed = set(paths)
+            for kind in kinds:
+                locations = dict(analyzer.finding_key(kind, a, b) for a, b, _ in found[kind].entries())
+                # Numeric conflicts are recomputed for the whole tree
+                added, removed = session.replace(kind, locations,
+                                                 None if kind == 'numeric_conflict' else changed)
+                if not added and not removed:
+                    continue
+                print(f"  {kind.replace('_', ' ')}s: +{len(added)} -{len(removed)}")
+                # Both print stored locations, so a finding shows the same lines coming and going
+                shown = [('+', locations[key]) for key in added[:3]] + [('-', location) for location in removed[:3]]
+                for sign, (file1, line1, file2, line2) in shown:
+                    print(f"    {sign} {Path(file1).name}:{line1} ↔ {Path(file2).name}:{line2}")
+            print(f"  {len(session)} findings in {len(analyzer.entries)} files")
+            if verify:
+                fresh = verify()
+                mismatches = [f"{kind.replace('_', ' ')}s {count} (fresh {fresh.get(kind, 0)})"
+                              for kind, count in session.totals().items() if count != fresh.get(kind, 0)]
+                if mismatches:
+                    print(f"  ⚠️  Differs from a fresh analysis: {', '.join(mismatches)}")
+                else:
+                    print("  ✅ Matches a fresh analysis")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
     return 0
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+"""
+Shared analysis engine for the documentation contradiction detectors
+Used by detect_contradictions.py and detect_contradictions_advanced.py
+"""
+
+from .cache import AnalysisCache, content_hash
+from .changes import changed_files
+from .chunker import Chunk, chunk_id, iter_chunks
+from .corpus import SpanStore, iter_markdown_files, open_buffer, read_ahead
+from .facts import FactIndex, extract_facts
+from .findings import FindingStream, Findings, TopFindings
+from .indexfile import IndexFile, write_index
+from .minhash import MinHasher, lsh_candidate_pairs, near_duplicate_pairs, shingles
+from .nlp import NLTK_INSTALLED, NLTKDataError, Tokenizer, light_stem
+from .parallel import map_tiles, resolve_jobs, triangular_tiles, worker_pool
+from .polarity import PolarityScanner, opposed
+from .profiling import StageTimer, peak_rss_mb
+from .rules import RULE_SETS, indicator_polarity
+from .semantic import SentenceIndex, decode_features, encode_features
+from .server import QueryServer
+from .sparse import (
+    SCIPY_AVAILABLE,
+    InvertedIndex,
+    SparseMatrix,
+    Vocabulary,
+    similar_pairs,
+)
+from .stats import WEIGHTINGS, CorpusStats, term_weights
+from .terms import TermScanner
+from .tokens import Memoized, TokenStore
+from .watch import FindingSet, PollingWatcher
+
+__all__ = [
+    'AnalysisCache',
+    'Chunk',
+    'CorpusStats',
+    'FactIndex',
+    'FindingSet',
+    'FindingStream',
+    'Findings',
+    'IndexFile',
+    'SCIPY_AVAILABLE',
+    'InvertedIndex',
+    'Memoized',
+    'MinHasher',
+    'NLTK_INSTALLED',
+    'NLTKDataError',
+    'PolarityScanner',
+    'PollingWatcher',
+    'QueryServer',
+    'RULE_SETS',
+    'SentenceIndex',
+    'SpanStore',
+    'SparseMatrix',
+    'StageTimer',
+    'TermScanner',
+    'Tokenizer',
+    'TokenStore',
+    'TopFindings',
+    'Vocabulary',
+    'WEIGHTINGS',
+    'changed_files',
+    'chunk_id',
+    'content_hash',
+    'decode_features',
+    'encode_features',
+    'extract_facts',
+    'indicator_polarity',
+    'iter_chunks',
+    'iter_markdown_files',
+    'light_stem',
+    'lsh_candidate_pairs',
+    'map_tiles',
+    'near_duplicate_pairs',
+    'open_buffer',
+    'opposed',
+    'peak_rss_mb',
+    'read_ahead',
+    'resolve_jobs',
+    'shingles',
+    'similar_pairs',
+    'term_weights',
+    'triangular_tiles',
+    'worker_pool',
+    'write_index',
+]
@@ -0,0 +1,86 @@
+"""
+Persistent on-disk cache of per-file analysis results
+
+Entries hold whatever an analyzer derives from a single markdown file
+(chunks, token lists, sentence splits) and are keyed by the SHA-256 of the
+file content. Each analyzer (namespace) and analyzer version gets its own
+directory, so changing the chunking or tokenization code invalidates old
+entries automatically.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Dict, Optional, Union
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'contradictions')
+
+
+def content_hash(content: Union[str, bytes]) -> str:
+    """SHA-256 of file content (text, raw bytes or a memory map)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+class AnalysisCache:
+    """Content-addressed JSON entries under <cache_dir>/<namespace>/<analyzer_version>/"""
+
+    def __init__(self, cache_dir: str, namespace: str, analyzer_version: str):
+        self.root = os.path.join(cache_dir, namespace)
+        self.version = analyzer_version
+        self.directory = os.path.join(self.root, analyzer_version)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _read(self, path: str) -> Optional[Dict]:
+        """Read JSON, treating missing or corrupt files as absent"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, data: Dict):
+        """Write JSON atomically (temp file + rename)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get(self, key: str, record: bool = True) -> Optional[Dict]:
+        """Return the cached entry for a content hash, or None
+
+        record=False leaves the hit/miss counters untouched.
+        """
+        entry = self._read(self._entry_path(key))
+        if record:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        """Store the entry for a content hash"""
+        self._write(self._entry_path(key), entry)
+
+    def prune(self):
+        """Remove entries written by other versions of this analyzer"""
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name != self.version and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,38 @@
+"""
+Change tracking for incremental analysis
+
+Finds the markdown files touched since a git ref, so a run can report
+only the findings involving them.
+"""
+
+import os
+import subprocess
+from typing import Set
+
+
+def _git(repo_path: str, *args: str) -> str:
+    """Run a git command in repo_path and return its stdout"""
+    result = subprocess.run(
+        ['git', *args], cwd=repo_path, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def changed_files(repo_path: str, ref: str) -> Set[str]:
+    """Absolute paths of markdown files changed since the merge base with ref
+
+    Includes uncommitted changes in the working tree; deleted files are
+    left out since they no longer have chunks.
+    """
+    top_level = _git(repo_path, 'rev-parse', '--show-toplevel').strip()
+    merge_base = _git(repo_path, 'merge-base', ref, 'HEAD').strip()
+    output = _git(repo_path, 'diff', '--name-only', '--diff-filter=d', merge_base, '--')
+    untracked = _git(repo_path, 'ls-files', '--others', '--exclude-standard')
+
+    return {
+        os.path.realpath(os.path.join(top_level, name))
+        for name in (output + untracked).splitlines()
+        if name.endswith('.md')
+    }
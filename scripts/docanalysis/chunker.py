@@ -0,0 +1,182 @@
+"""
+Single-pass markdown chunker
+
+Splits a markdown file into sections at headers and splits sections that
+are too long into their blank-line separated blocks, in document order.
+The chunker knows enough markdown to keep chunks meaningful:
+
+- YAML front matter at the top of a file is metadata and is skipped
+- headers and blank lines inside fenced code blocks (``` or ~~~) do not
+  split anything
+- a table is one block even inside a long section
+
+Structure is found with compiled regexes over the raw bytes, so ordinary
+text lines are never visited from Python and only the chunk being emitted
+is decoded. Every chunk is a contiguous byte span of the file, carries its
+1-based line range and a content-derived id, so unchanged chunks keep
+their id across edits elsewhere in the file.
+"""
+
+import hashlib
+import re
+from typing import Iterator, NamedTuple, Optional
+
+from .corpus import Buffer, decode
+
+# Sections longer than this (in characters) are split into blocks
+MAX_SECTION_CHARS = 1000
+
+# UTF-8 encodes a character in at most this many bytes
+_MAX_CHAR_BYTES = 4
+
+FRONT_MATTER = re.compile(rb'---[ \t]*\r?\n(?:.*?\r?\n)??(?:---|\.\.\.)[ \t]*(?:\r?\n|\Z)', re.DOTALL)
+# Lines that can start a section or open/close a code block
+SECTION_EVENTS = re.compile(rb'^(?:(#+[ \t]+[^\r\n])|[ ]{0,3}(`{3,}|~{3,}))', re.MULTILINE)
+# Lines that can end a block within a section
+BLOCK_EVENTS = re.compile(rb'^(?:([ \t]*\r?$)|[ ]{0,3}(`{3,}|~{3,})|[ \t]*(\|))', re.MULTILINE)
+
+
+class Chunk(NamedTuple):
+    """A section or block of a markdown file"""
+    offset: int      # byte offset in the file
+    length: int      # byte length
+    start_line: int  # first line, 1-based
+    end_line: int    # last line, inclusive
+    text: str
+
+
+def chunk_id(text: str) -> str:
+    """Deterministic id of a chunk, derived from its text"""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+
+class _LineCounter:
+    """Line numbers of byte offsets, asked for in increasing order"""
+
+    def __init__(self, markdown: Buffer):
+        self.markdown = markdown
+        self.position = 0
+        self.line = 1
+
+    def chunk(self, start: int, end: int, raw: Optional[bytes] = None,
+              text: Optional[str] = None) -> Chunk:
+        """Chunk for the span markdown[start:end] (raw) starting at or after the previous one"""
+        if raw is None:
+            raw = self.markdown[start:end]
+        if text is None:
+            text = decode(raw)
+        start_line = self.line + self.markdown[self.position:start].count(b'\n')
+        self.line = start_line + raw.count(b'\n')
+        self.position = end
+        return Chunk(start, end - start, start_line, self.line, text)
+
+
+def _line_end(markdown: Buffer, position: int) -> int:
+    """Offset of the end of the line containing position, without its line ending"""
+    newline = markdown.find(b'\n', position)
+    if newline < 0:
+        return len(markdown)
+    return newline - 1 if newline > position and markdown[newline - 1] == 0x0D else newline
+
+
+def _next_line(markdown: Buffer, position: int, end: int) -> int:
+    """Start of the line after the one containing position, or end"""
+    newline = markdown.find(b'\n', position, end)
+    return end if newline < 0 else newline + 1
+
+
+def _previous_line_end(markdown: Buffer, line_start: int) -> int:
+    """End of the line before the one starting at line_start, without its line ending"""
+    end = line_start - 1
+    return end - 1 if end > 0 and markdown[end - 1] == 0x0D else end
+
+
+def _closes(markdown: Buffer, fence: bytes, marker: bytes, end: int) -> bool:
+    """True if a fence marker ending at end closes the code block opened by fence"""
+    return marker[0] == fence[0] and len(marker) >= len(fence) and \
+        not markdown[end:_line_end(markdown, end)].strip()
+
+
+def _section_starts(markdown: Buffer, start: int) -> Iterator[int]:
+    """Offsets of the header lines after start that begin a new section"""
+    fence = None
+    for match in SECTION_EVENTS.finditer(markdown, start):
+        marker = match.group(2)
+        if fence is not None:
+            # Inside a code block only the closing fence matters
+            if marker and _closes(markdown, fence, marker, match.end()):
+                fence = None
+        elif marker:
+            fence = marker
+        elif match.start() > start:
+            yield match.start()
+
+
+def iter_chunks(markdown: Buffer, max_section_chars: int = MAX_SECTION_CHARS) -> Iterator[Chunk]:
+    """Yield the chunks of a markdown file in document order
+
+    Sections up to max_section_chars are yielded whole; longer ones are
+    yielded block by block.
+    """
+    start = 0
+    front_matter = FRONT_MATTER.match(markdown)
+    if front_matter:
+        start = front_matter.end()
+
+    lines = _LineCounter(markdown)
+    for header in _section_starts(markdown, start):
+        yield from _section_chunks(markdown, start, _previous_line_end(markdown, header),
+                                   lines, max_section_chars)
+        start = header
+    yield from _section_chunks(markdown, start, len(markdown), lines, max_section_chars)
+
+
+def _section_chunks(markdown: Buffer, start: int, end: int, lines: _LineCounter,
+                    max_section_chars: int) -> Iterator[Chunk]:
+    """The section markdown[start:end] as one chunk, or its blocks if it is too long"""
+    size = end - start
+    if size <= max_section_chars:
+        # Never more characters than bytes
+        yield lines.chunk(start, end)
+        return
+    if size <= max_section_chars * _MAX_CHAR_BYTES:
+        raw = markdown[start:end]
+        if not raw.isascii():
+            text = decode(raw)
+            if len(text) <= max_section_chars:
+                yield lines.chunk(start, end, raw, text)
+                return
+
+    block = start
+    fence = None
+    in_table = False
+    for match in BLOCK_EVENTS.finditer(markdown, start, end):
+        line = match.start()
+        blank, marker, table = match.groups()
+        if fence is not None:
+            if marker and _closes(markdown, fence, marker, match.end()):
+                fence = None
+        elif marker:
+            fence = marker
+        elif blank is not None:
+            # Blank lines end the current block
+            if block < line:
+                yield lines.chunk(block, _previous_line_end(markdown, line))
+            block = _next_line(markdown, line, end)
+            in_table = False
+        elif table:
+            # So do the edges of a table
+            if not in_table and block < line:
+                yield lines.chunk(block, _previous_line_end(markdown, line))
+                block = line
+            in_table = True
+            following = _next_line(markdown, line, end)
+            if following < end:
+                event = BLOCK_EVENTS.match(markdown, following, end)
+                if event is None or event.group(2):
+                    yield lines.chunk(block, _previous_line_end(markdown, following))
+                    block = following
+                    in_table = False
+
+    if block < end:
+        yield lines.chunk(block, end)
@@ -0,0 +1,198 @@
+"""
+Streaming markdown loading and span-backed chunk storage
+
+Files are walked lazily with os.scandir and read through memory maps once
+they are large, so only the section being chunked needs to be decoded.
+read_ahead overlaps the open/read round trips of many files on a thread
+pool, which dominate on network mounts and cold caches. Chunks are kept as
+(file id, byte offset, byte length) spans into their file rather than as
+copied strings; the text of a chunk is read back from disk only when a
+report needs it.
+"""
+
+import mmap
+import os
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Tuple, Union
+
+# Files at least this large are memory-mapped instead of read into memory
+MMAP_THRESHOLD = 1 << 20
+
+# Open files and decoded chunks kept around for materializing chunk text
+OPEN_FILES = 32
+RECENT_TEXTS = 256
+
+# Reader threads, and files read ahead of the one being processed
+READ_THREADS = 8
+READ_AHEAD = 64
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+def iter_markdown_files(repo_path: str) -> Iterator[str]:
+    """Yield markdown file paths under repo_path, skipping hidden directories and node_modules
+
+    Directories are listed with os.scandir, whose entries know their type
+    without a stat() per file, and visited top-down in name order, so the
+    order does not depend on the file system.
+    """
+    try:
+        with os.scandir(repo_path) as listing:
+            entries = sorted(listing, key=lambda entry: entry.name)
+    except OSError:
+        return
+
+    directories = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            # Like os.walk, symlinked directories are not followed
+            if not entry.name.startswith('.') and entry.name != 'node_modules' and not entry.is_symlink():
+                directories.append(entry.path)
+        elif entry.name.endswith('.md'):
+            yield entry.path
+    for directory in directories:
+        yield from iter_markdown_files(directory)
+
+
+def read_buffer(path: str, mmap_threshold: int = MMAP_THRESHOLD) -> Buffer:
+    """Raw file content: bytes for small files, a read-only memory map for large ones
+
+    The caller releases it with close_buffer.
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < mmap_threshold or size == 0:
+            return f.read()
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def close_buffer(buffer: Buffer):
+    """Release a buffer returned by read_buffer"""
+    if isinstance(buffer, mmap.mmap):
+        buffer.close()
+
+
+@contextmanager
+def open_buffer(path: str, mmap_threshold: int = MMAP_THRESHOLD) -> Iterator[Buffer]:
+    """Raw file content as a context manager (see read_buffer)"""
+    buffer = read_buffer(path, mmap_threshold)
+    try:
+        yield buffer
+    finally:
+        close_buffer(buffer)
+
+
+def read_ahead(paths: Iterable[str], threads: int = READ_THREADS,
+               window: int = READ_AHEAD) -> Iterator[Tuple[str, Future]]:
+    """(path, future read_buffer result) for each path, in order
+
+    Up to window files are read ahead of the one the caller is processing,
+    threads at a time; a failed read raises from the future's result().
+    """
+    with ThreadPoolExecutor(max_workers=max(threads, 1)) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append((path, pool.submit(read_buffer, path)))
+            if len(pending) >= window:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+def decode(raw: bytes) -> str:
+    """Text of a byte span, with CRLF line endings read as LF like text-mode open()"""
+    text = raw.decode('utf-8')
+    return text.replace('\r\n', '\n') if '\r' in text else text
+
+
+class SpanStore:
+    """Sequence of text chunks stored as (file id, byte offset, byte length) spans
+
+    Indexing returns the chunk text, read back from the file on demand.
+    """
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.file_ids = array('i')
+        self.offsets = array('q')
+        self.lengths = array('q')
+        self._buffers = OrderedDict()
+        self._recent = OrderedDict()
+
+    def __getstate__(self):
+        # Open memory maps cannot be pickled; workers reopen files themselves
+        state = self.__dict__.copy()
+        state['_buffers'] = OrderedDict()
+        state['_recent'] = OrderedDict()
+        return state
+
+    def add_file(self, path: str) -> int:
+        """Register a file and return its id"""
+        self.paths.append(path)
+        return len(self.paths) - 1
+
+    def add(self, file_id: int, offset: int, length: int) -> int:
+        """Append a chunk span and return its index"""
+        self.file_ids.append(file_id)
+        self.offsets.append(offset)
+        self.lengths.append(length)
+        return len(self.offsets) - 1
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, i: int) -> str:
+        return self.text(i)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.text(i)
+
+    def path(self, i: int) -> str:
+        """Path of the file a chunk comes from"""
+        return self.paths[self.file_ids[i]]
+
+    def _buffer(self, file_id: int) -> Buffer:
+        buffer = self._buffers.get(file_id)
+        if buffer is not None:
+            self._buffers.move_to_end(file_id)
+            return buffer
+
+        with open(self.paths[file_id], 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                buffer = b''
+            else:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffers[file_id] = buffer
+        if len(self._buffers) > OPEN_FILES:
+            _, oldest = self._buffers.popitem(last=False)
+            if isinstance(oldest, mmap.mmap):
+                oldest.close()
+        return buffer
+
+    def close_file(self, file_id: int):
+        """Drop the open buffer of a file, e.g. before it is rewritten"""
+        buffer = self._buffers.pop(file_id, None)
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+    def text(self, i: int) -> str:
+        """Text of chunk i"""
+        text = self._recent.get(i)
+        if text is not None:
+            self._recent.move_to_end(i)
+            return text
+
+        offset = self.offsets[i]
+        text = decode(self._buffer(self.file_ids[i])[offset:offset + self.lengths[i]])
+        self._recent[i] = text
+        if len(self._recent) > RECENT_TEXTS:
+            self._recent.popitem(last=False)
+        return text
@@ -0,0 +1,161 @@
+"""
+Numeric facts and the subject index that finds conflicting values
+
+Every sentence is scanned once for quantities: a number, the unit word
+right after it (if any) and the subject, i.e. the last content words
+before it. "The upload limit is 5 MB" yields the fact
+(('limit', 'upload'), 'mb', 5.0), the analyzer's tokenizer normalizing
+the words. Code (fenced, indented and inline, the regions the rewriter
+protects) is blanked out first: numbers in code, CSS or identifiers
+("var(--space-3)", "TASK-001") state no facts about the documentation.
+
+Facts are posted into a hash index keyed by (subject, unit). Two sentences
+conflict when they state different values under the same key; every
+statement that departs from a subject's most common value is reported
+once, so the conflicts of a corpus are read from the index in time
+linear in the number of facts instead of by comparing sentence pairs.
+"""
+
+import re
+from array import array
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .rewrite import FENCED_CODE, INDENTED_CODE, INLINE_CODE, continues_list
+
+# Content words before a number that make up its subject
+SUBJECT_WORDS = 2
+
+# Words linking a subject to its value ("the limit is 5"), not part of the subject
+LINKING_WORDS = re.compile(
+    r'\b(?:is|are|was|were|be|been|has|have|had|can|may|set|sets|equals?|about|around|'
+    r'approximately|up|than|at|least|most|only)\b', re.IGNORECASE)
+
+# A number not part of a word, version string or hyphenated identifier, and the unit word
+# right after it
+QUANTITY = re.compile(r'(?<![\w.-])(\d+(?:\.\d+)?)(?![\w.]*\.\d)(?:\s*(%|[^\W\d_]+))?')
+# Numbers in headings ("Section 2", "Step 3") name things rather than state values
+HEADING = re.compile(r'^[ \t]*#.*$', re.MULTILINE)
+CODE = re.compile(f'{FENCED_CODE}|{INLINE_CODE}|{INDENTED_CODE}', re.MULTILINE)
+# Code inside indented lines that continue a list item
+LIST_CODE = re.compile(f'{FENCED_CODE}|{INLINE_CODE}', re.MULTILINE)
+
+# (subject words, unit, value); the unit is '' for plain counts
+Fact = Tuple[Tuple[str, ...], str, float]
+
+
+def _blank(match: re.Match) -> str:
+    text = match.group()
+    if match.lastgroup == 'indented' and continues_list(match.string, match.start()):
+        return LIST_CODE.sub(_blank, text)
+    return re.sub(r'[^\n]', ' ', text)
+
+
+def mask_code(text: str) -> str:
+    """text with its code replaced by spaces, keeping offsets and line breaks"""
+    return CODE.sub(_blank, text)
+
+
+def extract_facts(sentence: str, words: Callable[[str], List[str]]) -> List[Fact]:
+    """Numeric facts stated by a sentence
+
+    words is the analyzer's tokenizer (lowercased, stop words removed,
+    stemmed), so subjects and units compare like the rest of the analysis.
+    Numbers without any content word before them or inside code are skipped.
+    """
+    facts = []
+    text = HEADING.sub('', mask_code(sentence))
+    start = 0
+    for match in QUANTITY.finditer(text):
+        # The subject is taken from the text since the previous quantity
+        prefix = LINKING_WORDS.sub(' ', text[start:match.start()])
+        subject = [word for word in words(prefix) if not word.isdigit()]
+        start = match.end()
+        if not subject:
+            continue
+        unit = words(match.group(2))[:1] if match.group(2) else []
+        facts.append((tuple(sorted(subject[-SUBJECT_WORDS:])), unit[0] if unit else '',
+                      float(match.group(1))))
+    return facts
+
+
+def encode_facts(facts: Iterable[Fact]) -> list:
+    """JSON-serializable form of facts, for the analysis cache"""
+    return [[list(subject), unit, value] for subject, unit, value in facts]
+
+
+def decode_facts(data: list) -> List[Fact]:
+    """Inverse of encode_facts"""
+    return [(tuple(subject), unit, value) for subject, unit, value in data]
+
+
+def conflicting_values(facts1: Iterable[Fact],
+                       facts2: Iterable[Fact]) -> List[Tuple[Tuple[str, ...], str, float, float]]:
+    """(subject, unit, value in facts1, value in facts2) for every subject given different values"""
+    values = {}
+    for subject, unit, value in facts1:
+        values.setdefault((subject, unit), []).append(value)
+    return [(subject, unit, value1, value2)
+            for subject, unit, value2 in facts2
+            for value1 in values.get((subject, unit), ())
+            if value1 != value2]
+
+
+class FactIndex:
+    """Sentence ids of every fact, posted by (subject, unit) and then by value"""
+
+    def __init__(self):
+        self.postings: Dict[Tuple[Tuple[str, ...], str], Dict[float, array]] = {}
+        self.n_facts = 0
+
+    def add(self, sentence_id: int, facts: Iterable[Fact]):
+        """Post the facts of one sentence; sentences are added in id order"""
+        for subject, unit, value in facts:
+            values = self.postings.setdefault((subject, unit), {})
+            sentences = values.get(value)
+            if sentences is None:
+                sentences = values[value] = array('I')
+            # A sentence repeating a fact is posted once
+            if not sentences or sentences[-1] != sentence_id:
+                sentences.append(sentence_id)
+            self.n_facts += 1
+
+    def remove(self, sentence_id: int, facts: Iterable[Fact]):
+        """Unpost the facts of a sentence added before"""
+        for subject, unit, value in facts:
+            self.n_facts -= 1
+            values = self.postings.get((subject, unit))
+            sentences = values.get(value) if values else None
+            # A repeated fact was only posted once
+            if sentences is None or sentence_id not in sentences:
+                continue
+            sentences.remove(sentence_id)
+            if not sentences:
+                del values[value]
+                if not values:
+                    del self.postings[subject, unit]
+
+    def conflicts(self) -> List[Tuple[int, int, float, float]]:
+        """(a, b, value of a, value of b) for sentences a < b stating different values of a subject
+
+        Every subject has a reference value, the one stated most often
+        (ties go to the value stated first). Each sentence stating another
+        value is paired with the first sentence stating the reference
+        value, so a subject stated n times yields fewer than n conflicts
+        however many values it is given. Sorted by (a, b).
+        """
+        conflicts = []
+        for values in self.postings.values():
+            if len(values) < 2:
+                continue
+            reference = max(values, key=lambda value: (len(values[value]), -values[value][0]))
+            first = values[reference][0]
+            for value, sentences in values.items():
+                if value == reference:
+                    continue
+                for b in sentences:
+                    if first < b:
+                        conflicts.append((first, b, reference, value))
+                    elif b < first:
+                        conflicts.append((b, first, value, reference))
+        conflicts.sort()
+        return conflicts
@@ -0,0 +1,195 @@
+"""
+Compact finding lists
+
+A finding is recorded as a pair of indices (chunk or sentence ids) and a
+score rather than as a report dict with copied text and file paths; the
+dict is only built when the finding is read, e.g. while the report is
+being serialized. A million findings then take about 16 MB instead of
+gigabytes.
+
+When only the best findings matter, TopFindings keeps a bounded heap of
+them, and FindingStream writes every finding to a JSON Lines file as soon
+as it is produced.
+"""
+
+import heapq
+import json
+from array import array
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Builds the report entry of finding (first, second, score)
+Materializer = Callable[[int, int, float], Dict]
+
+
+class Findings:
+    """Sequence of (first, second, score) findings, read back as report dicts
+
+    The materializer is not pickled, so worker processes can return
+    findings cheaply; the parent attaches its own when merging them.
+    """
+
+    __slots__ = ('first', 'second', 'scores', 'materialize')
+
+    def __init__(self, materialize: Optional[Materializer] = None):
+        self.first = array('i')
+        self.second = array('i')
+        self.scores = array('d')
+        self.materialize = materialize
+
+    def __getstate__(self):
+        return self.first, self.second, self.scores
+
+    def __setstate__(self, state):
+        self.first, self.second, self.scores = state
+        self.materialize = None
+
+    def append(self, first: int, second: int, score: float = 0.0):
+        """Record a finding"""
+        self.first.append(first)
+        self.second.append(second)
+        self.scores.append(score)
+
+    def extend(self, other: 'Findings'):
+        """Append all findings of another list"""
+        self.first.extend(other.first)
+        self.second.extend(other.second)
+        self.scores.extend(other.scores)
+
+    def entries(self) -> Iterator[Tuple[int, int, float]]:
+        """The (first, second, score) triples, in reading order"""
+        return zip(self.first, self.second, self.scores)
+
+    @property
+    def total(self) -> int:
+        """Number of findings recorded"""
+        return len(self)
+
+    def __len__(self) -> int:
+        return len(self.first)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        if isinstance(key, slice):
+            return [self[k] for k in range(*key.indices(len(self)))]
+        return self.materialize(self.first[key], self.second[key], self.scores[key])
+
+    def __iter__(self) -> Iterator[Dict]:
+        for k in range(len(self)):
+            yield self[k]
+
+    def json_array(self) -> list:
+        """A list stand-in that json.dump writes entry by entry without materializing all findings"""
+        return _JSONArray(self)
+
+
+class _JSONArray(list):
+    """Empty list whose length and items are those of a Findings
+
+    json.dump checks for list instances and then only uses len() and
+    iteration, so the report dicts are built and written one at a time.
+    """
+
+    def __init__(self, findings: Findings):
+        super().__init__()
+        self.findings = findings
+
+    def __len__(self) -> int:
+        return len(self.findings)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.findings)
+
+
+class TopFindings(Findings):
+    """The limit highest-scored findings, read back best first
+
+    Ties go to the finding with the smaller (first, second), so the result
+    does not depend on the order findings arrive in.
+    """
+
+    __slots__ = ('limit', 'heap', 'seen', 'ordered')
+
+    def __init__(self, limit: int, materialize: Optional[Materializer] = None):
+        super().__init__(materialize)
+        self.limit = limit
+        self.heap: List[Tuple[float, int, int]] = []
+        self.seen = 0
+        self.ordered = True
+
+    def __getstate__(self):
+        return self.limit, self.heap, self.seen
+
+    def __setstate__(self, state):
+        Findings.__init__(self)
+        self.limit, self.heap, self.seen = state
+        self.ordered = False
+
+    def append(self, first: int, second: int, score: float = 0.0):
+        self.seen += 1
+        entry = (score, -first, -second)
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, entry)
+        elif self.limit > 0 and entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+        else:
+            return
+        self.ordered = False
+
+    def extend(self, other: Findings):
+        for first, second, score in other.entries():
+            self.append(first, second, score)
+        # Findings the other list already dropped still count
+        self.seen += other.total - len(other)
+
+    def _sort(self):
+        if self.ordered:
+            return
+        best = sorted(self.heap, reverse=True)
+        self.first = array('i', [-first for _, first, _ in best])
+        self.second = array('i', [-second for _, _, second in best])
+        self.scores = array('d', [score for score, _, _ in best])
+        self.ordered = True
+
+    def entries(self) -> Iterator[Tuple[int, int, float]]:
+        self._sort()
+        return super().entries()
+
+    @property
+    def total(self) -> int:
+        """Number of findings offered, including those not kept"""
+        return self.seen
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        self._sort()
+        return super().__getitem__(key)
+
+
+class FindingStream:
+    """JSON Lines writer: one {"kind": ..., **report entry} object per finding
+
+    Every batch is flushed, so a reader tailing the file sees findings
+    while the scan is still running.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file: IO[str] = open(path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def write(self, kind: str, findings: Iterable[Dict]):
+        """Append a batch of report entries of one kind"""
+        for finding in findings:
+            self.file.write(json.dumps({'kind': kind, **finding}) + '\n')
+            self.count += 1
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self) -> 'FindingStream':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,212 @@
+"""
+Versioned, memory-mappable index file
+
+The vocabulary, IDF scores, weighted postings and the chunk and sentence
+data of an analyzed corpus are written to one binary file laid out as
+plain arrays:
+
+    MAGIC | format version (u32) | table length (u32) | table (JSON)
+    | section | section | ...
+
+The table maps every section name to (offset, typecode, item size,
+count) and carries the metadata (analyzer version, tokenizer, stamps of
+the indexed files, ...). Sections start on 8-byte boundaries and are
+stored in native byte order. Opening the file maps it and casts
+memoryviews over the sections, so nothing is parsed or copied however
+large the index is, and processes mapping the same file share its pages.
+
+Variable-length rows (posting lists, strings) use a CSR layout: a
+starts array with one more entry than there are rows, and the
+concatenated data.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+MAGIC = b'DOCINDEX'
+FORMAT_VERSION = 1
+ALIGNMENT = 8
+
+_HEADER = struct.Struct('<8sII')
+
+# An array section, or raw bytes
+Section = Union[array, bytes]
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def csr(rows: Iterable[Iterable], typecode: str) -> Tuple[array, array]:
+    """(starts, data) of rows of numbers"""
+    starts = array('q', [0])
+    data = array(typecode)
+    for row in rows:
+        data.extend(row)
+        starts.append(len(data))
+    return starts, data
+
+
+def string_table(strings: Iterable[str]) -> Tuple[array, bytes]:
+    """(starts, UTF-8 data) of strings"""
+    starts, data = csr((string.encode('utf-8') for string in strings), 'B')
+    return starts, data.tobytes()
+
+
+def write_index(path: str, sections: Dict[str, Section], meta: Dict[str, Any]):
+    """Write sections and metadata to an index file, replacing any previous one atomically"""
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        typecode, itemsize = (data.typecode, data.itemsize) if isinstance(data, array) else ('B', 1)
+        layout[name] = [offset, typecode, itemsize, len(data)]
+        offset = _aligned(offset + itemsize * len(data))
+    table = json.dumps({'byteorder': sys.byteorder, 'sections': layout, 'meta': meta}).encode('utf-8')
+    start = _aligned(_HEADER.size + len(table))
+
+    # Readers that mapped the old file keep it until they close it
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(table)))
+        f.write(table)
+        for name, data in sections.items():
+            f.seek(start + layout[name][0])
+            f.write(data)
+        f.truncate(start + offset)
+    os.replace(temporary, path)
+
+
+class IndexFile:
+    """A mapped index file whose sections are read as typed memoryviews"""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{path} is not an index file")
+        magic, version, table_length = _HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an index file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has index format {version}, expected {FORMAT_VERSION}")
+        table = json.loads(self._map[_HEADER.size:_HEADER.size + table_length])
+        if table['byteorder'] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {table['byteorder']}-endian machine")
+
+        self.path = path
+        self.meta: Dict[str, Any] = table['meta']
+        self._sections = table['sections']
+        self._start = _aligned(_HEADER.size + table_length)
+        self._view = memoryview(self._map)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sections
+
+    def section(self, name: str) -> memoryview:
+        """A section as a memoryview of its typecode, without copying"""
+        offset, typecode, itemsize, count = self._sections[name]
+        if typecode != 'B' and array(typecode).itemsize != itemsize:
+            raise ValueError(f"{self.path}: section {name} has {itemsize}-byte items of type {typecode!r}, "
+                             f"which are {array(typecode).itemsize} bytes here")
+        start = self._start + offset
+        view = self._view[start:start + itemsize * count]
+        return view if typecode == 'B' else view.cast(typecode)
+
+    def rows(self, starts: str, data: str) -> 'Rows':
+        """The CSR rows of a starts section and a data section"""
+        return Rows(self.section(starts), self.section(data))
+
+    def strings(self, starts: str, data: str) -> 'StringTable':
+        """The strings of a string table"""
+        return StringTable(self.section(starts), self.section(data))
+
+
+class Rows:
+    """Row i is data[starts[i]:starts[i + 1]], sliced without copying"""
+
+    def __init__(self, starts: memoryview, data: memoryview):
+        self.starts = starts
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.starts) - 1
+
+    def __getitem__(self, i: int) -> memoryview:
+        if not 0 <= i < len(self.starts) - 1:
+            raise IndexError(i)
+        return self.data[self.starts[i]:self.starts[i + 1]]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+class StringTable(Rows):
+    """Strings stored as UTF-8 rows, decoded when read"""
+
+    def __getitem__(self, i: int) -> str:
+        return str(super().__getitem__(i), 'utf-8')
+
+    def encoded(self, i: int) -> bytes:
+        return bytes(Rows.__getitem__(self, i))
+
+
+class MappedVocabulary:
+    """Read-only Vocabulary over a string table and its ids in sorted order
+
+    Lookups binary-search the sorted ids, comparing encoded tokens, so the
+    vocabulary is never loaded into a dict.
+    """
+
+    def __init__(self, tokens: StringTable, order: memoryview):
+        self.tokens = tokens
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return self.get(token) is not None
+
+    def get(self, token: str) -> Optional[int]:
+        """Return the id of a token or None if it is not in the index"""
+        key = token.encode('utf-8')
+        low, high = 0, len(self.order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.tokens.encoded(self.order[middle]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.order) and self.tokens.encoded(self.order[low]) == key:
+            return self.order[low]
+        return None
+
+
+class TokenValues:
+    """Read-only token -> value mapping over a vocabulary and an array of values, e.g. IDF scores"""
+
+    def __init__(self, vocabulary: MappedVocabulary, values: memoryview):
+        self.vocabulary = vocabulary
+        self.values = values
+
+    def get(self, token: str, default: Any = None) -> Any:
+        token_id = self.vocabulary.get(token)
+        return default if token_id is None else self.values[token_id]
+
+    def __getitem__(self, token: str) -> Any:
+        token_id = self.vocabulary.get(token)
+        if token_id is None:
+            raise KeyError(token)
+        return self.values[token_id]
+
+    def __contains__(self, token: str) -> bool:
+        return self.vocabulary.get(token) is not None
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
@@ -0,0 +1,113 @@
+"""
+MinHash signatures and locality-sensitive hashing for near-duplicate chunks
+
+Each chunk is reduced to a set of word shingles, summarised by a MinHash
+signature of bands * rows values, and bucketed once per band. Chunks that
+collide in at least one band become candidate pairs, which are then
+verified with the exact TF-IDF cosine. Two chunks with shingle Jaccard
+similarity s collide with probability 1 - (1 - s**rows)**bands, so more
+bands raise recall and more rows raise precision.
+"""
+
+import random
+import zlib
+from collections import defaultdict
+from typing import Iterable, Iterator, List, Sequence, Set, Tuple
+
+from .sparse import SparseMatrix
+
+# Try to import numpy for vectorized signatures
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Shingle hashes are reduced modulo a 31-bit prime so a * x + b fits in 64 bits
+_PRIME = (1 << 31) - 1
+
+DEFAULT_BANDS = 32
+DEFAULT_ROWS = 4
+# Single-token shingles track the bag-of-words cosine used for verification best
+DEFAULT_SHINGLE_SIZE = 1
+
+
+def shingles(tokens: Sequence[str], size: int = DEFAULT_SHINGLE_SIZE) -> Set[int]:
+    """Hash the word n-grams of a token list into a set of integers"""
+    if len(tokens) < size:
+        grams = [' '.join(tokens)] if tokens else []
+    else:
+        grams = (' '.join(tokens[k:k + size]) for k in range(len(tokens) - size + 1))
+    return {zlib.crc32(gram.encode('utf-8')) % _PRIME for gram in grams}
+
+
+class MinHasher:
+    """Computes MinHash signatures with a fixed family of hash functions"""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.a = [rng.randrange(1, _PRIME) for _ in range(num_perm)]
+        self.b = [rng.randrange(0, _PRIME) for _ in range(num_perm)]
+        if NUMPY_AVAILABLE:
+            self._a = np.array(self.a, dtype=np.uint64)[:, None]
+            self._b = np.array(self.b, dtype=np.uint64)[:, None]
+
+    def signature(self, shingle_set: Set[int]) -> Tuple[int, ...]:
+        """Return the MinHash signature of a shingle set (empty sets give an empty tuple)"""
+        if not shingle_set:
+            return ()
+        if NUMPY_AVAILABLE:
+            values = np.fromiter(shingle_set, dtype=np.uint64, count=len(shingle_set))
+            hashed = (self._a * values[None, :] + self._b) % _PRIME
+            return tuple(hashed.min(axis=1).tolist())
+        # Lists instead of generators: this loop is the cost of pure-Python MinHash
+        return tuple([
+            min([(a * x + b) % _PRIME for x in shingle_set])
+            for a, b in zip(self.a, self.b)
+        ])
+
+
+def lsh_candidate_pairs(signatures: Sequence[Tuple[int, ...]], bands: int,
+                        rows: int) -> Set[Tuple[int, int]]:
+    """Return (i, j) pairs, i < j, whose signatures collide in at least one band"""
+    candidates = set()
+    for band in range(bands):
+        start = band * rows
+        buckets = defaultdict(list)
+        for doc_id, signature in enumerate(signatures):
+            if signature:
+                buckets[signature[start:start + rows]].append(doc_id)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    candidates.add((members[x], members[y]))
+    return candidates
+
+
+def near_duplicate_pairs(token_lists: Iterable[List[str]], matrix: SparseMatrix,
+                         min_similarity: float, bands: int = DEFAULT_BANDS,
+                         rows: int = DEFAULT_ROWS,
+                         shingle_size: int = DEFAULT_SHINGLE_SIZE,
+                         seed: int = 1) -> Iterator[Tuple[int, int, float]]:
+    """Yield (i, j, similarity) for LSH candidates whose exact cosine exceeds min_similarity
+
+    Pairs are yielded in row-major order, like similar_pairs.
+    """
+    hasher = MinHasher(bands * rows, seed)
+    signatures = [hasher.signature(shingles(tokens, shingle_size)) for tokens in token_lists]
+
+    # Verify the candidates of each row against that row's weights, looked up once;
+    # non-shared columns add exact zeros, so scores equal matrix.cosine
+    norms = matrix.norms
+    row_weights, current = {}, None
+    for i, j in sorted(lsh_candidate_pairs(signatures, bands, rows)):
+        if norms[i] == 0 or norms[j] == 0:
+            continue
+        if i != current:
+            row_weights, current = dict(zip(*matrix.row(i))), i
+        columns, weights = matrix.row(j)
+        dot = sum([row_weights.get(column, 0.0) * weight for column, weight in zip(columns, weights)])
+        similarity = dot / (norms[i] * norms[j])
+        if similarity > min_similarity:
+            yield i, j, similarity
@@ -0,0 +1,192 @@
+"""
+Word and sentence tokenizers, loaded on first use
+
+Importing an analyzer neither imports NLTK nor touches the network:
+whether NLTK is installed is checked with find_spec only, and the library
+and its data (downloaded if missing) are loaded when the first text is
+tokenized, which a run served entirely from the analysis cache never
+does. Modes:
+
+- nltk: NLTK word and sentence tokenizers, stop words and Porter stemmer
+- fast: regex tokenizer with the pure-Python light_stem stemmer
+- basic: regex tokenizer without stemming, the default without NLTK
+"""
+
+import importlib.util
+import re
+from typing import Callable, FrozenSet, List, Optional, Tuple
+
+from .tokens import STEM_CACHE_SIZE, Memoized
+
+NLTK_INSTALLED = importlib.util.find_spec('nltk') is not None
+
+TOKENIZERS = ('nltk', 'fast', 'basic')
+
+# NLTK data packages, fetched only if tokenizing fails without them
+# (punkt_tab replaces punkt in newer NLTK releases)
+NLTK_PACKAGES = ('punkt', 'punkt_tab', 'stopwords')
+
+BASIC_STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on',
+                              'at', 'to', 'for', 'of', 'with', 'by', 'from', 'as'})
+
+WORD = re.compile(r'\w+')
+SENTENCE_END = re.compile(r'[.!?]+')
+
+
+class NLTKDataError(RuntimeError):
+    """NLTK is installed but its data is missing and could not be downloaded"""
+
+
+def default_tokenizer() -> str:
+    """NLTK when it is installed, basic otherwise"""
+    return 'nltk' if NLTK_INSTALLED else 'basic'
+
+
+def _consonant(word: str, i: int) -> bool:
+    char = word[i]
+    if char in 'aeiou':
+        return False
+    if char == 'y':
+        return i == 0 or not _consonant(word, i - 1)
+    return True
+
+
+def _measure(stem: str) -> int:
+    """Porter's m: the number of vowel-consonant sequences in stem"""
+    m = 0
+    vowel_before = False
+    for i in range(len(stem)):
+        vowel = not _consonant(stem, i)
+        if vowel_before and not vowel:
+            m += 1
+        vowel_before = vowel
+    return m
+
+
+def _has_vowel(stem: str) -> bool:
+    return any(not _consonant(stem, i) for i in range(len(stem)))
+
+
+def _ends_cvc(word: str) -> bool:
+    """Ends consonant-vowel-consonant, the last not w, x or y (hop, but not snow)"""
+    return (len(word) >= 3 and _consonant(word, len(word) - 3)
+            and not _consonant(word, len(word) - 2)
+            and _consonant(word, len(word) - 1) and word[-1] not in 'wxy')
+
+
+def light_stem(word: str) -> str:
+    """Porter stemmer steps 1 and 5a: plurals, -ed, -ing, final y and e
+
+    Conflates the inflections that dominate documentation prose
+    (configure, configured, configures, configuring -> configur) at a
+    fraction of the cost of the full algorithm.
+    """
+    if len(word) <= 2:
+        return word
+
+    # Step 1a: plurals
+    if word.endswith(('sses', 'ies')):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+
+    # Step 1b: -eed, -ed, -ing
+    if word.endswith('eed'):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ('ed', 'ing'):
+            stem = word[:-len(suffix)]
+            if word.endswith(suffix) and _has_vowel(stem):
+                word = stem
+                if word.endswith(('at', 'bl', 'iz')):
+                    word += 'e'
+                elif len(word) >= 2 and word[-1] == word[-2] and _consonant(word, len(word) - 1) \
+                        and word[-1] not in 'lsz':
+                    word = word[:-1]
+                elif _measure(word) == 1 and _ends_cvc(word):
+                    word += 'e'
+                break
+
+    # Step 1c: final y after a vowel-containing stem
+    if word.endswith('y') and _has_vowel(word[:-1]):
+        word = word[:-1] + 'i'
+
+    # Step 5a: final e
+    if word.endswith('e'):
+        m = _measure(word[:-1])
+        if m > 1 or (m == 1 and not _ends_cvc(word[:-1])):
+            word = word[:-1]
+    return word
+
+
+class Tokenizer:
+    """Word and sentence splitting of one mode (see TOKENIZERS)"""
+
+    def __init__(self, mode: Optional[str] = None):
+        mode = mode or default_tokenizer()
+        if mode not in TOKENIZERS:
+            raise ValueError(f"unknown tokenizer {mode!r}, expected one of {', '.join(TOKENIZERS)}")
+        if mode == 'nltk' and not NLTK_INSTALLED:
+            raise ValueError("the nltk tokenizer needs NLTK: pip install nltk")
+        self.mode = mode
+        self.stop_words: FrozenSet[str] = BASIC_STOP_WORDS
+        self.stem: Optional[Callable[[str], str]] = (
+            Memoized(light_stem, STEM_CACHE_SIZE) if mode == 'fast' else None
+        )
+        # word_tokenize and sent_tokenize, once NLTK is loaded
+        self._nltk: Optional[Tuple[Callable, Callable]] = None
+
+    def __getstate__(self):
+        # Workers load NLTK themselves if they tokenize at all
+        state = self.__dict__.copy()
+        if self.mode == 'nltk':
+            state.update(_nltk=None, stop_words=BASIC_STOP_WORDS, stem=None)
+        return state
+
+    def _load_nltk(self) -> Tuple[Callable, Callable]:
+        import nltk
+        from nltk.corpus import stopwords
+        from nltk.stem import PorterStemmer
+        from nltk.tokenize import sent_tokenize, word_tokenize
+
+        def ready() -> bool:
+            try:
+                word_tokenize('ready.')
+                sent_tokenize('ready.')
+                stopwords.words('english')
+            except LookupError:
+                return False
+            return True
+
+        if not ready():
+            for package in NLTK_PACKAGES:
+                nltk.download(package, quiet=True)
+            if not ready():
+                raise NLTKDataError("NLTK data (punkt, stopwords) is missing and could not be "
+                                   "downloaded; install it with nltk.download() or use the fast tokenizer")
+
+        self.stop_words = frozenset(stopwords.words('english'))
+        self.stem = Memoized(PorterStemmer().stem, STEM_CACHE_SIZE)
+        self._nltk = word_tokenize, sent_tokenize
+        return self._nltk
+
+    def words(self, text: str) -> List[str]:
+        """Lowercased word tokens of text, stop words removed, stemmed unless basic"""
+        if self.mode == 'nltk':
+            word_tokenize, _ = self._nltk or self._load_nltk()
+            stem = self.stem
+            return [stem(t) for t in word_tokenize(text.lower())
+                    if t.isalnum() and t not in self.stop_words]
+        tokens = [t for t in WORD.findall(text.lower()) if t not in self.stop_words]
+        if self.stem is not None:
+            return [self.stem(t) for t in tokens]
+        return tokens
+
+    def sentences(self, text: str) -> List[str]:
+        """Sentences of text"""
+        if self.mode == 'nltk':
+            _, sent_tokenize = self._nltk or self._load_nltk()
+            return sent_tokenize(text)
+        sentences = SENTENCE_END.split(text)
+        return [s.strip() for s in sentences if s.strip()]
@@ -0,0 +1,104 @@
+"""
+Process-pool execution of pair-scoring tiles
+
+The upper-triangular pair space is split into contiguous row ranges
+("tiles") that own roughly the same number of pairs. Analyzer state is
+handed to each worker once through the pool initializer (inherited by fork
+or pickled once per worker under spawn) instead of with every task, and
+tile results come back in submission order, so merging them by
+concatenation reproduces the serial output exactly. Results are yielded
+as soon as they are ready, so callers can stream findings while later
+tiles are still being scored.
+
+worker_pool runs other per-item work (such as analyzing the files missing
+from the cache) on the same kind of pool, one submitted item at a time.
+"""
+
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Sequence, Tuple
+
+# Tiles per worker; more tiles even out uneven rows at a small scheduling cost
+TILES_PER_JOB = 4
+# Tiles of a serial run whose findings are streamed, so the first ones appear early
+STREAM_TILES = 32
+
+_worker_state = None
+
+
+def resolve_jobs(jobs: int) -> int:
+    """Number of worker processes for a --jobs value (0 means all cores)"""
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def triangular_tiles(n: int, n_tiles: int) -> List[Tuple[int, int]]:
+    """Split rows 0..n into ranges owning about the same number of (i, j > i) pairs"""
+    if n == 0:
+        return []
+    target = n * (n - 1) / 2 / max(n_tiles, 1)
+    tiles = []
+    start = 0
+    owned = 0
+    for i in range(n):
+        owned += n - 1 - i
+        if len(tiles) < n_tiles - 1 and owned >= target * (len(tiles) + 1) and i + 1 < n:
+            tiles.append((start, i + 1))
+            start = i + 1
+    tiles.append((start, n))
+    return tiles
+
+
+def _init_worker(state: Any):
+    global _worker_state
+    _worker_state = state
+
+
+def _run_tile(function: Callable[[Any, Any], Any], tile: Any) -> Any:
+    return function(_worker_state, tile)
+
+
+def map_tiles(function: Callable[[Any, Any], Any], tiles: Sequence[Any],
+              jobs: int, state: Any) -> Iterator[Any]:
+    """Yield function(state, tile) for each tile in order, using jobs processes
+
+    function must be picklable by reference (a module-level function or a
+    plain class attribute such as ``Analyzer._score_tile``).
+    """
+    if jobs <= 1 or len(tiles) <= 1:
+        for tile in tiles:
+            yield function(state, tile)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(state,)) as pool:
+        yield from pool.map(_run_tile, [function] * len(tiles), tiles)
+
+
+# submit(function, item) of a worker_pool
+Submit = Callable[[Callable[[Any, Any], Any], Any], Future]
+
+
+@contextmanager
+def worker_pool(jobs: int, state: Any) -> Iterator[Submit]:
+    """submit(function, item) returning a future of function(state, item), run on jobs processes
+
+    The same picklability rules as for map_tiles apply. With jobs <= 1 the
+    function runs in this process as soon as it is submitted.
+    """
+    if jobs <= 1:
+        def submit(function: Callable[[Any, Any], Any], item: Any) -> Future:
+            future = Future()
+            try:
+                future.set_result(function(state, item))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        yield submit
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(state,)) as pool:
+        yield lambda function, item: pool.submit(_run_tile, function, item)
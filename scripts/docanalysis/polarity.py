@@ -0,0 +1,43 @@
+"""
+Single-pass polarity scanner for (positive, negative) regex pattern pairs
+
+All patterns are compiled into one alternation of named groups, negative
+forms first. At any position the regex engine then prefers the negative
+form, so "must not" or "isn't" count only as negations instead of also
+hitting the positive pattern ("must", "is") they start with. One finditer
+pass yields a bitmask of positive and a bitmask of negative pattern hits.
+"""
+
+import re
+from typing import Sequence, Tuple
+
+# (positive mask, negative mask) of a text; bit k is pattern pair k
+Polarity = Tuple[int, int]
+
+
+def opposed(polarity1: Polarity, polarity2: Polarity) -> bool:
+    """True if one text hits the positive and the other the negative form of some pattern"""
+    return bool((polarity1[0] & polarity2[1]) | (polarity1[1] & polarity2[0]))
+
+
+class PolarityScanner:
+    """Compiled scanner for a list of (positive regex, negative regex) pairs"""
+
+    def __init__(self, pattern_pairs: Sequence[Tuple[str, str]]):
+        self.n_patterns = len(pattern_pairs)
+        negatives = [f'(?P<n{bit}>{negative})' for bit, (_, negative) in enumerate(pattern_pairs)]
+        positives = [f'(?P<p{bit}>{positive})' for bit, (positive, _) in enumerate(pattern_pairs)]
+        self.regex = re.compile('|'.join(negatives + positives))
+
+        # Group name -> (mask index, bit); 0 is positive, 1 negative
+        self._groups = {}
+        for name in self.regex.groupindex:
+            self._groups[name] = (0 if name[0] == 'p' else 1, 1 << int(name[1:]))
+
+    def scan(self, text: str) -> Polarity:
+        """Return the (positive, negative) pattern bitmasks of a text, ignoring case"""
+        masks = [0, 0]
+        for match in self.regex.finditer(text.lower()):
+            polarity, bit = self._groups[match.lastgroup]
+            masks[polarity] |= bit
+        return masks[0], masks[1]
@@ -0,0 +1,166 @@
+"""
+Stage timing, counters and profiling
+
+The analyzers time their stages (load, idf, vectorize, pairs, semantic,
+facts, terminology) with a StageTimer and count the work they do in a
+Counter; timings_report turns both into the statistics.timings block of
+the JSON report, and profiler wraps a run in cProfile or pyinstrument.
+"""
+
+import importlib.util
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+# Peak memory is read from getrusage where the platform has it
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+# pyinstrument is optional and only imported when asked for
+PYINSTRUMENT_AVAILABLE = importlib.util.find_spec('pyinstrument') is not None
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+
+def cpu_time() -> float:
+    """CPU seconds of this process and of the worker processes it has reaped"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class StageTimer:
+    """Wall-clock and CPU seconds spent in each named stage
+
+    Stages may nest; time spent in an inner stage only counts for the
+    inner one, so the stage times add up to the time spent in any stage.
+    CPU time includes worker processes once they have exited.
+    """
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.cpu_seconds: Dict[str, float] = {}
+        # [wall start, cpu start, inner wall seconds, inner cpu seconds] of every open stage
+        self._open: List[List[float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body of a with statement as (part of) stage name"""
+        frame = [time.perf_counter(), cpu_time(), 0.0, 0.0]
+        self._open.append(frame)
+        try:
+            yield
+        finally:
+            self._open.pop()
+            elapsed = time.perf_counter() - frame[0]
+            cpu = cpu_time() - frame[1]
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed - frame[2]
+            self.cpu_seconds[name] = self.cpu_seconds.get(name, 0.0) + cpu - frame[3]
+            if self._open:
+                self._open[-1][2] += elapsed
+                self._open[-1][3] += cpu
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in all stages"""
+        return sum(self.seconds.values())
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB, None where it cannot be read"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def timings_report(timer: StageTimer, counters: Mapping[str, int],
+                   caches: Optional[Mapping[str, Any]] = None) -> Dict:
+    """The statistics.timings block: stage times, counters, cache hit rates and peak memory
+
+    caches maps names to memoized functions with a cache_info() method.
+    """
+    counts = dict(counters)
+    if 'pairs_considered' in counts:
+        counts['pairs_pruned'] = counts['pairs_considered'] - counts.get('pairs_scored', 0)
+
+    cache_rates = {}
+    for name, cache in (caches or {}).items():
+        if cache is None:
+            continue
+        info = cache.cache_info()
+        lookups = info.hits + info.misses
+        cache_rates[name] = {
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_rate': round(info.hits / lookups, 4) if lookups else None,
+            'size': info.currsize,
+        }
+
+    peak = peak_rss_mb()
+    return {
+        'stages': {name: {'wall_seconds': round(seconds, 4),
+                          'cpu_seconds': round(timer.cpu_seconds.get(name, 0.0), 4)}
+                   for name, seconds in timer.seconds.items()},
+        'total_wall_seconds': round(timer.total, 4),
+        'counters': dict(sorted(counts.items())),
+        'caches': cache_rates,
+        'peak_rss_mb': round(peak, 1) if peak is not None else None,
+    }
+
+
+def print_timings(timings: Dict):
+    """Console summary of a timings block"""
+    print("\n⏱️  Stage timings:")
+    for name, stage in timings['stages'].items():
+        print(f"  {name:<12} {stage['wall_seconds']:>9.3f}s wall {stage['cpu_seconds']:>9.3f}s cpu")
+    counters = timings['counters']
+    if 'pairs_considered' in counters:
+        print(f"  pairs: {counters['pairs_considered']} considered, {counters['pairs_pruned']} pruned, "
+              f"{counters.get('pairs_scored', 0)} scored")
+    for name, cache in timings['caches'].items():
+        if cache['hit_rate'] is not None:
+            print(f"  {name} cache hit rate: {cache['hit_rate'] * 100:.1f}%")
+    if timings['peak_rss_mb'] is not None:
+        print(f"  peak memory: {timings['peak_rss_mb']} MB")
+
+
+@contextmanager
+def profiler(path: Optional[str], kind: str = 'cprofile') -> Iterator[None]:
+    """Profile the body of a with statement and write the result to path (no-op without path)
+
+    cProfile writes pstats data (inspect with ``python -m pstats`` or
+    snakeviz); pyinstrument writes HTML if path ends in .html, text otherwise.
+    """
+    if path is None:
+        yield
+        return
+
+    if kind == 'pyinstrument':
+        if not PYINSTRUMENT_AVAILABLE:
+            raise RuntimeError("pyinstrument is not installed: pip install pyinstrument")
+        from pyinstrument import Profiler
+        sampler = Profiler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            output = sampler.output_html() if path.endswith('.html') else sampler.output_text()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(output)
+        return
+
+    import cProfile
+    tracer = cProfile.Profile()
+    tracer.enable()
+    try:
+        yield
+    finally:
+        tracer.disable()
+        tracer.dump_stats(path)
@@ -0,0 +1,214 @@
+"""
+Batch terminology rewriter
+
+All replacements are compiled into one regex together with the markdown
+constructs that must never be rewritten, and applied in a single
+re.sub pass per file with a dictionary lookup for the replacement. Left
+untouched are:
+
+- YAML front matter, fenced and indented code blocks and inline code
+  spans (indented lines continuing a list item are rewritten)
+- URLs, autolinks, HTML tags, link destinations and reference definitions
+- identifiers: terms glued to paths, file extensions or other
+  identifier characters (``config.yml``, ``src/app``, ``auth-token``,
+  ``$env``)
+
+Replacements keep the capitalization of the replaced word (``Auth`` ->
+``Authentication``, ``AUTH`` -> ``AUTHENTICATION``). Files are processed
+in parallel and written atomically (temp file + rename), so an
+interrupted run never leaves a half-written file; --dry-run prints a
+unified diff instead.
+"""
+
+import argparse
+import difflib
+import os
+import re
+import shutil
+import tempfile
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from .parallel import map_tiles, resolve_jobs
+from .terms import trie_pattern
+
+# Files per parallel task
+FILES_PER_TASK = 16
+
+# Code, shared with fact extraction
+FENCED_CODE = (r'^[ ]{0,3}(?P<fence>(?P<fence_char>[`~])(?P=fence_char){2,})[^\n]*'
+               r'(?:\n[^\n]*?)*?(?:\n[ ]{0,3}(?P=fence)(?P=fence_char)*[ \t]*\r?$|\Z)')
+INLINE_CODE = r'(?P<ticks>`+)[^\n]*?(?<!`)(?P=ticks)(?!`)'
+# Lines indented by 4+ spaces or a tab after a blank line, with the blank lines between them
+INDENTED_CODE = (r'(?P<indented>(?:\A|^[ \t]*\r?\n)(?:[ ]{4}|\t)[^\n]*'
+                 r'(?:\n(?:[ \t]*\r?\n)*(?:[ ]{4}|\t)[^\n]*)*)')
+
+# Regions that are copied through unchanged
+PROTECTED = [
+    r'\A---[ \t]*\r?\n(?:.*?\r?\n)??(?:---|\.\.\.)[ \t]*(?:\r?\n|\Z)',  # front matter
+    FENCED_CODE,
+    INLINE_CODE,
+    INDENTED_CODE,
+    r'(?:https?|ftp)://[^\s<>()\[\]]+|www\.[^\s<>()\[\]]+|mailto:\S+',  # URLs
+    r'</?[A-Za-z][^>\n]*>',  # HTML tags and autolinks
+    r'\]\([^)\n]*\)',  # link destinations
+    r'^[ ]{0,3}\[[^\]\n]+\]:[^\n]*',  # reference definitions
+]
+
+# A list item marker, whose indented continuation lines are not code
+LIST_ITEM = re.compile(r'[ \t]*(?:[-*+]|\d{1,9}[.)])(?:[ \t]|\r?$)')
+
+# Characters that make a word part of an identifier, path or file name
+IDENTIFIER_BEFORE = r'(?<![\w./\\@#$-])'
+IDENTIFIER_AFTER = r'(?![\w/\\@$-]|\.\w)'
+
+
+def match_case(replacement: str, original: str) -> str:
+    """replacement with the capitalization pattern of original"""
+    if len(original) > 1 and original.isupper():
+        return replacement.upper()
+    if original[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+
+def continues_list(text: str, start: int) -> bool:
+    """Whether the blank line at start follows a list item or an indented continuation of one"""
+    end = start
+    while end > 0:
+        line_start = text.rfind('\n', 0, end - 1) + 1
+        line = text[line_start:end - 1]
+        if line.strip():
+            return bool(LIST_ITEM.match(line)) or line[:1] in ' \t'
+        end = line_start
+    return False
+
+
+class Rewriter:
+    """Single-pass, case-insensitive whole-word replacement of many terms"""
+
+    def __init__(self, replacements: Dict[str, str]):
+        self.replacements = {term.lower(): new for term, new in replacements.items()
+                             if term and term.lower() != new.lower()}
+        terms = ''
+        if self.replacements:
+            terms = (f'|{IDENTIFIER_BEFORE}(?P<term>{trie_pattern(self.replacements)})'
+                     f'{IDENTIFIER_AFTER}')
+        flags = re.MULTILINE | re.DOTALL | re.IGNORECASE
+        self.regex = re.compile('|'.join(PROTECTED) + terms, flags)
+        # Indented lines continuing a list item are rewritten like any other text
+        self.list_regex = re.compile(
+            '|'.join(region for region in PROTECTED if region != INDENTED_CODE) + terms, flags)
+
+    def _replace(self, match: re.Match) -> str:
+        term = match.group('term')
+        if term is None:
+            if match.lastgroup == 'indented' and continues_list(match.string, match.start()):
+                return self.list_regex.sub(self._replace, match.group())
+            return match.group()
+        return match_case(self.replacements[term.lower()], term)
+
+    def rewrite(self, text: str) -> str:
+        """text with every unprotected occurrence of a term replaced"""
+        if not self.replacements:
+            return text
+        return self.regex.sub(self._replace, text)
+
+
+class FileResult(NamedTuple):
+    path: str
+    changed: bool
+    diff: Optional[str] = None
+    error: Optional[str] = None
+
+
+def write_atomic(path: str, content: bytes):
+    """Replace a file's content via a temp file in the same directory, keeping its mode"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def rewrite_file(rewriter: Rewriter, path: str, dry_run: bool = False,
+                 label: Optional[str] = None) -> FileResult:
+    """Rewrite one UTF-8 file; with dry_run, return the unified diff instead of writing"""
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        # Decoded without newline translation, so untouched bytes stay identical
+        original = raw.decode('utf-8')
+        rewritten = rewriter.rewrite(original)
+        if rewritten == original:
+            return FileResult(path, False)
+        if dry_run:
+            label = label or path
+            diff = ''.join(difflib.unified_diff(
+                original.splitlines(keepends=True), rewritten.splitlines(keepends=True),
+                fromfile=f'a/{label}', tofile=f'b/{label}'
+            ))
+            return FileResult(path, True, diff)
+        write_atomic(path, rewritten.encode('utf-8'))
+        return FileResult(path, True)
+    except (OSError, UnicodeDecodeError) as e:
+        return FileResult(path, False, error=str(e))
+
+
+def _rewrite_task(rewriter: Rewriter, task) -> List[FileResult]:
+    paths, dry_run, root = task
+    return [rewrite_file(rewriter, path, dry_run, os.path.relpath(path, root)) for path in paths]
+
+
+def rewrite_files(replacements: Dict[str, str], paths: Sequence[str], jobs: int = 1,
+                  dry_run: bool = False, root: str = '.') -> Iterable[FileResult]:
+    """Rewrite files on jobs processes, yielding results in input order"""
+    rewriter = Rewriter(replacements)
+    tasks = [(paths[start:start + FILES_PER_TASK], dry_run, root)
+             for start in range(0, len(paths), FILES_PER_TASK)]
+    for results in map_tiles(_rewrite_task, tasks, jobs, rewriter):
+        yield from results
+
+
+def main(replacements: Dict[str, str], files: Sequence[str], repo_root: str,
+         argv: Optional[Sequence[str]] = None) -> int:
+    """Command line entry point of generated fix scripts"""
+    parser = argparse.ArgumentParser(description="Standardize documentation terminology")
+    parser.add_argument('files', nargs='*',
+                        help="files to rewrite, relative to the repository (default: the affected files)")
+    parser.add_argument('--repo-path', default=repo_root,
+                        help="repository the file paths are relative to (default: %(default)s)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="print a unified diff instead of changing files")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="worker processes; 0 uses all cores (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    root = os.path.normpath(args.repo_path)
+    paths = [os.path.join(root, file) for file in (args.files or files)]
+
+    changed = 0
+    failed = 0
+    for result in rewrite_files(replacements, paths, resolve_jobs(args.jobs), args.dry_run, root):
+        if result.error:
+            print(f"❌ {result.path}: {result.error}")
+            failed += 1
+        elif result.changed:
+            changed += 1
+            if args.dry_run:
+                print(result.diff, end='')
+            else:
+                print(f"✓ Fixed: {result.path}")
+
+    if args.dry_run:
+        print(f"\n🔍 {changed} files would change")
+    else:
+        print(f"\n✅ Fixed {changed} files")
+    return 1 if failed else 0
@@ -0,0 +1,66 @@
+"""
+Detector rule sets
+
+One engine loads, chunks, tokenizes and vectorizes the corpus once; rule
+sets decide what counts as a finding:
+
+- advanced: regex polarity of chunks and sentences, numeric conflicts,
+  semantic sentence contradictions and terminology standardization
+- basic: the lightweight heuristics of detect_contradictions.py, i.e.
+  substring contradiction indicators and groups of interchangeable terms
+
+Both run over the same pair scan, so selecting both costs one scan.
+"""
+
+from typing import List, Tuple
+
+from .polarity import Polarity
+
+RULE_SETS = ('basic', 'advanced')
+
+# Basic rules: duplicates above this similarity, contradiction checks inside the band
+BASIC_DUPLICATE_THRESHOLD = 0.7
+BASIC_CONTRADICTION_BAND = (0.4, 0.7)
+
+# (positive, negative) substrings; a pair contradicts when one text has one and the other the other
+CONTRADICTION_INDICATORS: List[Tuple[str, str]] = [
+    ('must', 'must not'),
+    ('should', 'should not'),
+    ('always', 'never'),
+    ('required', 'optional'),
+    ('yes', 'no'),
+    ('true', 'false'),
+    ('will', "won't"),
+    ('does', "doesn't"),
+    ('is', "isn't"),
+    ('are', "aren't")
+]
+
+# Common technical term variations
+TERM_VARIATIONS: List[List[str]] = [
+    ['component', 'widget', 'element'],
+    ['function', 'method', 'procedure'],
+    ['property', 'attribute', 'field'],
+    ['directory', 'folder'],
+    ['repository', 'repo'],
+    ['configuration', 'config', 'settings'],
+    ['authentication', 'auth'],
+    ['authorization', 'authz'],
+    ['identifier', 'id'],
+    ['application', 'app']
+]
+
+
+def indicator_polarity(text: str) -> Polarity:
+    """(positive, negative) bitmasks of the contradiction indicators a lowercased text contains
+
+    Two texts trip the basic contradiction heuristic exactly when their
+    masks are opposed().
+    """
+    positive = negative = 0
+    for bit, (positive_form, negative_form) in enumerate(CONTRADICTION_INDICATORS):
+        if positive_form in text:
+            positive |= 1 << bit
+        if negative_form in text:
+            negative |= 1 << bit
+    return positive, negative
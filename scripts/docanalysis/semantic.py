@@ -0,0 +1,125 @@
+"""
+Pattern-indexed join for sentence-level contradictions
+
+Every sentence is classified once into a bitmask of the polarity patterns
+whose positive form it contains and a bitmask of those whose negative form
+it contains. Two sentences contradict when one hits the positive and the
+other the negative form of the same pattern. (Conflicting numbers are
+found by the fact index in facts.py.)
+
+Instead of testing every sentence pair, sentences are posted into one
+bucket per pattern polarity, so the candidates of a sentence are read
+straight from the opposite buckets.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Set, Tuple
+
+from .polarity import Polarity
+
+# (positive mask, negative mask) of one sentence
+SentenceFeatures = Polarity
+
+
+def encode_features(features: SentenceFeatures) -> list:
+    """JSON-serializable form of sentence features, for the analysis cache"""
+    positive, negative = features
+    return [positive, negative]
+
+
+def decode_features(data: list) -> SentenceFeatures:
+    """Inverse of encode_features"""
+    positive, negative = data
+    return positive, negative
+
+
+def _bits(mask: int) -> Iterable[int]:
+    """Positions of the set bits of a mask"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class SentenceIndex:
+    """Classified sentences of all chunks, posted by pattern polarity
+
+    Sentence ids are assigned in chunk order, then sentence order, so
+    sorting ids also sorts by (chunk, position within chunk). Masks and
+    postings are kept in arrays.
+    """
+
+    def __init__(self, n_patterns: int):
+        self.chunk_starts = array('I', [0])
+        self.chunk_of = array('I')
+        self.positive = array('I')
+        self.negative = array('I')
+        self.positive_postings = [array('I') for _ in range(n_patterns)]
+        self.negative_postings = [array('I') for _ in range(n_patterns)]
+
+    @property
+    def n_chunks(self) -> int:
+        return len(self.chunk_starts) - 1
+
+    def add_chunk(self, features: Iterable[SentenceFeatures]):
+        """Append the classified sentences of the next chunk"""
+        chunk = self.n_chunks
+        sentence_id = self.chunk_starts[-1]
+        for positive, negative in features:
+            self.chunk_of.append(chunk)
+            self.positive.append(positive)
+            self.negative.append(negative)
+            for bit in _bits(positive):
+                self.positive_postings[bit].append(sentence_id)
+            for bit in _bits(negative):
+                self.negative_postings[bit].append(sentence_id)
+            sentence_id += 1
+        self.chunk_starts.append(sentence_id)
+
+    def sentence_position(self, sentence_id: int) -> Tuple[int, int]:
+        """(chunk, index within chunk) of a sentence id"""
+        chunk = self.chunk_of[sentence_id]
+        return chunk, sentence_id - self.chunk_starts[chunk]
+
+    def _later(self, postings: array, start: int) -> array:
+        return postings[bisect_left(postings, start):]
+
+    def contradicting(self, chunk: int, chunks: Optional[Set[int]] = None) -> List[Tuple[int, int]]:
+        """Contradicting (a, b) sentence-id pairs, a in chunk and b in a later chunk
+
+        chunks restricts b to those chunks. Pairs are ordered by b's chunk,
+        then a, then b - the order of a nested loop over chunk pairs and
+        their sentences.
+        """
+        later = self.chunk_starts[chunk + 1]
+        pairs = []
+        for a in range(self.chunk_starts[chunk], later):
+            matches = set()
+            for bit in _bits(self.positive[a]):
+                matches.update(self._later(self.negative_postings[bit], later))
+            for bit in _bits(self.negative[a]):
+                matches.update(self._later(self.positive_postings[bit], later))
+
+            for b in matches:
+                if chunks is None or self.chunk_of[b] in chunks:
+                    pairs.append((self.chunk_of[b], a, b))
+
+        pairs.sort()
+        return [(a, b) for _, a, b in pairs]
+
+    def opposing(self, chunk: int) -> List[Tuple[int, int]]:
+        """Contradicting sentence-id pairs between chunk and every other chunk, earlier or later
+
+        Pairs are (smaller id, larger id), sorted.
+        """
+        start, end = self.chunk_starts[chunk], self.chunk_starts[chunk + 1]
+        pairs = set()
+        for a in range(start, end):
+            matches = set()
+            for bit in _bits(self.positive[a]):
+                matches.update(self.negative_postings[bit])
+            for bit in _bits(self.negative[a]):
+                matches.update(self.positive_postings[bit])
+            pairs.update((min(a, b), max(a, b)) for b in matches if not start <= b < end)
+        return sorted(pairs)
@@ -0,0 +1,180 @@
+"""
+Minimal asyncio HTTP/JSON server for index queries
+
+Editor plugins and the site build ask questions about single paragraphs,
+so the analyzer's index is loaded once and queried over a local HTTP
+server instead of running the analyzer per question. Connections are
+kept alive (HTTP/1.1), so a client can send many requests over one
+socket, and every endpoint takes a batch of texts in one request.
+
+A route maps a path to a query function called as query(text, options),
+where options are the other fields of the request. Requests are either
+
+    POST /similar  {"text": "...", "top_k": 5}    -> {"result": ...}
+    POST /similar  {"texts": ["...", "..."]}      -> {"results": [..., ...]}
+
+or GET /similar?text=...&top_k=5 for quick checks with curl. Queries run
+on the event loop one at a time; they take milliseconds, and running them
+serially keeps the index free of locking.
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+# Query function of a route: (text, options) -> JSON-serializable result
+Query = Callable[[str, Dict[str, Any]], Any]
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Largest request body accepted, in bytes
+MAX_BODY = 16 << 20
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    """Request error answered with status and a JSON error message"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class QueryServer:
+    """Serve query functions as JSON endpoints over keep-alive HTTP/1.1"""
+
+    def __init__(self, routes: Dict[str, Query], info: Optional[Callable[[], Dict]] = None):
+        self.routes = routes
+        # GET / answers with this, e.g. index statistics
+        self.info = info or (lambda: {})
+        self.requests = 0
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    ready: Optional[Callable[[Tuple], None]] = None):
+        """Serve until cancelled; ready is called with the bound address"""
+        server = await asyncio.start_server(self._connection, host, port)
+        async with server:
+            if ready:
+                ready(server.sockets[0].getsockname())
+            await server.serve_forever()
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the requests of one connection until the client closes it"""
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    # The stream position is unknown after a bad request
+                    writer.write(_response(e.status, {'error': str(e)}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                method, target, version, headers, body = request
+                status, payload = self.dispatch(method, target, body)
+                # HTTP/1.1 keeps connections open unless asked not to, HTTP/1.0 only when asked
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        """Status and JSON payload answering one request"""
+        self.requests += 1
+        url = urlsplit(target)
+        try:
+            if url.path == '/':
+                if method != 'GET':
+                    raise HTTPError(405, "use GET /")
+                return 200, {'routes': sorted(self.routes), **self.info()}
+
+            query = self.routes.get(url.path)
+            if query is None:
+                raise HTTPError(404, f"no such endpoint: {url.path}")
+            if method == 'GET':
+                options = dict(parse_qsl(url.query))
+            elif method == 'POST':
+                try:
+                    options = json.loads(body or b'{}')
+                except ValueError as e:
+                    raise HTTPError(400, f"invalid JSON: {e}")
+                if not isinstance(options, dict):
+                    raise HTTPError(400, "expected a JSON object")
+            else:
+                raise HTTPError(405, f"use GET or POST {url.path}")
+            return 200, _answer(query, options)
+        except HTTPError as e:
+            return e.status, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': f"{type(e).__name__}: {e}"}
+
+
+def _answer(query: Query, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run query on the text or batch of texts of a request"""
+    if 'texts' in options:
+        texts = options.pop('texts')
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            raise HTTPError(400, "'texts' must be a list of strings")
+        try:
+            return {'results': [query(text, options) for text in texts]}
+        except (TypeError, ValueError) as e:
+            raise HTTPError(400, str(e))
+
+    text = options.pop('text', None)
+    if not isinstance(text, str):
+        raise HTTPError(400, "expected 'text' (a string) or 'texts' (a list of strings)")
+    try:
+        return {'result': query(text, options)}
+    except (TypeError, ValueError) as e:
+        raise HTTPError(400, str(e))
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, str, Dict[str, str], bytes]]:
+    """(method, target, version, lowercased headers, body) of the next request, None at end of stream"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise HTTPError(400, "chunked request bodies are not supported, send Content-Length")
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"request body over {MAX_BODY} bytes")
+    body = await reader.readexactly(length) if length > 0 else b''
+    return method.upper(), target, version.upper(), headers, body
+
+
+def _response(status: int, payload: Any, keep_alive: bool) -> bytes:
+    """Serialized HTTP response with a JSON body"""
+    body = json.dumps(payload).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
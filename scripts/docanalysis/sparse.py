@@ -0,0 +1,400 @@
+"""
+Sparse TF-IDF matrix and blocked pairwise cosine similarity
+
+Chunks are stored as rows of a CSR (compressed sparse row) matrix over an
+interned vocabulary, with row norms computed once. Pairwise similarity is
+computed block by block as a sparse matrix product when scipy is installed,
+and by accumulating over an inverted index (token -> chunk ids) otherwise.
+Either way only pairs that share at least one token are ever scored.
+"""
+
+import math
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Try to import the vectorized backend
+try:
+    import numpy as np
+    from scipy import sparse as sp
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# Rows per block when computing pairwise similarities
+DEFAULT_BLOCK_SIZE = 256
+
+
+class Vocabulary:
+    """Interns tokens to dense integer ids"""
+
+    def __init__(self):
+        self.token_to_id: Dict[str, int] = {}
+        self.tokens: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self.token_to_id
+
+    def intern(self, token: str) -> int:
+        """Return the id of a token, assigning a new one if needed"""
+        token_id = self.token_to_id.get(token)
+        if token_id is None:
+            token_id = len(self.tokens)
+            self.token_to_id[token] = token_id
+            self.tokens.append(token)
+        return token_id
+
+    def get(self, token: str) -> Optional[int]:
+        """Return the id of a token or None if it was never interned"""
+        return self.token_to_id.get(token)
+
+
+class SparseMatrix:
+    """Row-major sparse matrix with cached row norms"""
+
+    def __init__(self, indptr: array, indices: array, data: array,
+                 vocabulary: Vocabulary):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.vocabulary = vocabulary
+        self.norms = array('d', (
+            math.sqrt(sum(v * v for v in data[indptr[i]:indptr[i + 1]]))
+            for i in range(len(indptr) - 1)
+        ))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, float]],
+                  vocabulary: Optional[Vocabulary] = None) -> 'SparseMatrix':
+        """Build a matrix from token -> weight dicts, interning tokens"""
+        if vocabulary is None:
+            vocabulary = Vocabulary()
+        return cls.from_id_rows(
+            ({vocabulary.intern(token): weight for token, weight in row.items()} for row in rows),
+            vocabulary
+        )
+
+    @classmethod
+    def from_id_rows(cls, rows: Iterable[Dict[int, float]],
+                     vocabulary: Vocabulary) -> 'SparseMatrix':
+        """Build a matrix from token id -> weight dicts over an existing vocabulary"""
+        indptr = array('q', [0])
+        indices = array('i')
+        data = array('d')
+
+        for row in rows:
+            entries = sorted(
+                (column, weight) for column, weight in row.items() if weight
+            )
+            for column, weight in entries:
+                indices.append(column)
+                data.append(weight)
+            indptr.append(len(indices))
+
+        return cls(indptr, indices, data, vocabulary)
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_cols(self) -> int:
+        return len(self.vocabulary)
+
+    def row(self, i: int) -> Tuple[array, array]:
+        """Return the (column indices, weights) of a row"""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def dot(self, i: int, j: int) -> float:
+        """Dot product of two rows (merge of their sorted column indices)"""
+        a, a_end = self.indptr[i], self.indptr[i + 1]
+        b, b_end = self.indptr[j], self.indptr[j + 1]
+        indices, data = self.indices, self.data
+        total = 0.0
+        while a < a_end and b < b_end:
+            if indices[a] == indices[b]:
+                total += data[a] * data[b]
+                a += 1
+                b += 1
+            elif indices[a] < indices[b]:
+                a += 1
+            else:
+                b += 1
+        return total
+
+    def cosine(self, i: int, j: int) -> float:
+        """Cosine similarity of two rows using the cached norms"""
+        if self.norms[i] == 0 or self.norms[j] == 0:
+            return 0
+        return self.dot(i, j) / (self.norms[i] * self.norms[j])
+
+    def to_scipy(self):
+        """Convert to a scipy.sparse CSR matrix"""
+        return sp.csr_matrix(
+            (np.frombuffer(self.data, dtype=np.float64),
+             np.frombuffer(self.indices, dtype=np.int32),
+             np.frombuffer(self.indptr, dtype=np.int64)),
+            shape=(self.n_rows, self.n_cols)
+        )
+
+
+class InvertedIndex:
+    """Token -> posting list of chunk ids, built while chunks are loaded
+
+    Chunk ids must be added in increasing order so posting lists stay
+    sorted. Weights are attached once the TF-IDF matrix is known.
+    """
+
+    def __init__(self, vocabulary: Optional[Vocabulary] = None):
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self.postings: List[array] = []
+        self.weights: List[array] = []
+        self.weighted_matrix = None
+        self.n_docs = 0
+
+    @classmethod
+    def from_matrix(cls, matrix: 'SparseMatrix') -> 'InvertedIndex':
+        """Build an index over the non-zero columns of a matrix"""
+        index = cls(matrix.vocabulary)
+        for i in range(matrix.n_rows):
+            index.add(i, (matrix.vocabulary.tokens[c] for c in matrix.row(i)[0]))
+        return index
+
+    def add(self, doc_id: int, tokens: Iterable[str]):
+        """Record the unique tokens of a chunk"""
+        self.add_ids(doc_id, (self.vocabulary.intern(t) for t in tokens))
+
+    def add_ids(self, doc_id: int, token_ids: Iterable[int]):
+        """Record the unique token ids of a chunk, already interned in the vocabulary"""
+        for token_id in sorted(set(token_ids)):
+            while len(self.postings) <= token_id:
+                self.postings.append(array('i'))
+            self.postings[token_id].append(doc_id)
+        self.n_docs = max(self.n_docs, doc_id + 1)
+
+    def document_frequency(self, token: str) -> int:
+        """Number of chunks containing a token"""
+        token_id = self.vocabulary.get(token)
+        if token_id is None or token_id >= len(self.postings):
+            return 0
+        return len(self.postings[token_id])
+
+    def pruned_columns(self, max_df: Optional[float] = None,
+                       max_postings: Optional[int] = None) -> Set[int]:
+        """Token ids too frequent to be used for candidate generation
+
+        max_df is a fraction of all chunks, max_postings an absolute
+        posting-list length. Pruned tokens still count towards the final
+        similarity of a candidate pair; they just don't create candidates.
+        """
+        limit = None
+        if max_df is not None:
+            limit = max_df * self.n_docs
+        if max_postings is not None:
+            limit = max_postings if limit is None else min(limit, max_postings)
+        if limit is None:
+            return set()
+        return {token_id for token_id, docs in enumerate(self.postings) if len(docs) > limit}
+
+    def attach_weights(self, matrix: 'SparseMatrix'):
+        """Align per-posting weights with the rows of a TF-IDF matrix"""
+        if self.weighted_matrix is matrix:
+            return
+        self.weights = [array('d', bytes(8 * len(docs))) for docs in self.postings]
+        cursors = [0] * len(self.postings)
+
+        for j in range(matrix.n_rows):
+            for k in range(matrix.indptr[j], matrix.indptr[j + 1]):
+                column = matrix.indices[k]
+                docs = self.postings[column]
+                position = cursors[column]
+                while docs[position] != j:
+                    position += 1
+                self.weights[column][position] = matrix.data[k]
+                cursors[column] = position + 1
+        self.weighted_matrix = matrix
+
+
+def similar_pairs(matrix: SparseMatrix, min_similarity: float,
+                  block_size: int = DEFAULT_BLOCK_SIZE,
+                  index: Optional[InvertedIndex] = None,
+                  max_df: Optional[float] = None,
+                  max_postings: Optional[int] = None,
+                  focus: Optional[Set[int]] = None,
+                  rows: Optional[Tuple[int, int]] = None,
+                  stats: Optional[Counter] = None) -> Iterator[Tuple[int, int, float]]:
+    """Yield (i, j, similarity) for i < j with similarity > min_similarity
+
+    Pairs are yielded in row-major order, the same order as a nested
+    ``for i ... for j in range(i + 1, n)`` loop. Pairs that share no
+    tokens have similarity 0 and are never yielded, so min_similarity
+    must not be negative.
+
+    index should share the matrix vocabulary; one is built from the matrix
+    when omitted. max_df / max_postings prune very frequent tokens from
+    candidate generation (see InvertedIndex.pruned_columns); scores of the
+    remaining candidates stay exact. With focus, only pairs involving at
+    least one of those rows are scored. rows=(start, end) limits the scan
+    to pairs whose first row lies in that range, so disjoint ranges can be
+    scored independently (not combinable with focus).
+
+    stats, if given, counts the pairs in scope (pairs_considered), the
+    candidates whose similarity was computed (pairs_scored) and those
+    above min_similarity (pairs_similar).
+    """
+    if focus is not None and rows is not None:
+        raise ValueError("focus and rows cannot be combined")
+    if rows is None:
+        rows = (0, matrix.n_rows)
+    if index is None:
+        index = InvertedIndex.from_matrix(matrix)
+    pruned = index.pruned_columns(max_df, max_postings)
+    if stats is None:
+        stats = Counter()
+    stats['pairs_considered'] += _pair_count(matrix.n_rows, rows, focus)
+
+    if SCIPY_AVAILABLE:
+        yield from _similar_pairs_scipy(matrix, min_similarity, block_size, pruned, focus, rows, stats)
+    else:
+        yield from _similar_pairs_indexed(matrix, index, min_similarity, pruned, focus, rows, stats)
+
+
+def _pair_count(n: int, rows: Tuple[int, int], focus: Optional[Set[int]]) -> int:
+    """Number of pairs similar_pairs covers"""
+    if focus is not None:
+        f = len(focus)
+        return f * (n - f) + f * (f - 1) // 2
+    start, end = rows
+    return (end - start) * (n - 1) - (start + end - 1) * (end - start) // 2
+
+
+def _similar_pairs_scipy(matrix: SparseMatrix, min_similarity: float, block_size: int,
+                         pruned: Set[int], focus: Optional[Set[int]],
+                         row_range: Tuple[int, int], stats: Counter) -> Iterator[Tuple[int, int, float]]:
+    """Blocked sparse product X[block] @ X[block_start:].T (or X[focus block] @ X.T)"""
+    n = matrix.n_rows
+    X = matrix.to_scipy()
+    norms = np.frombuffer(matrix.norms, dtype=np.float64)
+
+    candidates_matrix = X
+    if pruned:
+        keep = np.ones(matrix.n_cols)
+        keep[list(pruned)] = 0
+        candidates_matrix = X.multiply(keep).tocsr()
+        candidates_matrix.eliminate_zeros()
+
+    def score(rows, cols, dots):
+        stats['pairs_scored'] += len(rows)
+        if pruned and len(rows):
+            # Candidates came from a partial product; rescore them exactly
+            dots = np.asarray(X[rows].multiply(X[cols]).sum(axis=1)).ravel()
+
+        denominators = norms[rows] * norms[cols]
+        nonzero = denominators > 0
+        rows, cols = rows[nonzero], cols[nonzero]
+        sims = dots[nonzero] / denominators[nonzero]
+
+        keep = sims > min_similarity
+        stats['pairs_similar'] += int(keep.sum())
+        return rows[keep], cols[keep], sims[keep]
+
+    if focus is None:
+        for start in range(row_range[0], row_range[1], block_size):
+            end = min(start + block_size, row_range[1])
+            product = (candidates_matrix[start:end] @ candidates_matrix[start:].T).tocoo()
+
+            rows = product.row.astype(np.int64) + start
+            cols = product.col.astype(np.int64) + start
+            upper = cols > rows
+            rows, cols, sims = score(rows[upper], cols[upper], product.data[upper])
+
+            for k in np.lexsort((cols, rows)):
+                yield int(rows[k]), int(cols[k]), float(sims[k])
+        return
+
+    focus_rows = np.array(sorted(focus), dtype=np.int64)
+    in_focus = np.zeros(n, dtype=bool)
+    in_focus[focus_rows] = True
+    found_rows, found_cols, found_sims = [], [], []
+
+    for start in range(0, len(focus_rows), block_size):
+        block = focus_rows[start:start + block_size]
+        product = (candidates_matrix[block] @ candidates_matrix.T).tocoo()
+
+        rows = block[product.row]
+        cols = product.col.astype(np.int64)
+        # Each pair once: no diagonal, and the smaller focus row owns focus-focus pairs
+        owned = (cols != rows) & ~(in_focus[cols] & (cols < rows))
+        rows, cols, sims = score(rows[owned], cols[owned], product.data[owned])
+
+        found_rows.append(np.minimum(rows, cols))
+        found_cols.append(np.maximum(rows, cols))
+        found_sims.append(sims)
+
+    if found_rows:
+        rows, cols, sims = (np.concatenate(found_rows), np.concatenate(found_cols),
+                            np.concatenate(found_sims))
+        for k in np.lexsort((cols, rows)):
+            yield int(rows[k]), int(cols[k]), float(sims[k])
+
+
+def _similar_pairs_indexed(matrix: SparseMatrix, index: InvertedIndex, min_similarity: float,
+                           pruned: Set[int], focus: Optional[Set[int]],
+                           row_range: Tuple[int, int], stats: Counter) -> Iterator[Tuple[int, int, float]]:
+    """Pure-Python scoring by accumulating dot products over posting lists"""
+    index.attach_weights(matrix)
+    indptr, indices, data, norms = matrix.indptr, matrix.indices, matrix.data, matrix.norms
+    # Chunk -> weight of every pruned column, for completing the scores of candidates
+    pruned_weights = {column: dict(zip(index.postings[column], index.weights[column])) for column in pruned}
+    found = []
+
+    for i in (range(*row_range) if focus is None else sorted(focus)):
+        if norms[i] == 0:
+            continue
+
+        dots = {}
+        for k in range(indptr[i], indptr[i + 1]):
+            column = indices[k]
+            if column in pruned:
+                continue
+            weight = data[k]
+            docs, weights = index.postings[column], index.weights[column]
+            start = bisect_right(docs, i) if focus is None else 0
+            for position in range(start, len(docs)):
+                j = docs[position]
+                dots[j] = dots.get(j, 0.0) + weight * weights[position]
+
+        if focus is not None:
+            # Each pair once: no diagonal, and the smaller focus row owns focus-focus pairs
+            dots.pop(i, None)
+            for j in [j for j in dots if j < i and j in focus]:
+                del dots[j]
+
+        stats['pairs_scored'] += len(dots)
+        if pruned and dots:
+            # Candidates came from a partial dot product; add the share of the pruned columns
+            for k in range(indptr[i], indptr[i + 1]):
+                share = pruned_weights.get(indices[k])
+                if share is not None:
+                    weight = data[k]
+                    for j in dots:
+                        dots[j] += weight * share.get(j, 0.0)
+
+        for j in sorted(dots):
+            if norms[j] == 0:
+                continue
+            similarity = dots[j] / (norms[i] * norms[j])
+            if similarity > min_similarity:
+                stats['pairs_similar'] += 1
+                if focus is None:
+                    yield i, j, similarity
+                else:
+                    found.append((min(i, j), max(i, j), similarity))
+
+    found.sort()
+    yield from found
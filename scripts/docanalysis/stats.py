@@ -0,0 +1,169 @@
+"""
+One-pass corpus statistics and term weighting
+
+CorpusStats gathers everything TF-IDF weighting needs while chunks are
+added: the term frequencies of every chunk (its distinct token ids and
+their counts, in a CSR layout), document frequencies and chunk lengths.
+IDF scores and chunk weights are then computed from these counts, so no
+stage has to walk the token lists again. Statistics built separately,
+e.g. per shard or worker, are combined with merge().
+
+Weightings:
+
+- max: term count divided by the chunk's largest count, times IDF
+  log(N / (df + 1)) (the analyzer's original weighting)
+- sublinear: (1 + log(count)) times the same IDF, which damps terms
+  repeated many times in one chunk
+- bm25: Okapi BM25 term saturation (k1, b) with length normalization
+  against the average chunk length, times IDF
+  log(1 + (N - df + 0.5) / (df + 0.5))
+"""
+
+import math
+from array import array
+from collections import Counter
+from typing import Callable, Dict, Hashable, Iterable, Mapping, Optional, TypeVar
+
+from .sparse import Vocabulary
+
+WEIGHTINGS = ('max', 'sublinear', 'bm25')
+
+# BM25 term saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+Key = TypeVar('Key', bound=Hashable)
+
+
+def term_weights(counts: Mapping[Key, int], idf: Callable[[Key], float], weighting: str = 'max',
+                 length: Optional[int] = None, average_length: float = 1.0) -> Dict[Key, float]:
+    """Weights of the terms of one text from their counts
+
+    idf returns the IDF of a term. length (the text's token count, by
+    default the sum of counts) and average_length only matter for bm25.
+    """
+    if not counts:
+        return {}
+    if weighting == 'max':
+        max_freq = max(counts.values())
+        return {term: freq / max_freq * idf(term) for term, freq in counts.items()}
+    if weighting == 'sublinear':
+        return {term: (1 + math.log(freq)) * idf(term) for term, freq in counts.items()}
+    if weighting == 'bm25':
+        if length is None:
+            length = sum(counts.values())
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1.0))
+        return {term: freq * (BM25_K1 + 1) / (freq + norm) * idf(term) for term, freq in counts.items()}
+    raise ValueError(f"unknown weighting {weighting!r}, expected one of {', '.join(WEIGHTINGS)}")
+
+
+class CorpusStats:
+    """Term frequencies, document frequencies and lengths of chunks, gathered in one pass
+
+    Token ids index the shared vocabulary. Removed chunks keep their
+    term frequencies but no longer count towards document frequencies,
+    the chunk count or the average length.
+    """
+
+    def __init__(self, vocabulary: Optional[Vocabulary] = None):
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        # Distinct token ids (sorted) and their counts, chunk by chunk
+        self.starts = array('q', [0])
+        self.token_ids = array('I')
+        self.counts = array('I')
+        # Token count of every chunk
+        self.lengths = array('I')
+        # Live chunks containing every token id
+        self.document_frequency = array('i')
+        self.n_docs = 0
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, token_ids: Iterable[int]) -> int:
+        """Count the token ids of the next chunk and return its index"""
+        counts = Counter(token_ids)
+        df = self.document_frequency
+        if counts:
+            top = max(counts)
+            if top >= len(df):
+                df.extend([0] * (top + 1 - len(df)))
+        for token_id in sorted(counts):
+            self.token_ids.append(token_id)
+            self.counts.append(counts[token_id])
+            df[token_id] += 1
+        self.starts.append(len(self.token_ids))
+        length = sum(counts.values())
+        self.lengths.append(length)
+        self.n_docs += 1
+        self.total_length += length
+        return len(self.lengths) - 1
+
+    def add_tokens(self, tokens: Iterable[str]) -> int:
+        """Intern the tokens of the next chunk and count them"""
+        intern = self.vocabulary.intern
+        return self.add(intern(token) for token in tokens)
+
+    def term_counts(self, chunk: int) -> Dict[int, int]:
+        """Token id -> count of a chunk"""
+        start, end = self.starts[chunk], self.starts[chunk + 1]
+        return dict(zip(self.token_ids[start:end], self.counts[start:end]))
+
+    def remove(self, chunk: int):
+        """Stop counting a chunk in document frequencies, chunk count and average length"""
+        for token_id in self.token_ids[self.starts[chunk]:self.starts[chunk + 1]]:
+            self.document_frequency[token_id] -= 1
+        self.n_docs -= 1
+        self.total_length -= self.lengths[chunk]
+
+    @property
+    def average_length(self) -> float:
+        """Mean token count of the live chunks"""
+        return self.total_length / self.n_docs if self.n_docs else 0.0
+
+    def idf(self, weighting: str = 'max') -> array:
+        """IDF score of every token id under a weighting"""
+        n_docs = self.n_docs
+        if weighting == 'bm25':
+            return array('d', (math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                               for df in self.document_frequency))
+        return array('d', (math.log(n_docs / (df + 1)) for df in self.document_frequency))
+
+    def weights(self, chunk: int, idf: array, weighting: str = 'max') -> Dict[int, float]:
+        """Token id -> weight of a chunk, given IDF scores from idf()"""
+        start, end = self.starts[chunk], self.starts[chunk + 1]
+        token_ids, counts = self.token_ids[start:end], self.counts[start:end]
+        if weighting == 'max':
+            # The default weighting of every chunk, inlined
+            max_freq = max(counts, default=1)
+            return {token_id: freq / max_freq * idf[token_id] for token_id, freq in zip(token_ids, counts)}
+        return term_weights(dict(zip(token_ids, counts)), idf.__getitem__, weighting,
+                            self.lengths[chunk], self.average_length)
+
+    def merge(self, other: 'CorpusStats'):
+        """Append the chunks of statistics gathered separately (e.g. by another worker)
+
+        Token ids of other are mapped into this vocabulary, so both may
+        have been built over different vocabularies. Chunks removed from
+        other stay out of the counts.
+        """
+        other_tokens = other.vocabulary.tokens
+        mapping = array('I', (self.vocabulary.intern(token) for token in other_tokens))
+        df = self.document_frequency
+        if len(df) < len(self.vocabulary):
+            df.extend([0] * (len(self.vocabulary) - len(df)))
+
+        for chunk in range(len(other)):
+            start, end = other.starts[chunk], other.starts[chunk + 1]
+            row = sorted(zip((mapping[token_id] for token_id in other.token_ids[start:end]),
+                             other.counts[start:end]))
+            for token_id, count in row:
+                self.token_ids.append(token_id)
+                self.counts.append(count)
+            self.starts.append(len(self.token_ids))
+            self.lengths.append(other.lengths[chunk])
+        for token_id, count in enumerate(other.document_frequency):
+            df[mapping[token_id]] += count
+        self.n_docs += other.n_docs
+        self.total_length += other.total_length
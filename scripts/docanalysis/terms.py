@@ -0,0 +1,106 @@
+"""
+Single-pass multi-term scanner
+
+All terms of a dictionary are compiled into one regex shaped like a trie
+(``config(?:uration)?|dir(?:ectory)?|...``), so the regex engine follows
+shared prefixes instead of trying every term at every position, and one
+scan of a text counts every term. Lookup cost depends on term length, not
+on how many terms there are.
+
+Where several terms start at the same position (``config`` and
+``configuration``) the engine reports the longest; the shorter ones are
+recovered from a precomputed table of the terms each term starts with.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List
+
+
+def trie_pattern(terms: Iterable[str]) -> str:
+    """Regex source matching any of the terms, longest alternative first"""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: Dict) -> str:
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    if len(branches) == 1 and '' not in node:
+        return branches[0]
+    pattern = '(?:' + '|'.join(branches) + ')'
+    # Optional suffix: greedy, so longer terms are preferred
+    return pattern + '?' if '' in node else pattern
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class TermScanner:
+    """Counts occurrences of many terms in a text in one pass, ignoring case
+
+    With whole_words (the default) a term only counts where it starts and
+    ends at a word boundary, like ``\\bterm\\b``; a term that starts inside
+    a longer matched term (``request`` in ``pull request``) is not counted.
+    Otherwise every substring occurrence counts, overlapping ones included.
+    """
+
+    def __init__(self, terms: Iterable[str], whole_words: bool = True):
+        self.terms: List[str] = list(dict.fromkeys(term.lower() for term in terms if term))
+        self.whole_words = whole_words
+        if not self.terms:
+            self.regex = None
+        elif whole_words:
+            self.regex = re.compile(r'\b(' + trie_pattern(self.terms) + r')\b')
+        else:
+            self.regex = re.compile('(' + trie_pattern(self.terms) + ')')
+
+        # Term -> shorter terms it starts with, which also occur where it matches
+        known = set(self.terms)
+        self._prefixes = {
+            term: [term[:end] for end in range(1, len(term)) if term[:end] in known]
+            for term in self.terms
+        }
+
+    def counts(self, text: str) -> Counter:
+        """Occurrences of every term found in text (terms are keyed lowercase)"""
+        counts = Counter()
+        if self.regex is None:
+            return counts
+        text = text.lower()
+        prefixes = self._prefixes
+        for match in self._matches(text):
+            term = match.group(1)
+            counts[term] += 1
+            start = match.start(1)
+            for prefix in prefixes[term]:
+                if not self.whole_words or self._ends_word(text, start + len(prefix)):
+                    counts[prefix] += 1
+        return counts
+
+    def _matches(self, text: str) -> Iterator[re.Match]:
+        """Longest term match at every position where a term starts"""
+        if self.whole_words:
+            # Whole-word matches of different terms cannot overlap
+            yield from self.regex.finditer(text)
+            return
+        # Substrings can: resume right after the start of each match
+        search = self.regex.search
+        match = search(text)
+        while match:
+            yield match
+            match = search(text, match.start() + 1)
+
+    @staticmethod
+    def _ends_word(text: str, end: int) -> bool:
+        """True if a term ending at end is followed by a word boundary"""
+        before = _is_word_char(text[end - 1])
+        after = end < len(text) and _is_word_char(text[end])
+        return before != after
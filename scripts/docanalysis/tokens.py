@@ -0,0 +1,74 @@
+"""
+Token storage shared by all analysis stages
+
+Every chunk is tokenized once; its tokens are kept as an array of ids
+into the vocabulary shared with the inverted index, which is several
+times smaller than a list of strings and is what the TF-IDF, IDF and
+candidate stages consume. Tokenization and stemming of repeated inputs
+go through bounded LRU caches.
+"""
+
+from array import array
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from .sparse import Vocabulary
+
+# Distinct words whose stems are remembered
+STEM_CACHE_SIZE = 1 << 16
+# Distinct texts (mostly repeated sentences) whose tokens are remembered
+TEXT_CACHE_SIZE = 1 << 12
+
+
+class Memoized:
+    """Bounded LRU cache in front of a function of one hashable argument
+
+    Pickles as the wrapped function and size, so worker processes start
+    with an empty cache.
+    """
+
+    def __init__(self, function: Callable, maxsize: int):
+        self.function = function
+        self.maxsize = maxsize
+        self._cached = lru_cache(maxsize=maxsize)(function)
+
+    def __call__(self, argument):
+        return self._cached(argument)
+
+    def __reduce__(self):
+        return Memoized, (self.function, self.maxsize)
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+
+class TokenStore:
+    """Token-id arrays of all chunks over a shared vocabulary"""
+
+    def __init__(self, vocabulary: Optional[Vocabulary] = None):
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self.chunks: List[array] = []
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def add(self, tokens: Iterable[str]) -> array:
+        """Intern the tokens of the next chunk and return its id array"""
+        intern = self.vocabulary.intern
+        ids = array('I', [intern(token) for token in tokens])
+        self.chunks.append(ids)
+        return ids
+
+    def ids(self, i: int) -> array:
+        """Token ids of chunk i, in text order"""
+        return self.chunks[i]
+
+    def tokens(self, i: int) -> List[str]:
+        """Tokens of chunk i, in text order"""
+        tokens = self.vocabulary.tokens
+        return [tokens[token_id] for token_id in self.chunks[i]]
+
+    def iter_tokens(self) -> Iterator[List[str]]:
+        """Tokens of every chunk, in chunk order"""
+        for i in range(len(self.chunks)):
+            yield self.tokens(i)
@@ -0,0 +1,99 @@
+"""
+Watch mode: polling for changed markdown files and diffing findings
+
+The standard library has no portable file notification API, so the
+watcher polls: every interval it stats the markdown files of the tree and
+compares (mtime, size) with the previous snapshot. A stat per file is
+cheap next to re-analysis, and only the files that changed are handed to
+the analyzer's update_files.
+
+FindingSet keeps the findings of a watch session by a stable identity, so
+each update can report what it added and what it resolved.
+"""
+
+import os
+import time
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple
+
+from .corpus import iter_markdown_files
+
+DEFAULT_INTERVAL = 1.0
+
+# (mtime in ns, size) of a file
+Stamp = Tuple[int, int]
+# (file1, line1, file2, line2) of a finding
+Location = Tuple[str, int, str, int]
+
+
+def snapshot(root: str) -> Dict[str, Stamp]:
+    """Stamp of every markdown file under root"""
+    stamps = {}
+    for path in iter_markdown_files(root):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Deleted between listing and stat
+            continue
+        stamps[path] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+
+class PollingWatcher:
+    """Paths of markdown files changed, added or deleted under root since the last poll"""
+
+    def __init__(self, root: str, interval: float = DEFAULT_INTERVAL):
+        self.root = root
+        self.interval = interval
+        self.stamps = snapshot(root)
+
+    def poll(self) -> List[str]:
+        """Sorted paths that changed since the previous poll (or construction)"""
+        stamps = snapshot(self.root)
+        changed = [path for path, stamp in stamps.items() if self.stamps.get(path) != stamp]
+        changed.extend(path for path in self.stamps if path not in stamps)
+        self.stamps = stamps
+        return sorted(changed)
+
+    def __iter__(self) -> Iterator[List[str]]:
+        """Batches of changed paths, polling every interval seconds until interrupted"""
+        while True:
+            time.sleep(self.interval)
+            changed = self.poll()
+            if changed:
+                yield changed
+
+
+class FindingSet:
+    """Findings of a watch session by kind and identity
+
+    An identity is any hashable key that survives re-analysis of unchanged
+    text; each finding keeps its location, so an update can replace the
+    findings of the files it touched and report the ones it resolved.
+    """
+
+    def __init__(self):
+        self.findings: Dict[str, Dict[Hashable, Location]] = {}
+
+    def replace(self, kind: str, findings: Dict[Hashable, Location],
+                files: Optional[Set[str]] = None) -> Tuple[List[Hashable], List[Location]]:
+        """Replace the findings of a kind involving files (all of them without files)
+
+        Returns the identities of the added findings and the locations of
+        the removed ones.
+        """
+        current = self.findings.setdefault(kind, {})
+        stale = {key for key, location in current.items()
+                 if files is None or location[0] in files or location[2] in files}
+        removed = sorted(current.pop(key) for key in stale if key not in findings)
+        for key in stale:
+            current.pop(key, None)
+        added = [key for key in findings if key not in current and key not in stale]
+        current.update(findings)
+        return added, removed
+
+    def totals(self) -> Dict[str, int]:
+        """Number of findings of each kind"""
+        return {kind: len(findings) for kind, findings in self.findings.items()}
+
+    def __len__(self) -> int:
+        return sum(len(findings) for findings in self.findings.values())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Local HTTP/JSON query service over the documentation index
+
+Loads the advanced analyzer's index once (reusing the per-file analysis
+cache) and answers questions about single paragraphs for editor plugins
+and the site build, without re-running the analyzer per question:
+
+    POST /similar          {"text": "...", "top_k": 10, "min_similarity": 0.1}
+    POST /contradictions   {"text": "...", "top_k": 10}
+    POST /terminology      {"text": "..."}
+
+Every endpoint also takes {"texts": [...]} to answer a batch in one
+request, and GET /<endpoint>?text=... for quick checks with curl. GET /
+returns index statistics. Results are weighted like the batch report, so
+the scores match contradiction_analysis.json. With --watch the index
+follows edits to the tree.
+
+With --index, the server maps an index file written by an earlier run
+(here or by detect_contradictions_advanced.py --save-index) and starts in
+milliseconds when no markdown file changed since; otherwise it loads the
+tree and writes the file for the next start.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from detect_contradictions_advanced import AdvancedSemanticAnalyzer
+from docanalysis.cache import DEFAULT_CACHE_DIR
+from docanalysis.corpus import READ_THREADS
+from docanalysis.nlp import NLTKDataError
+from docanalysis.parallel import resolve_jobs
+from docanalysis.server import DEFAULT_HOST, DEFAULT_PORT, QueryServer
+from docanalysis.stats import WEIGHTINGS
+from docanalysis.watch import DEFAULT_INTERVAL, PollingWatcher, snapshot
+
+
+def _options(options: Dict[str, Any], **types: Callable[[Any], Any]) -> Dict[str, Any]:
+    """Query options converted to their types; unknown options are an error"""
+    unknown = sorted(set(options) - set(types))
+    if unknown:
+        raise ValueError(f"unknown option(s): {', '.join(unknown)}")
+    return {name: types[name](value) for name, value in options.items()}
+
+
+async def follow(analyzer: AdvancedSemanticAnalyzer, watcher: PollingWatcher):
+    """Apply changed files to the index between requests"""
+    while True:
+        await asyncio.sleep(watcher.interval)
+        paths = watcher.poll()
+        if paths:
+            analyzer.update_files(paths)
+            print(f"🔄 Re-indexed {len(paths)} changed file(s)")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Serve similarity, contradiction and terminology "
+                                                 "queries over the documentation index")
+    parser.add_argument('--repo-path', default=str(Path(__file__).resolve().parent.parent),
+                        help="repository to index (default: this checkout)")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help="address to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help="port to listen on; 0 picks a free one (default: %(default)s)")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="worker processes for analyzing uncached files; 0 uses all cores "
+                             "(default: %(default)s)")
+    parser.add_argument('--read-threads', type=int, default=READ_THREADS,
+                        help="threads reading files ahead of analysis (default: %(default)s)")
+    parser.add_argument('--index', metavar='PATH',
+                        help="map this index file if it is current, else build it (see --save-index "
+                             "of detect_contradictions_advanced.py)")
+    parser.add_argument('--watch', action='store_true',
+                        help="re-index markdown files as they change")
+    parser.add_argument('--watch-interval', type=float, default=DEFAULT_INTERVAL, metavar='SECONDS',
+                        help="seconds between checks for changed files (default: %(default)s)")
+    parser.add_argument('--weighting', choices=WEIGHTINGS, default='max',
+                        help="term weighting of chunk vectors (default: %(default)s)")
+    parser.add_argument('--fast-tokenizer', action='store_true',
+                        help="use the built-in regex tokenizer and light stemmer instead of NLTK")
+    parser.add_argument('--cache-dir',
+                        help=f"per-file analysis cache (default: <repo>/{DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="re-process every file without reading or writing the cache")
+    args = parser.parse_args()
+
+    repo_path = args.repo_path
+    cache_dir = None if args.no_cache else (args.cache_dir or os.path.join(repo_path, DEFAULT_CACHE_DIR))
+    analyzer = AdvancedSemanticAnalyzer(cache_dir=cache_dir,
+                                        tokenizer='fast' if args.fast_tokenizer else None,
+                                        resident=args.watch, weighting=args.weighting)
+    watcher = PollingWatcher(repo_path, args.watch_interval) if args.watch else None
+
+    stamps = watcher.stamps if watcher else snapshot(repo_path)
+    started = time.perf_counter()
+    mapped = False
+    # Watch mode updates the index in place, which needs the analysis of every file
+    if args.index and not args.watch and os.path.exists(args.index):
+        try:
+            mapped = analyzer.load_index(args.index, stamps)
+        except ValueError as e:
+            print(f"⚠️  Ignoring index file: {e}")
+        if not mapped:
+            print(f"♻️  Index file {args.index} is out of date, rebuilding it")
+
+    if mapped:
+        print(f"🗂️  Mapped index file: {args.index}")
+        fixes = analyzer.index_meta.get('suggested_fixes')
+    else:
+        print(f"📂 Indexing documents from: {repo_path}")
+        try:
+            analyzer.load_markdown_files(repo_path, jobs=resolve_jobs(args.jobs), read_threads=args.read_threads)
+        except NLTKDataError as e:
+            print(f"❌ {e}")
+            return 1
+        analyzer.prepare_updates()
+        fixes = None
+    if not analyzer.documents:
+        print("❌ No markdown files found!")
+        return 1
+    if fixes is None:
+        fixes = analyzer.find_terminology_issues()['suggested_fixes']
+    if args.index and not mapped:
+        analyzer.save_index(args.index, stamps, suggested_fixes=fixes)
+        print(f"🗂️  Index saved to: {args.index}")
+    print(f"📊 Indexed {len(analyzer.documents)} text chunks from {len(analyzer.file_chunks)} files "
+          f"in {time.perf_counter() - started:.3f}s")
+
+    routes = {
+        '/similar': lambda text, options: analyzer.query_similar(
+            text, **_options(options, top_k=int, min_similarity=float)),
+        '/contradictions': lambda text, options: analyzer.query_contradictions(
+            text, **_options(options, top_k=int)),
+        '/terminology': lambda text, options: analyzer.query_terminology(text, fixes, **_options(options)),
+    }
+
+    def info() -> Dict[str, Any]:
+        return {
+            'repo_path': repo_path,
+            'total_documents': len(analyzer.documents) - len(analyzer.removed),
+            'unique_files': len(analyzer.file_chunks),
+            'vocabulary_size': len(analyzer.index.vocabulary),
+            'tokenizer': analyzer.tokenizer.mode,
+            'weighting': analyzer.weighting,
+            'requests': server.requests,
+        }
+
+    server = QueryServer(routes, info)
+
+    def ready(address):
+        print(f"🌐 Serving queries on http://{address[0]}:{address[1]} (Ctrl+C to stop)")
+        sys.stdout.flush()
+
+    async def run():
+        tasks = [server.serve(args.host, args.port, ready)]
+        if watcher:
+            tasks.append(follow(analyzer, watcher))
+        await asyncio.gather(*tasks)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+    except OSError as e:
+        print(f"❌ Could not start the server: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())